@@ -5,8 +5,9 @@ import json
 import uuid
 from fastmcp import Client
 from fastmcp.client.transports import StreamableHttpTransport
-from groq import Groq
+from groq import AsyncGroq
 from dotenv import load_dotenv
+from src.core.context_packing import pack_blocks
 
 load_dotenv()
 
@@ -15,7 +16,9 @@ PRIVATE_URL = os.environ.get("MCP_PRIVATE_URL")
 
 GROQ_MODEL = os.getenv("GROQ_MODEL")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-groq_client = Groq(api_key=GROQ_API_KEY)
+# Async client: these run on the API's event loop, where a blocking LLM
+# call would stall every other request (searches included)
+groq_client = AsyncGroq(api_key=GROQ_API_KEY)
 
 # ===============================
 # In-memory session storage
@@ -91,7 +94,7 @@ async def planner(user_input: str, session_id: str) -> list[dict]:
         ]
     """
 
-    response = groq_client.chat.completions.create(
+    response = await groq_client.chat.completions.create(
         model=GROQ_MODEL,
         messages=[
             {"role": "system", "content": system_prompt},
@@ -120,6 +123,21 @@ async def planner(user_input: str, session_id: str) -> list[dict]:
 # ===============================
 # Executor from Plan function above
 # ===============================
+def tool_text(result) -> str:
+    """
+    A tool result as prompt text: the chunk texts of database search hits
+    (scores and metadata dropped), else the text the tool returned.
+    """
+    hits = result.data
+    is_hits = isinstance(hits, list) and all(isinstance(h, dict) and "metadata" in h for h in hits)
+    if hits and is_hits:
+        return "\n".join(
+            f"{hit['metadata'].get('file_name', '')}: {hit['metadata'].get('chunk_text', '')}"
+            for hit in hits
+        )
+    return "\n".join(block.text for block in result.content if getattr(block, "text", None))
+
+
 async def executor(plan: list[dict]) -> list[dict]:
     results = []
     for step in plan:
@@ -128,16 +146,20 @@ async def executor(plan: list[dict]) -> list[dict]:
         client = Client(transport)
         async with client:
             result = await client.call_tool(step["tool"], step["args"])
-            results.append({"step": step, "result": str(result)})
+            results.append({"step": step, "result": tool_text(result)})
     return results
 
 
 # ===============================
 # Rewriter
 # ===============================
-def rewrite_output(
+async def rewrite_output(
     user_input: str, plan: list[dict], exec_results: list[dict], session_id: str
 ) -> str:
+    # Token counts go to GET /stats (packing_stats)
+    packed, _ = pack_blocks(user_input, [r["result"] for r in exec_results])
+    exec_results = [{**r, "result": text} for r, text in zip(exec_results, packed)]
+
     prompt = f"""
     User asked: {user_input}
 
@@ -151,7 +173,7 @@ def rewrite_output(
     final answer for the user.
     """
 
-    response = groq_client.chat.completions.create(
+    response = await groq_client.chat.completions.create(
         model=GROQ_MODEL,
         messages=[{"role": "user", "content": prompt}],
         temperature=0,
@@ -166,7 +188,7 @@ def rewrite_output(
 async def mcp_reply(user_input: str, session_id: str) -> str:
     plan = await planner(user_input, session_id)
     exec_results = await executor(plan)
-    final_answer = rewrite_output(user_input, plan, exec_results, session_id)
+    final_answer = await rewrite_output(user_input, plan, exec_results, session_id)
     return final_answer
 
 
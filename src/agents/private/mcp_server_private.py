@@ -1,7 +1,8 @@
 # src/agents/private/mcp_server_private.py
 from typing import Dict, List
 from fastmcp import FastMCP
-from src.core.retriever import retrieve_and_rerank
+from src.core.retriever import aretrieve_and_rerank
+from src.database.schema import SEARCH_MAX_TOP_K
 from src.functions_calling.tool_registry import send_mail_tool
 from dotenv import load_dotenv
 
@@ -13,7 +14,7 @@ mcp = FastMCP("MCP Server Private")
 
 # --- Tool: search in database ---
 @mcp.tool(annotations={"title": "Search in Database"})
-def search_in_database(query: str, top_k: int = 5) -> List[Dict]:
+async def search_in_database(query: str, top_k: int = 5) -> List[Dict]:
     """
     Use this tool when the user asks about companies, documents,
     (e.g. GreenGrow Innovations, GreenFields BioTech, QuantumNext Systems, etc.)
@@ -21,7 +22,9 @@ def search_in_database(query: str, top_k: int = 5) -> List[Dict]:
     It performs semantic search on the internal company dataset and reranks with a cross-encoder.
     """
     try:
-        semantic_hits = retrieve_and_rerank(query, top_k=top_k)
+        # top_k comes from the model: same cap as POST /search
+        top_k = min(max(top_k, 1), SEARCH_MAX_TOP_K)
+        semantic_hits = await aretrieve_and_rerank(query, top_k=top_k)
         return semantic_hits
     except Exception as e:
         return [{"error": str(e)}]
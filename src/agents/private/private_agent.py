@@ -2,7 +2,7 @@
 import os
 import json
 import asyncio
-from groq import Groq
+from groq import AsyncGroq
 from fastmcp import Client
 from fastmcp.client.transports import StreamableHttpTransport
 from dotenv import load_dotenv
@@ -13,7 +13,7 @@ load_dotenv()
 PRIVATE_URL = os.getenv("MCP_PRIVATE_URL")
 GROQ_MODEL_PRIVATE_AGENT = os.getenv("GROQ_MODEL_PRIVATE_AGENT")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-groq_client = Groq(api_key=GROQ_API_KEY)
+groq_client = AsyncGroq(api_key=GROQ_API_KEY)
 
 
 class PrivateAgent:
@@ -50,7 +50,7 @@ class PrivateAgent:
         """
 
         # Call Groq LLM to decide which tool and args
-        response = groq_client.chat.completions.create(
+        response = await groq_client.chat.completions.create(
             model=GROQ_MODEL_PRIVATE_AGENT,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -2,7 +2,7 @@
 import os
 import json
 import asyncio
-from groq import Groq
+from groq import AsyncGroq
 from fastmcp import Client
 from fastmcp.client.transports import StreamableHttpTransport
 from dotenv import load_dotenv
@@ -13,7 +13,7 @@ load_dotenv()
 PUBLIC_URL = os.getenv("MCP_PUBLIC_URL")
 GROQ_MODEL_PUBLIC_AGENT = os.getenv("GROQ_MODEL_PUBLIC_AGENT")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-groq_client = Groq(api_key=GROQ_API_KEY)
+groq_client = AsyncGroq(api_key=GROQ_API_KEY)
 
 
 class PublicAgent:
@@ -49,7 +49,7 @@ class PublicAgent:
         {{"tool": "<tool_name>", "args": {{...}}}}
         """
 
-        response = groq_client.chat.completions.create(
+        response = await groq_client.chat.completions.create(
             model=GROQ_MODEL_PUBLIC_AGENT,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -4,8 +4,9 @@ import asyncio
 import json
 import uuid
 from typing import Dict, List
-from groq import Groq
+from groq import AsyncGroq
 from dotenv import load_dotenv
+from src.core.context_packing import pack_blocks
 from src.agents.public.public_agent import PublicAgent
 from src.agents.private.private_agent import PrivateAgent
 
@@ -14,7 +15,7 @@ load_dotenv()
 
 GROQ_MODEL = os.getenv("GROQ_MODEL")
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-groq_client = Groq(api_key=GROQ_API_KEY)
+groq_client = AsyncGroq(api_key=GROQ_API_KEY)
 
 # -------------------------
 # In-memory chat store
@@ -45,7 +46,7 @@ class SupervisorAgent:
         self.public_agent = PublicAgent()
         self.private_agent = PrivateAgent()
 
-    def plan(self, user_input: str):
+    async def plan(self, user_input: str):
         """Supervisor analyze user request and split subtasks"""
         system_prompt = """
             You are a supervisor_agent. 
@@ -60,7 +61,7 @@ class SupervisorAgent:
             ]
         """
 
-        response = groq_client.chat.completions.create(
+        response = await groq_client.chat.completions.create(
             model=GROQ_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -73,7 +74,7 @@ class SupervisorAgent:
         plan = json.loads(raw_plan)
         return plan
 
-    def rewrite_answer(self, user_input: str, raw_results: List[Dict[str, str]]) -> str:
+    async def rewrite_answer(self, user_input: str, raw_results: List[Dict[str, str]]) -> str:
         """Rewrite raw agent results into a clear user-friendly answer"""
         system_prompt = """
             You are a helpful supervisor agent.
@@ -83,9 +84,11 @@ class SupervisorAgent:
         """
 
         # Build raw text summary
-        summary = "\n".join([f"{r['task']}: {r['result']}" for r in raw_results])
+        # Token counts go to GET /stats (packing_stats)
+        blocks, _ = pack_blocks(user_input, [f"{r['task']}: {r['result']}" for r in raw_results])
+        summary = "\n".join(blocks)
 
-        response = groq_client.chat.completions.create(
+        response = await groq_client.chat.completions.create(
             model=GROQ_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -98,7 +101,7 @@ class SupervisorAgent:
         )
         return response.choices[0].message.content.strip()
 
-    def classify_intent(self, user_input: str) -> str:
+    async def classify_intent(self, user_input: str) -> str:
         """
         Ask LLM to classify intent of user query.
         Returns: "history" | "normal"
@@ -111,7 +114,7 @@ class SupervisorAgent:
         Return only one word: history or normal.
         """
 
-        response = groq_client.chat.completions.create(
+        response = await groq_client.chat.completions.create(
             model=GROQ_MODEL,
             messages=[
                 {"role": "system", "content": system_prompt},
@@ -127,7 +130,7 @@ class SupervisorAgent:
         add_message(session_id, "user", user_input)
 
         # --- Intent classification ---
-        intent = self.classify_intent(user_input)
+        intent = await self.classify_intent(user_input)
 
         if intent == "history":
             history = get_history_agents(session_id)
@@ -140,7 +143,7 @@ class SupervisorAgent:
             """
             history_text = "\n".join([f"{i+1}. {q}" for i, q in enumerate(prev_qs)])
 
-            response = groq_client.chat.completions.create(
+            response = await groq_client.chat.completions.create(
                 model=GROQ_MODEL,
                 messages=[
                     {"role": "system", "content": system_prompt},
@@ -156,7 +159,7 @@ class SupervisorAgent:
             return session_id, user_answer
         # ----------------------------------------------------
 
-        plan = self.plan(user_input)
+        plan = await self.plan(user_input)
         print("\n[Supervisor Plan]")
         for i, step in enumerate(plan, 1):
             print(f"  {i}. {step['task']}  →  {step['agent'].title()}Agent")
@@ -175,7 +178,7 @@ class SupervisorAgent:
                 {"agent": step["agent"], "task": step["task"], "result": result}
             )
 
-        user_answer = self.rewrite_answer(user_input, results)
+        user_answer = await self.rewrite_answer(user_input, results)
         add_message(session_id, "assistant", user_answer)
         return session_id, user_answer
 
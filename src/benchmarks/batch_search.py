@@ -0,0 +1,60 @@
+# src/benchmarks/batch_search.py
+import argparse
+import asyncio
+import time
+from src.benchmarks.retrieval_eval import load_labelled_queries
+from src.core.query_cache import query_embeddings, query_results, rerank_scores
+from src.core.retriever import aretrieve_and_rerank, aretrieve_and_rerank_many
+
+
+def make_queries(count: int, offset: int = 0):
+    # Distinct strings, so no query is answered from a cache
+    base = [label["query"] for label in load_labelled_queries()]
+    return [f"{base[i % len(base)]} ({offset + i})" for i in range(count)]
+
+
+def clear_caches():
+    for cache in (query_embeddings, query_results, rerank_scores):
+        cache.clear()
+
+
+async def looped(queries, top_k: int, candidate_k: int):
+    """Today's client: one search per question, each awaited in turn."""
+    for query in queries:
+        await aretrieve_and_rerank(query, top_k=top_k, candidate_k=candidate_k)
+
+
+async def run(batch_sizes, rounds: int, top_k: int, candidate_k: int):
+    await aretrieve_and_rerank_many(make_queries(4, -100), top_k, candidate_k)  # warm-up
+    print(f"top_k={top_k} candidate_k={candidate_k} rounds={rounds}")
+    print(f"{'batch':>6} {'loop q/s':>9} {'batch q/s':>10} {'speedup':>8}")
+    offset = 0
+    for size in batch_sizes:
+        timings = {"loop": 0.0, "batch": 0.0}
+        for _ in range(rounds):
+            for name in timings:
+                queries = make_queries(size, offset)
+                offset += size
+                clear_caches()
+                start = time.perf_counter()
+                if name == "loop":
+                    await looped(queries, top_k, candidate_k)
+                else:
+                    await aretrieve_and_rerank_many(queries, top_k, candidate_k)
+                timings[name] += time.perf_counter() - start
+        loop_qps = size * rounds / timings["loop"]
+        batch_qps = size * rounds / timings["batch"]
+        print(f"{size:>6} {loop_qps:>9.1f} {batch_qps:>10.1f} {batch_qps / loop_qps:>7.2f}x")
+
+
+# Uses the configured vector store (VECTOR_STORE) and its ingested chunks
+# python -m src.benchmarks.batch_search
+# python -m src.benchmarks.batch_search --batch-sizes 1 16 64 256 --candidate-k 20
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Looped /search vs one /search/batch call")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[8, 64])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--candidate-k", type=int, default=None)
+    args = parser.parse_args()
+    asyncio.run(run(args.batch_sizes, args.rounds, args.top_k, args.candidate_k))
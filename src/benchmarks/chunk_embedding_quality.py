@@ -0,0 +1,72 @@
+# src/benchmarks/chunk_embedding_quality.py
+import argparse
+import os
+import time
+import numpy as np
+from src.benchmarks.retrieval_eval import (
+    load_labelled_queries,
+    rank_exact,
+    retrieval_metrics,
+    topk_overlap,
+)
+from src.core.embedding_generator import embed_chunks, embed_text, pool_chunk_embeddings
+from src.core.text_chunker import semantic_chunk
+from src.utils.file_loader import read_file
+
+DATA_FOLDER = "src/data/"
+
+
+def run(folder: str, k: int):
+    chunks, sentence_s = [], 0.0
+    for fname in sorted(os.listdir(folder)):
+        text = read_file(os.path.join(folder, fname))
+        start = time.perf_counter()
+        for chunk in semantic_chunk(text, with_embeddings=True):
+            chunk["file"] = fname
+            chunks.append(chunk)
+        sentence_s += time.perf_counter() - start
+
+    # Today's path: encode every joined chunk again
+    start = time.perf_counter()
+    encoded = [e["embedding"] for e in embed_chunks([c["chunk_text"] for c in chunks])]
+    encode_s = time.perf_counter() - start
+
+    # Pooled path: reuse the sentence vectors from chunking
+    start = time.perf_counter()
+    pooled = [e["embedding"] for e in pool_chunk_embeddings(chunks)]
+    pool_s = time.perf_counter() - start
+
+    a = np.asarray(encoded, dtype=np.float32)
+    b = np.asarray(pooled, dtype=np.float32)
+    agreement = np.sum(a * b, axis=1) / (
+        np.linalg.norm(a, axis=1) * np.linalg.norm(b, axis=1)
+    )
+
+    labels = load_labelled_queries()
+    query_vectors = embed_text([label["query"] for label in labels])
+    rank_encoded = rank_exact(query_vectors, encoded)
+    rank_pooled = rank_exact(query_vectors, pooled)
+
+    print(f"files={len(os.listdir(folder))} chunks={len(chunks)} queries={len(labels)}")
+    print(f"chunking (sentence pass): {sentence_s:.2f}s")
+    print(f"encode path extra cost:   {encode_s:.2f}s")
+    print(f"pooled path extra cost:   {pool_s:.4f}s")
+    print(
+        f"embedding time per doc: encode={sentence_s + encode_s:.2f}s "
+        f"pooled={sentence_s + pool_s:.2f}s"
+    )
+    print(
+        f"cosine(pooled, encoded): mean={agreement.mean():.4f} min={agreement.min():.4f}"
+    )
+    print(f"encode: {retrieval_metrics(rank_encoded, chunks, labels, k)}")
+    print(f"pooled: {retrieval_metrics(rank_pooled, chunks, labels, k)}")
+    print(f"top-{k} overlap pooled vs encode: {topk_overlap(rank_encoded, rank_pooled, k)}")
+
+
+# python -m src.benchmarks.chunk_embedding_quality
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pooled vs re-encoded chunk vectors")
+    parser.add_argument("--folder", default=DATA_FOLDER)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    run(args.folder, args.k)
@@ -0,0 +1,66 @@
+# src/benchmarks/chunk_similarity.py
+import argparse
+import time
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+from src.core.text_chunker import group_sentences
+
+
+def synthetic_embeddings(n: int, dim: int = 1024, topics: int = 200, seed: int = 0):
+    """Clustered random vectors that behave roughly like sentence embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim))
+    labels = rng.integers(0, topics, size=n)
+    return centers[labels] + rng.normal(scale=0.5, size=(n, dim))
+
+
+def legacy_group(embeddings, similarity_threshold: float = 0.7):
+    """The original nested loop with one cosine_similarity call per pair."""
+    visited, groups = set(), []
+    for i in range(len(embeddings)):
+        if i in visited:
+            continue
+        group = [i]
+        visited.add(i)
+        for j in range(i + 1, len(embeddings)):
+            if j not in visited:
+                sim = cosine_similarity([embeddings[i]], [embeddings[j]])[0][0]
+                if sim > similarity_threshold:
+                    group.append(j)
+                    visited.add(j)
+        groups.append(group)
+    return groups
+
+
+def run(sizes, dim, threshold, block_size, legacy_max):
+    print(f"dim={dim} threshold={threshold} block_size={block_size}")
+    print(f"{'sentences':>10} {'groups':>8} {'block s':>9} {'block sent/s':>13} {'legacy sent/s':>14}")
+    for n in sizes:
+        embeddings = synthetic_embeddings(n, dim)
+
+        start = time.perf_counter()
+        groups = group_sentences(embeddings, threshold, block_size)
+        block_s = time.perf_counter() - start
+
+        legacy_rate = "-"
+        if n <= legacy_max:
+            start = time.perf_counter()
+            expected = legacy_group(embeddings, threshold)
+            legacy_s = time.perf_counter() - start
+            assert groups == expected, "block engine diverged from the legacy loop"
+            legacy_rate = f"{n / legacy_s:,.0f}"
+
+        print(f"{n:>10,} {len(groups):>8,} {block_s:>9.2f} {n / block_s:>13,.0f} {legacy_rate:>14}")
+
+
+# python -m src.benchmarks.chunk_similarity
+# python -m src.benchmarks.chunk_similarity --sizes 1000 10000 50000 --legacy-max 1000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sentence grouping throughput")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    parser.add_argument("--block-size", type=int, default=None)
+    parser.add_argument("--legacy-max", type=int, default=1000)
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.threshold, args.block_size, args.legacy_max)
@@ -0,0 +1,69 @@
+# src/benchmarks/chunking_strategies.py
+import argparse
+import os
+import time
+import numpy as np
+from src.core.embedding_generator import count_tokens
+from src.core.text_chunker import CHUNKERS, get_chunker, semantic_chunk
+from src.utils.file_loader import read_file
+
+DATA_FOLDER = "src/data/"
+# Query + chunk must fit the cross-encoder's window
+RERANK_WINDOW = 512
+
+
+def run(folder: str, strategies, max_tokens: int, overlap: int, threshold: float):
+    texts = [read_file(os.path.join(folder, f)) for f in sorted(os.listdir(folder))]
+    # Sentence vectors come from the embedding cache after the first pass;
+    # warm it so every strategy is timed on chunking, not on the model.
+    # Run with EMBED_CACHE=0 to include model time instead.
+    start = time.perf_counter()
+    for text in texts:
+        semantic_chunk(text, threshold)
+    print(f"files={len(texts)} warm-up (sentence vectors): {time.perf_counter() - start:.2f}s")
+    print(f"max_tokens={max_tokens} overlap={overlap} threshold={threshold}")
+    print(
+        f"{'strategy':>12} {'seconds':>8} {'chunks':>7} {'mean':>6} {'p50':>5} "
+        f"{'p90':>5} {'p99':>5} {'max':>5} {'over':>5} {'>rerank':>8}"
+    )
+
+    options = {
+        "semantic": {"similarity_threshold": threshold, "max_tokens": max_tokens},
+        "adjacent": {"similarity_threshold": threshold, "max_tokens": max_tokens},
+        "fixed": {"max_tokens": max_tokens, "overlap": overlap},
+    }
+    unbounded = {"semantic": {"similarity_threshold": threshold, "max_tokens": 0}}
+    runs = [("semantic(0)", "semantic", unbounded["semantic"])]
+    runs += [(name, name, options.get(name, {})) for name in strategies]
+
+    for label, name, kwargs in runs:
+        chunker = get_chunker(name, **kwargs)
+        start = time.perf_counter()
+        chunks = [c for text in texts for c in chunker.chunk(text)]
+        elapsed = time.perf_counter() - start
+
+        # Lengths are measured on the final chunk text with the model tokenizer
+        lengths = np.asarray(count_tokens(c["chunk_text"] for c in chunks))
+        if len(lengths) == 0:
+            print(f"{label:>12} {elapsed:>8.2f} {0:>7}")
+            continue
+        p50, p90, p99 = np.percentile(lengths, [50, 90, 99])
+        print(
+            f"{label:>12} {elapsed:>8.2f} {len(chunks):>7} {lengths.mean():>6.0f} "
+            f"{p50:>5.0f} {p90:>5.0f} {p99:>5.0f} {lengths.max():>5} "
+            f"{int((lengths > max_tokens).sum()):>5} "
+            f"{int((lengths > RERANK_WINDOW).sum()):>8}"
+        )
+
+
+# python -m src.benchmarks.chunking_strategies
+# python -m src.benchmarks.chunking_strategies --max-tokens 256 --overlap 32
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunking strategies on src/data")
+    parser.add_argument("--folder", default=DATA_FOLDER)
+    parser.add_argument("--strategies", nargs="+", default=list(CHUNKERS))
+    parser.add_argument("--max-tokens", type=int, default=384)
+    parser.add_argument("--overlap", type=int, default=64)
+    parser.add_argument("--threshold", type=float, default=0.7)
+    args = parser.parse_args()
+    run(args.folder, args.strategies, args.max_tokens, args.overlap, args.threshold)
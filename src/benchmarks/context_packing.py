@@ -0,0 +1,82 @@
+# src/benchmarks/context_packing.py
+import argparse
+import numpy as np
+from src.benchmarks.retrieval_eval import load_labelled_queries
+from src.core import retriever
+from src.core.context_packing import CHARS_PER_TOKEN, CONTEXT_TOKEN_BUDGET, pack_blocks
+from src.core.query_cache import query_results
+
+
+def search_block(query: str, top_k: int) -> str:
+    """A database search result as the search tools put it in a prompt."""
+    return "\n".join(
+        f"- Text: {retriever.hit_text(hit)}\n  Rerank score: {hit.get('rerank_score', 0.0):.4f}"
+        for hit in retriever.retrieve_and_rerank(query, top_k=top_k)
+    )
+
+
+def diversity(labels, top_k: int, mmr: bool):
+    """Distinct chunk texts in the top_k and answer hit rate, MMR on or off."""
+    retriever.MMR_ENABLED = mmr
+    query_results.clear()
+    distinct, found = [], 0
+    for label in labels:
+        hits = retriever.retrieve_and_rerank(label["query"], top_k=top_k)
+        texts = [retriever.hit_text(hit) for hit in hits]
+        distinct.append(len({" ".join(text.split()) for text in texts}))
+        found += any(label["answer"].lower() in text.lower() for text in texts)
+    return np.mean(distinct), found / len(labels)
+
+
+def run(top_k: int, budgets, steps: int):
+    labels = load_labelled_queries()
+    print(f"queries={len(labels)} top_k={top_k}")
+    print(f"{'MMR':>6} {'distinct hits':>14} {'answer in top_k':>16}")
+    for mmr in (False, True):
+        distinct, found = diversity(labels, top_k, mmr)
+        print(f"{'on' if mmr else 'off':>6} {distinct:>14.2f} {found:>16.0%}")
+
+    # The rewrite prompt of a multi-step plan: `steps` database searches
+    prompts = []
+    for i, label in enumerate(labels):
+        queries = [labels[(i + s) % len(labels)]["query"] for s in range(steps)]
+        blocks = [
+            f"Step {s + 1} (search_db): {search_block(query, top_k)}"
+            for s, query in enumerate(queries)
+        ]
+        prompts.append((" ".join(queries), label["answer"], blocks))
+
+    print(f"\nsteps={steps}")
+    print(
+        f"{'budget':>7} {'tokens in':>10} {'tokens out':>11} {'saved':>7} "
+        f"{'answer kept':>12}"
+    )
+    for budget in budgets:
+        tokens_in, tokens_out, kept, present = [], [], 0, 0
+        for query, answer, blocks in prompts:
+            packed, stats = pack_blocks(query, blocks, budget=budget)
+            tokens_in.append(stats["tokens_in"])
+            tokens_out.append(stats["tokens_out"])
+            if answer.lower() in " ".join(blocks).lower():
+                present += 1
+                kept += answer.lower() in " ".join(packed).lower()
+        saved = 1 - np.mean(tokens_out) / np.mean(tokens_in)
+        print(
+            f"{budget:>7} {np.mean(tokens_in):>10.0f} {np.mean(tokens_out):>11.0f} "
+            f"{saved:>6.0%} {kept}/{present:<10}"
+        )
+    print(f"(tokens estimated as characters / {CHARS_PER_TOKEN})")
+
+
+# Uses the configured vector store (VECTOR_STORE) and its ingested chunks
+# python -m src.benchmarks.context_packing
+# python -m src.benchmarks.context_packing --budgets 500 1000 1500 --steps 3
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MMR diversity and prompt tokens saved by packing")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument(
+        "--budgets", type=int, nargs="+", default=[CONTEXT_TOKEN_BUDGET // 2, CONTEXT_TOKEN_BUDGET]
+    )
+    parser.add_argument("--steps", type=int, default=2)
+    args = parser.parse_args()
+    run(args.top_k, args.budgets, args.steps)
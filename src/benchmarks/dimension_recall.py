@@ -0,0 +1,67 @@
+# src/benchmarks/dimension_recall.py
+import argparse
+import os
+import numpy as np
+from src.benchmarks.retrieval_eval import (
+    load_labelled_queries,
+    rank_exact,
+    retrieval_metrics,
+    topk_overlap,
+)
+from src.core.embedding_generator import get_model, truncate_embeddings
+from src.core.text_chunker import get_chunker
+from src.database.upsert_batcher import estimate_bytes
+from src.utils.file_loader import read_file
+
+DATA_FOLDER = "src/data/"
+
+
+def run(folder: str, dims, k: int):
+    chunker = get_chunker()
+    chunks = []
+    for fname in sorted(os.listdir(folder)):
+        for chunk in chunker.chunk(read_file(os.path.join(folder, fname))):
+            chunk["file"] = fname
+            chunks.append(chunk)
+    labels = load_labelled_queries()
+
+    # Full-width vectors straight from the model (EMBEDDING_DIM and the cache
+    # are bypassed), truncated per dimension below
+    sbert = get_model()
+    chunk_full = np.asarray(sbert.encode([c["chunk_text"] for c in chunks]), dtype=np.float32)
+    query_full = np.asarray(sbert.encode([label["query"] for label in labels]), dtype=np.float32)
+    rank_full = rank_exact(query_full, chunk_full)
+
+    print(f"chunker={chunker.name} chunks={len(chunks)} queries={len(labels)}")
+    print(
+        f"{'dim':>5} {'recall@1':>9} {f'recall@{k}':>9} {'mrr':>6} "
+        f"{'overlap':>8} {'vec KB':>7} {'upsert KB':>10}"
+    )
+    native_dim = sbert.get_sentence_embedding_dimension()
+    for dim in sorted(d for d in dims if d <= native_dim):
+        chunk_vectors = truncate_embeddings(chunk_full, dim)
+        rankings = rank_exact(truncate_embeddings(query_full, dim), chunk_vectors)
+        metrics = retrieval_metrics(rankings, chunks, labels, k)
+        # Raw float32 storage, and the JSON request size of one vector with
+        # its chunk_text metadata as upserted today
+        payload = [
+            (f"{c['file']}_{c['chunk_index']}", v.tolist(), {"chunk_text": c["chunk_text"]})
+            for c, v in zip(chunks, chunk_vectors)
+        ]
+        upsert_kb = np.mean([estimate_bytes(p) for p in payload]) / 1024
+        print(
+            f"{dim:>5} {metrics['recall@1']:>9} {metrics[f'recall@{k}']:>9} "
+            f"{metrics['mrr']:>6} {topk_overlap(rank_full, rankings, k):>8} "
+            f"{dim * 4 / 1024:>7.1f} {upsert_kb:>10.1f}"
+        )
+
+
+# python -m src.benchmarks.dimension_recall
+# python -m src.benchmarks.dimension_recall --dims 128 256 512 1024 --k 3
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall vs Matryoshka dimension")
+    parser.add_argument("--folder", default=DATA_FOLDER)
+    parser.add_argument("--dims", type=int, nargs="+", default=[64, 128, 256, 512, 768, 1024])
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    run(args.folder, args.dims, args.k)
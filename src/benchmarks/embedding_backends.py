@@ -0,0 +1,141 @@
+# src/benchmarks/embedding_backends.py
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from src.benchmarks.retrieval_eval import load_labelled_queries
+from src.utils.file_loader import iter_file
+
+DATA_FOLDER = "src/data/"
+
+
+def reference_set(folder: str, limit: int):
+    """Labelled queries plus paragraphs of the data folder (>= 20 words)."""
+    queries = [label["query"] for label in load_labelled_queries()]
+    passages = []
+    for fname in sorted(os.listdir(folder)):
+        for segment in iter_file(os.path.join(folder, fname)):
+            passages.extend(p for p in segment.split("\n\n") if len(p.split()) >= 20)
+    return queries, passages[:limit]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def worker(folder: str, limit: int, repeats: int, out: str):
+    """Runs inside a fresh process with EMBEDDING_BACKEND set by the parent."""
+    queries, passages = reference_set(folder, limit)
+    from src.core.embedding_generator import EMBEDDING_BACKEND, encode, get_model
+
+    start = time.perf_counter()
+    get_model()
+    load_s = time.perf_counter() - start
+    encode(queries[:2])  # warm-up
+
+    latencies = []
+    for _ in range(repeats):
+        for query in queries:
+            t = time.perf_counter()
+            encode([query])
+            latencies.append(time.perf_counter() - t)
+
+    start = time.perf_counter()
+    passage_vectors = encode(passages)
+    batch_s = time.perf_counter() - start
+    query_vectors = encode(queries)
+
+    np.savez(out, queries=query_vectors, passages=passage_vectors)
+    ms = np.asarray(latencies) * 1000
+    print(
+        json.dumps(
+            {
+                "backend": EMBEDDING_BACKEND,
+                "load_s": load_s,
+                "query_p50_ms": float(np.percentile(ms, 50)),
+                "query_p95_ms": float(np.percentile(ms, 95)),
+                "passages_per_sec": len(passages) / batch_s if batch_s else 0.0,
+                "rss_mb": rss_mb(),
+                "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            }
+        )
+    )
+
+
+def cosine_rows(a, b) -> np.ndarray:
+    a = a / np.linalg.norm(a, axis=1, keepdims=True)
+    b = b / np.linalg.norm(b, axis=1, keepdims=True)
+    return np.sum(a * b, axis=1)
+
+
+def top_k(queries, passages, k: int) -> np.ndarray:
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    p = passages / np.linalg.norm(passages, axis=1, keepdims=True)
+    return np.argsort(-(q @ p.T), axis=1)[:, :k]
+
+
+def run(backends, folder: str, limit: int, repeats: int, k: int):
+    results, vectors = {}, {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for backend in backends:
+            out = os.path.join(tmp, f"{backend}.npz")
+            # The cache and the batcher would hide the model's own cost
+            env = {**os.environ, "EMBEDDING_BACKEND": backend, "EMBED_CACHE": "0"}
+            command = [
+                sys.executable, "-m", "src.benchmarks.embedding_backends", "--worker",
+                "--folder", folder, "--limit", str(limit), "--repeats", str(repeats),
+                "--out", out,
+            ]
+            proc = subprocess.run(command, env=env, capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"{backend}: failed\n{proc.stderr.strip()[-2000:]}")
+                continue
+            results[backend] = json.loads(proc.stdout.strip().splitlines()[-1])
+            with np.load(out) as data:
+                vectors[backend] = (data["queries"], data["passages"])
+
+    reference = "torch" if "torch" in vectors else None
+    print(
+        f"{'backend':>9} {'load s':>7} {'p50 ms':>7} {'p95 ms':>7} {'pass/s':>7} "
+        f"{'rss MB':>7} {'peak MB':>8} {'cos mean':>9} {'cos min':>8} {f'top{k}':>6}"
+    )
+    for backend, r in results.items():
+        parity = f"{'-':>9} {'-':>8} {'-':>6}"
+        if reference and backend != reference:
+            ref_q, ref_p = vectors[reference]
+            q, p = vectors[backend]
+            cos = np.concatenate([cosine_rows(ref_q, q), cosine_rows(ref_p, p)])
+            # Share of the fp32 top-k passages each backend also ranks in its top-k
+            a, b = top_k(ref_q, ref_p, k), top_k(q, p, k)
+            overlap = np.mean([len(set(x) & set(y)) / k for x, y in zip(a, b)])
+            parity = f"{cos.mean():>9.4f} {cos.min():>8.4f} {overlap:>6.2f}"
+        print(
+            f"{backend:>9} {r['load_s']:>7.1f} {r['query_p50_ms']:>7.1f} "
+            f"{r['query_p95_ms']:>7.1f} {r['passages_per_sec']:>7.1f} "
+            f"{r['rss_mb']:>7.0f} {r['peak_rss_mb']:>8.0f} {parity}"
+        )
+
+
+# python -m src.benchmarks.embedding_backends
+# python -m src.benchmarks.embedding_backends --backends torch int8 onnx
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Embedding backends: latency, RSS, parity")
+    parser.add_argument("--backends", nargs="+", default=["torch", "int8", "onnx", "openvino"])
+    parser.add_argument("--folder", default=DATA_FOLDER)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(args.folder, args.limit, args.repeats, args.out)
+    else:
+        run(args.backends, args.folder, args.limit, args.repeats, args.k)
@@ -0,0 +1,60 @@
+# src/benchmarks/embedding_pool.py
+import argparse
+import os
+import time
+import numpy as np
+from src.core.embedding_generator import _model_encode
+from src.core.embedding_pool import EmbeddingPool
+from src.core.text_chunker import get_chunker
+from src.utils.file_loader import read_file
+
+DATA_FOLDER = "src/data/"
+
+
+def corpus(folder: str, count: int):
+    chunker = get_chunker("fixed")  # no model calls while building the corpus
+    texts = [
+        c["chunk_text"]
+        for fname in sorted(os.listdir(folder))
+        for c in chunker.chunk(read_file(os.path.join(folder, fname)))
+    ]
+    # Repeat to the requested size; the cache is not involved here
+    return [f"{texts[i % len(texts)]} [{i}]" for i in range(count)]
+
+
+def run(folder: str, count: int, workers_list, shard_size: int):
+    texts = corpus(folder, count)
+    _model_encode(texts[:8])  # warm-up
+
+    start = time.perf_counter()
+    reference = _model_encode(texts)
+    base = time.perf_counter() - start
+    print(f"chunks={len(texts)} cpus={len(os.sched_getaffinity(0))} shard_size={shard_size}")
+    print(f"{'workers':>8} {'seconds':>8} {'chunks/s':>9} {'speedup':>8} {'max |diff|':>11}")
+    print(f"{'in-proc':>8} {base:>8.2f} {len(texts) / base:>9.1f} {1.0:>8.2f} {0.0:>11.2e}")
+
+    for workers in workers_list:
+        pool = EmbeddingPool(workers, shard_size)
+        pool.warmup()  # model load is not part of the timing
+        start = time.perf_counter()
+        vectors = pool.encode(texts)
+        elapsed = time.perf_counter() - start
+        pool.close()
+        assert vectors.shape == reference.shape and vectors.flags["C_CONTIGUOUS"]
+        diff = float(np.abs(vectors - reference).max())
+        print(
+            f"{pool.workers:>8} {elapsed:>8.2f} {len(texts) / elapsed:>9.1f} "
+            f"{base / elapsed:>8.2f} {diff:>11.2e}"
+        )
+
+
+# python -m src.benchmarks.embedding_pool
+# python -m src.benchmarks.embedding_pool --count 4000 --workers 1 2 4 8
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Multi-process bulk embedding")
+    parser.add_argument("--folder", default=DATA_FOLDER)
+    parser.add_argument("--count", type=int, default=2000)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--shard-size", type=int, default=64)
+    args = parser.parse_args()
+    run(args.folder, args.count, args.workers, args.shard_size)
@@ -0,0 +1,117 @@
+# src/benchmarks/hybrid_search.py
+import argparse
+import os
+import tempfile
+import time
+import numpy as np
+from src.benchmarks.retrieval_eval import load_labelled_queries, rank_exact, retrieval_metrics
+from src.core.retriever import RERANK_CANDIDATES, RRF_K, reciprocal_rank_fusion
+from src.database.bm25_index import BM25Index
+from src.utils.file_loader import read_file
+
+DATA_FOLDER = "src/data/"
+# The most frequent Zipf ranks are function words, which tokenize() drops
+STOPWORD_RANKS = 50
+
+
+def quality(folder: str, k: int):
+    """Recall of dense, BM25 and fused rankings on the labelled queries."""
+    from src.core.embedding_generator import embed_text
+    from src.core.text_chunker import get_chunker
+
+    chunker = get_chunker()
+    chunks = []
+    for fname in sorted(os.listdir(folder)):
+        for chunk in chunker.chunk(read_file(os.path.join(folder, fname))):
+            chunk["file"] = fname
+            chunks.append(chunk)
+    labels = load_labelled_queries()
+
+    dense = rank_exact(
+        embed_text([label["query"] for label in labels]),
+        embed_text([c["chunk_text"] for c in chunks]),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        index = BM25Index(tmp)
+        index.add((str(i), c["chunk_text"]) for i, c in enumerate(chunks))
+        lexical = [
+            [int(vid) for vid, _ in index.search(label["query"], len(chunks))] for label in labels
+        ]
+
+    fused = []
+    for dense_order, lexical_order in zip(dense, lexical):
+        # Same candidate depth as retrieve_and_rerank
+        depth = max(RERANK_CANDIDATES, k)
+        scores = reciprocal_rank_fusion(
+            [[str(i) for i in dense_order[:depth]], [str(i) for i in lexical_order[:depth]]], RRF_K
+        )
+        fused.append([int(vid) for vid in sorted(scores, key=scores.get, reverse=True)])
+
+    print(f"chunks={len(chunks)} queries={len(labels)} rrf_k={RRF_K}")
+    print(f"{'ranking':>8} {'recall@1':>9} {f'recall@{k}':>9} {'mrr':>6}")
+    for name, rankings in (("dense", dense), ("bm25", lexical), ("hybrid", fused)):
+        m = retrieval_metrics(rankings, chunks, labels, k)
+        print(f"{name:>8} {m['recall@1']:>9} {m[f'recall@{k}']:>9} {m['mrr']:>6}")
+
+
+def zipf_words(rng, size, vocab: int):
+    """Zipf-distributed word ranks, like natural text once stopwords are removed."""
+    return (rng.zipf(1.2, size=size) + STOPWORD_RANKS - 1) % vocab + 1
+
+
+def synthetic_docs(count: int, vocab: int, length: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    words = zipf_words(rng, (count, length), vocab)
+    for i, row in enumerate(words):
+        yield str(i), " ".join(f"w{w}" for w in row)
+
+
+def latency(sizes, vocab: int, length: int, queries: int, k: int):
+    """BM25 search time at each corpus size (the cost hybrid search adds)."""
+    rng = np.random.default_rng(1)
+    print(f"\nvocab={vocab} words/chunk={length} queries={queries}")
+    print(f"{'chunks':>9} {'build s':>8} {'postings':>10} {'p50 ms':>7} {'p99 ms':>7}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            index = BM25Index(tmp)
+            start = time.perf_counter()
+            batch = []
+            for item in synthetic_docs(size, vocab, length):
+                batch.append(item)
+                if len(batch) == 10000:
+                    index.add(batch)
+                    batch = []
+            index.add(batch)
+            index.merge()
+            index.save()
+            build_s = time.perf_counter() - start
+
+            # 2-5 word queries mixing common and rare words
+            ms = []
+            for _ in range(queries):
+                terms = zipf_words(rng, rng.integers(2, 6), vocab)
+                query = " ".join(f"w{w}" for w in terms)
+                t = time.perf_counter()
+                index.search(query, k)
+                ms.append((time.perf_counter() - t) * 1000)
+            print(
+                f"{size:>9} {build_s:>8.1f} {index.stats()['postings']:>10} "
+                f"{np.percentile(ms, 50):>7.2f} {np.percentile(ms, 99):>7.2f}"
+            )
+
+
+# python -m src.benchmarks.hybrid_search
+# python -m src.benchmarks.hybrid_search --skip-quality --sizes 10000 100000 1000000
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hybrid search: recall and BM25 latency")
+    parser.add_argument("--folder", default=DATA_FOLDER)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--vocab", type=int, default=200000)
+    parser.add_argument("--length", type=int, default=120, help="words per synthetic chunk")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--skip-quality", action="store_true")
+    args = parser.parse_args()
+    if not args.skip_quality:
+        quality(args.folder, args.k)
+    latency(args.sizes, args.vocab, args.length, args.queries, args.k)
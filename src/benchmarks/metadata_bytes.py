@@ -0,0 +1,80 @@
+# src/benchmarks/metadata_bytes.py
+import argparse
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from src.benchmarks.retrieval_eval import load_labelled_queries, rank_exact
+from src.core.embedding_generator import embed_text
+from src.core.ingestion_pipeline import vector_id
+from src.core.text_chunker import get_chunker
+from src.database.chunk_store import ChunkStore
+from src.database.upsert_batcher import estimate_bytes
+from src.utils.file_loader import read_file
+
+DATA_FOLDER = "src/data/"
+
+
+def match_bytes(vector_id: str, metadata) -> int:
+    """A query match as the vector DB returns it (JSON, include_metadata=True)."""
+    return len(json.dumps({"id": vector_id, "score": 0.123456789, "metadata": metadata}))
+
+
+def run(folder: str, candidate_k: int):
+    chunker = get_chunker()
+    vectors = []
+    for fname in sorted(os.listdir(folder)):
+        for chunk in chunker.chunk(read_file(os.path.join(folder, fname))):
+            full = {
+                "chunk_text": chunk["chunk_text"],
+                "chunk_index": chunk["chunk_index"],
+                "file_name": fname,
+            }
+            compact = {k: v for k, v in full.items() if k != "chunk_text"}
+            vectors.append((vector_id(fname, chunk["chunk_index"]), full, compact))
+    labels = load_labelled_queries()
+    embeddings = embed_text([full["chunk_text"] for _, full, _ in vectors])
+    rankings = rank_exact(embed_text([label["query"] for label in labels]), embeddings)
+    dim = len(embeddings[0])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ChunkStore(os.path.join(tmp, "chunks.sqlite3"))
+        store.put_many((vid, full["chunk_text"]) for vid, full, _ in vectors)
+
+        before, after, lookup_ms = [], [], []
+        for order in rankings:
+            top = [vectors[i] for i in order[:candidate_k]]
+            before.append(sum(match_bytes(vid, full) for vid, full, _ in top))
+            after.append(sum(match_bytes(vid, compact) for vid, _, compact in top))
+            start = time.perf_counter()
+            store.get_many([vid for vid, _, _ in top])
+            lookup_ms.append((time.perf_counter() - start) * 1000)
+
+    upsert_before = np.mean([estimate_bytes((vid, [0.0] * dim, full)) for vid, full, _ in vectors])
+    upsert_after = np.mean([estimate_bytes((vid, [0.0] * dim, c)) for vid, _, c in vectors])
+    meta_before = np.mean([len(json.dumps(full)) for _, full, _ in vectors])
+    meta_after = np.mean([len(json.dumps(compact)) for _, _, compact in vectors])
+
+    print(f"chunks={len(vectors)} queries={len(labels)} candidate_k={candidate_k} dim={dim}")
+    print(f"{'':>26} {'before':>9} {'after':>9} {'ratio':>7}")
+    for name, b, a in (
+        ("query response bytes", np.mean(before), np.mean(after)),
+        ("metadata bytes / vector", meta_before, meta_after),
+        ("upsert bytes / vector", upsert_before, upsert_after),
+    ):
+        print(f"{name:>26} {b:>9.0f} {a:>9.0f} {b / a:>6.1f}x")
+    print(
+        f"chunk store lookup ({candidate_k} ids): p50 {np.percentile(lookup_ms, 50):.3f} ms, "
+        f"p99 {np.percentile(lookup_ms, 99):.3f} ms"
+    )
+
+
+# python -m src.benchmarks.metadata_bytes
+# python -m src.benchmarks.metadata_bytes --candidate-k 20
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Vector metadata bytes with and without chunk text")
+    parser.add_argument("--folder", default=DATA_FOLDER)
+    parser.add_argument("--candidate-k", type=int, default=50)
+    args = parser.parse_args()
+    run(args.folder, args.candidate_k)
@@ -0,0 +1,106 @@
+# src/benchmarks/mixed_load.py
+import argparse
+import asyncio
+import time
+import httpx
+import numpy as np
+from src.benchmarks.retrieval_eval import load_labelled_queries
+
+BASE_URL = "http://127.0.0.1:8000"
+CHAT_INPUTS = [
+    "Where is GreenFields BioTech headquartered?",
+    "Summarize the history of GreenGrow Innovations.",
+    "What products does QuantumNext Systems sell?",
+]
+SEARCH_QUERIES = [label["query"] for label in load_labelled_queries()]
+
+
+def make_search(i: int):
+    # Distinct strings, so no request is answered from the query cache
+    query = SEARCH_QUERIES[i % len(SEARCH_QUERIES)]
+    return "/search", {"question": f"{query} ({i})", "top_k": 5}
+
+
+def make_chat(i: int):
+    return "/chat-mcp", {"session_id": f"load-{i}", "user_input": CHAT_INPUTS[i % len(CHAT_INPUTS)]}
+
+
+async def worker(client, make, seconds: float, offset: int, latencies, errors):
+    deadline = time.perf_counter() + seconds
+    i = offset
+    while time.perf_counter() < deadline:
+        path, body = make(i)
+        i += 1000
+        start = time.perf_counter()
+        try:
+            response = await client.post(path, json=body)
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+        except httpx.HTTPError:
+            errors.append(path)
+
+
+async def scenario(url: str, seconds: float, search_users: int, chat_users: int):
+    """Closed-loop users per endpoint; returns {path: (latencies, errors)}."""
+    results = {"/search": ([], []), "/chat-mcp": ([], [])}
+    async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+        await asyncio.gather(
+            *(
+                worker(client, make_search, seconds, n, *results["/search"])
+                for n in range(search_users)
+            ),
+            *(
+                worker(client, make_chat, seconds, n, *results["/chat-mcp"])
+                for n in range(chat_users)
+            ),
+        )
+    return results
+
+
+def report(name: str, results, seconds: float):
+    for path, (latencies, errors) in results.items():
+        if not latencies and not errors:
+            continue
+        ms = np.asarray(latencies or [0.0]) * 1000
+        print(
+            f"{name:>8} {path:>10} {len(latencies) / seconds:>7.1f} "
+            f"{np.percentile(ms, 50):>8.1f} {np.percentile(ms, 95):>8.1f} "
+            f"{np.percentile(ms, 99):>8.1f} {len(errors):>7}"
+        )
+
+
+async def run(url: str, seconds: float, search_users: int, chat_users: int):
+    async with httpx.AsyncClient(base_url=url, timeout=120) as client:
+        (await client.post("/search", json={"question": "warmup", "top_k": 5})).raise_for_status()
+
+    print(f"url={url} seconds={seconds} search_users={search_users} chat_users={chat_users}")
+    print(
+        f"{'load':>8} {'endpoint':>10} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} "
+        f"{'p99 ms':>8} {'errors':>7}"
+    )
+    # Each endpoint alone, then both at once: with a non-blocking search
+    # path the mixed latencies should stay close to the solo ones
+    for name, search, chat in (
+        ("search", search_users, 0),
+        ("chat", 0, chat_users),
+        ("mixed", search_users, chat_users),
+    ):
+        report(name, await scenario(url, seconds, search, chat), seconds)
+
+    async with httpx.AsyncClient(base_url=url, timeout=30) as client:
+        stats = (await client.get("/stats")).json()
+    print(f"model executor: {stats.get('model_executor')}")
+
+
+# Needs the API and both MCP servers running:
+# uvicorn src.main:app
+# python -m src.benchmarks.mixed_load
+# python -m src.benchmarks.mixed_load --seconds 60 --search-users 32 --chat-users 4
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="/search and /chat-mcp latency, alone and mixed")
+    parser.add_argument("--url", default=BASE_URL)
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--search-users", type=int, default=16)
+    parser.add_argument("--chat-users", type=int, default=4)
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.seconds, args.search_users, args.chat_users))
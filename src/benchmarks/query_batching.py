@@ -0,0 +1,69 @@
+# src/benchmarks/query_batching.py
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from src.benchmarks.retrieval_eval import load_labelled_queries
+from src.core.embedding_batcher import EmbeddingBatcher
+from src.core.embedding_generator import get_model
+
+
+def make_queries(count: int):
+    # Distinct strings, so neither path can reuse a previous result
+    base = [label["query"] for label in load_labelled_queries()]
+    return [f"{base[i % len(base)]} ({i})" for i in range(count)]
+
+
+def measure(embed_one, queries, concurrency: int):
+    latencies = []
+
+    def call(query):
+        start = time.perf_counter()
+        embed_one(query)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(call, queries))
+    elapsed = time.perf_counter() - start
+    ms = np.asarray(latencies) * 1000
+    return {
+        "qps": len(queries) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def run(count: int, concurrency: int, window_ms: float, max_items: int):
+    queries = make_queries(count)
+    sbert = get_model()
+    sbert.encode(queries[:8])  # warm-up
+
+    # Today's path: one forward pass per query
+    direct = measure(lambda q: sbert.encode([q])[0], queries, concurrency)
+
+    batcher = EmbeddingBatcher(lambda texts: sbert.encode(texts), window_ms, max_items)
+    batched = measure(batcher.embed, make_queries(2 * count)[count:], concurrency)
+
+    print(f"queries={count} concurrency={concurrency} window={window_ms}ms max_items={max_items}")
+    print(f"{'path':>8} {'qps':>8} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, result in (("direct", direct), ("batched", batched)):
+        print(
+            f"{name:>8} {result['qps']:>8.1f} {result['p50_ms']:>8.1f} {result['p99_ms']:>8.1f}"
+        )
+    print(f"speedup: {batched['qps'] / direct['qps']:.2f}x")
+    stats = batcher.stats()
+    print(f"batch size: {stats['batch_size']}")
+    print(f"queue depth: {stats['queue_depth']}")
+
+
+# python -m src.benchmarks.query_batching
+# python -m src.benchmarks.query_batching --concurrency 50 --window-ms 2
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batched query embedding")
+    parser.add_argument("--count", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--window-ms", type=float, default=5.0)
+    parser.add_argument("--max-items", type=int, default=32)
+    args = parser.parse_args()
+    run(args.count, args.concurrency, args.window_ms, args.max_items)
@@ -0,0 +1,83 @@
+# src/benchmarks/rerank_cascade.py
+import argparse
+import time
+import numpy as np
+from src.benchmarks.retrieval_eval import is_relevant, load_labelled_queries, topk_overlap
+from src.core import retriever
+from src.core.query_cache import query_results, rerank_scores
+
+
+def search_pass(labels, top_k: int, mode: str):
+    """One cold search per query (query embeddings stay cached, so the
+    timings differ by the rerank only). Returns rankings, hits, ms, paths."""
+    rankings, tops, ms, paths = [], [], [], []
+    for label in labels:
+        query_results.clear()
+        rerank_scores.clear()
+        start = time.perf_counter()
+        hits, stats = retriever.retrieve_and_rerank(
+            label["query"], top_k=top_k, with_stats=True, rerank=mode
+        )
+        ms.append((time.perf_counter() - start) * 1000)
+        rankings.append([hit["id"] for hit in hits])
+        tops.append(
+            [
+                {
+                    "file": hit.get("metadata", {}).get("file_name"),
+                    "chunk_text": retriever.hit_text(hit),
+                }
+                for hit in hits
+            ]
+        )
+        paths.append(stats["path"])
+    return rankings, tops, ms, paths
+
+
+def recall(labels, tops, k: int) -> float:
+    found = [any(is_relevant(hit, label) for hit in hits[:k]) for label, hits in zip(labels, tops)]
+    return np.mean(found)
+
+
+def run(thresholds, top_k: int):
+    retriever.RERANK_CASCADE = True  # off by default; "auto" is what is measured here
+    labels = load_labelled_queries()
+    for label in labels:  # warm-up: models loaded, query embeddings cached
+        retriever.retrieve_and_rerank(label["query"], top_k=top_k, rerank="always")
+
+    reference, ref_tops, ref_ms, _ = search_pass(labels, top_k, "always")
+    print(f"queries={len(labels)} top_k={top_k} margin={retriever.RERANK_CASCADE_MARGIN}")
+    print(
+        f"{'setup':>14} {'reranked':>9} {'ms/query':>9} {'p95 ms':>7} {'saved':>6} "
+        f"{'top1 agree':>11} {f'top{top_k} overlap':>13} {'recall@1':>9} {f'recall@{top_k}':>9}"
+    )
+    setups = [("always", "always", None)]
+    setups += [(f"auto >= {t:g}", "auto", t) for t in thresholds]
+    setups += [("never", "never", None)]
+    for name, mode, threshold in setups:
+        if threshold is not None:
+            retriever.RERANK_CASCADE_THRESHOLD = threshold
+        if mode == "always":
+            rankings, tops, ms = reference, ref_tops, ref_ms
+            paths = ["cross_encoder"] * len(labels)
+        else:
+            rankings, tops, ms, paths = search_pass(labels, top_k, mode)
+        agree = np.mean([a[:1] == b[:1] for a, b in zip(rankings, reference)])
+        print(
+            f"{name:>14} {paths.count('cross_encoder') / len(labels):>9.0%} {np.mean(ms):>9.1f} "
+            f"{np.percentile(ms, 95):>7.1f} {1 - np.mean(ms) / np.mean(ref_ms):>6.0%} "
+            f"{agree:>11.0%} {topk_overlap(rankings, reference, top_k):>13.3f} "
+            f"{recall(labels, tops, 1):>9.3f} {recall(labels, tops, top_k):>9.3f}"
+        )
+
+
+# Uses the configured vector store (VECTOR_STORE) and its ingested chunks
+# python -m src.benchmarks.rerank_cascade
+# python -m src.benchmarks.rerank_cascade --thresholds 0.3 0.5 0.6 0.8 --top-k 3
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Cascade rerank: latency saved vs ranking agreement"
+    )
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.4, 0.6, 0.8])
+    parser.add_argument("--top-k", type=int, default=5)
+    args = parser.parse_args()
+    run(args.thresholds, args.top_k)
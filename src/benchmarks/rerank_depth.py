@@ -0,0 +1,77 @@
+# src/benchmarks/rerank_depth.py
+import argparse
+import os
+import time
+from src.benchmarks.retrieval_eval import load_labelled_queries, rank_exact, retrieval_metrics
+from src.core.embedding_generator import embed_text
+from src.core.query_cache import rerank_scores
+from src.core.retriever import rerank_hits
+from src.core.text_chunker import get_chunker
+from src.utils.file_loader import read_file
+
+DATA_FOLDER = "src/data/"
+
+
+def rerank_pass(labels, chunks, dense, candidate_k: int, k: int):
+    """Rerank the dense top candidate_k of every query, as retrieve_and_rerank does."""
+    rankings = []
+    totals = {"scored": 0, "cached": 0}
+    start = time.perf_counter()
+    for label, order in zip(labels, dense):
+        hits = [
+            {"id": str(idx), "metadata": {"chunk_text": chunks[idx]["chunk_text"]}}
+            for idx in order[:candidate_k]
+        ]
+        stats = rerank_hits(label["query"], hits, k, rerank_scores.generation)
+        totals["scored"] += stats["scored"]
+        totals["cached"] += stats["cached"]
+        hits.sort(key=lambda hit: hit["rerank_score"], reverse=True)
+        rankings.append([int(hit["id"]) for hit in hits])
+    return rankings, totals, time.perf_counter() - start
+
+
+def run(folder: str, depths, k: int):
+    chunker = get_chunker()
+    chunks = []
+    for fname in sorted(os.listdir(folder)):
+        for chunk in chunker.chunk(read_file(os.path.join(folder, fname))):
+            chunk["file"] = fname
+            chunks.append(chunk)
+    labels = load_labelled_queries()
+    dense = rank_exact(
+        embed_text([label["query"] for label in labels]),
+        embed_text([c["chunk_text"] for c in chunks]),
+    )
+    rerank_hits("warmup", [{"id": "warmup", "metadata": {"chunk_text": "warmup"}}], 1, -1)
+
+    print(f"chunks={len(chunks)} queries={len(labels)}")
+    m = retrieval_metrics(dense, chunks, labels, k)
+    print(f"dense only: recall@1={m['recall@1']} recall@{k}={m[f'recall@{k}']} mrr={m['mrr']}")
+    print(
+        f"{'pass':>6} {'cand_k':>6} {'recall@1':>9} {f'recall@{k}':>9} {'mrr':>6} "
+        f"{'scored':>7} {'cached':>7} {'ms/query':>9}"
+    )
+    # Cold: each depth starts from an empty score cache. Warm: depths grow
+    # like a paginated client, so each reuses the scores of the one before.
+    for name in ("cold", "warm"):
+        rerank_scores.clear()
+        for candidate_k in depths:
+            if name == "cold":
+                rerank_scores.clear()
+            rankings, totals, seconds = rerank_pass(labels, chunks, dense, candidate_k, k)
+            m = retrieval_metrics(rankings, chunks, labels, k)
+            print(
+                f"{name:>6} {candidate_k:>6} {m['recall@1']:>9} {m[f'recall@{k}']:>9} {m['mrr']:>6} "
+                f"{totals['scored']:>7} {totals['cached']:>7} {seconds * 1000 / len(labels):>9.1f}"
+            )
+
+
+# python -m src.benchmarks.rerank_depth
+# python -m src.benchmarks.rerank_depth --depths 5 10 20 50 100
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rerank quality and cost vs candidate depth")
+    parser.add_argument("--folder", default=DATA_FOLDER)
+    parser.add_argument("--depths", type=int, nargs="+", default=[5, 20, 50])
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+    run(args.folder, args.depths, args.k)
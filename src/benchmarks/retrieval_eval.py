@@ -0,0 +1,56 @@
+# src/benchmarks/retrieval_eval.py
+import json
+import os
+from typing import Dict, List
+import numpy as np
+
+QUERIES_PATH = os.path.join(os.path.dirname(__file__), "labelled_queries.json")
+
+
+def load_labelled_queries(path: str = QUERIES_PATH) -> List[Dict]:
+    """[{"query", "file", "answer"}]: a chunk is relevant when it comes from
+    `file` and contains `answer`, so labels survive any chunking strategy."""
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def is_relevant(chunk: Dict, label: Dict) -> bool:
+    return (
+        chunk["file"] == label["file"]
+        and label["answer"].lower() in chunk["chunk_text"].lower()
+    )
+
+
+def rank_exact(query_vectors, chunk_vectors) -> np.ndarray:
+    """Full cosine ranking of every chunk for every query (rows = queries)."""
+    q = np.asarray(query_vectors, dtype=np.float32)
+    c = np.asarray(chunk_vectors, dtype=np.float32)
+    q = q / np.linalg.norm(q, axis=1, keepdims=True)
+    c = c / np.linalg.norm(c, axis=1, keepdims=True)
+    return np.argsort(-(q @ c.T), axis=1)
+
+
+def retrieval_metrics(rankings, chunks: List[Dict], labels: List[Dict], k: int = 5) -> Dict:
+    """Recall@1, recall@k and MRR over the labelled queries."""
+    hits_1 = hits_k = 0
+    reciprocal = []
+    for order, label in zip(rankings, labels):
+        relevant = [r for r, idx in enumerate(order) if is_relevant(chunks[idx], label)]
+        first = relevant[0] if relevant else None
+        hits_1 += first == 0
+        hits_k += first is not None and first < k
+        reciprocal.append(1.0 / (first + 1) if first is not None else 0.0)
+    n = max(len(labels), 1)
+    return {
+        "recall@1": round(hits_1 / n, 3),
+        f"recall@{k}": round(hits_k / n, 3),
+        "mrr": round(float(np.mean(reciprocal)) if reciprocal else 0.0, 3),
+    }
+
+
+def topk_overlap(rankings_a, rankings_b, k: int = 5) -> float:
+    """Mean |top-k(a) ∩ top-k(b)| / k: how often two setups return the same hits."""
+    shared = [
+        len(set(a[:k]) & set(b[:k])) / k for a, b in zip(rankings_a, rankings_b)
+    ]
+    return round(float(np.mean(shared)) if shared else 0.0, 3)
@@ -0,0 +1,73 @@
+# src/benchmarks/startup_time.py
+import argparse
+import json
+import subprocess
+import sys
+
+# Runs in a fresh interpreter so nothing is imported or loaded yet
+PROBE = """
+import json, time
+started = time.perf_counter()
+import {module}
+imported = time.perf_counter()
+from src.utils.lazy import resource_status, warmup_all
+errors = warmup_all() if {warmup} else {{}}
+warmed = time.perf_counter()
+print(json.dumps({{
+    "import_s": imported - started,
+    "warmup_s": warmed - imported,
+    "resources": resource_status(),
+    "errors": errors,
+}}))
+"""
+
+
+def slowest_imports(module: str, top: int):
+    """Cumulative import time per top-level package, from python -X importtime."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    totals = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        if name == name.lstrip():  # top-level entries only (no indentation)
+            totals[name.split(".")[0]] = totals.get(name.split(".")[0], 0) + int(cumulative)
+    return sorted(totals.items(), key=lambda kv: kv[1], reverse=True)[:top]
+
+
+def run(module: str, warmup: bool, top: int):
+    code = PROBE.format(module=module, warmup=warmup)
+    proc = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if proc.returncode != 0:
+        print(proc.stderr.strip()[-2000:])
+        return
+    result = json.loads(proc.stdout.strip().splitlines()[-1])
+
+    print(f"import {module}: {result['import_s']:.2f}s")
+    print(f"warm-up:        {result['warmup_s']:.2f}s")
+    print(f"{'resource':>16} {'load s':>8} {'warmup s':>9}  error")
+    for name, status in result["resources"].items():
+        load = status["load_seconds"]
+        warm = status["warmup_seconds"]
+        print(
+            f"{name:>16} {load if load is not None else '-':>8} "
+            f"{warm if warm is not None else '-':>9}  {status['error'] or ''}"
+        )
+    print(f"slowest imports (cumulative, top {top}):")
+    for name, micros in slowest_imports(module, top):
+        print(f"{name:>24} {micros / 1e6:>7.2f}s")
+
+
+# python -m src.benchmarks.startup_time
+# python -m src.benchmarks.startup_time --module src.core.retriever --no-warmup
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Import time vs warm-up time")
+    parser.add_argument("--module", default="src.main")
+    parser.add_argument("--no-warmup", action="store_true")
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+    run(args.module, not args.no_warmup, args.top)
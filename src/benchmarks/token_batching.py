@@ -0,0 +1,112 @@
+# src/benchmarks/token_batching.py
+import argparse
+import os
+import time
+import numpy as np
+from src.benchmarks.retrieval_eval import load_labelled_queries
+from src.core.batching import (
+    TOKEN_BATCH_BUDGET,
+    TOKEN_BATCH_MAX_ITEMS,
+    fixed_batches,
+    padding_stats,
+    token_batches,
+)
+from src.core.embedding_generator import count_tokens, get_model
+from src.core.retriever import get_reranker
+from src.core.text_chunker import get_chunker
+from src.utils.file_loader import read_file
+
+DATA_FOLDER = "src/data/"
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def compare(title, library, fn, items, lengths, library_order, batch_size, budget, max_items):
+    """
+    The library call on the whole list (what ran before token batching) vs
+    length-sorted token-budget batches. library_order is the item order the
+    library batches in, for its padding figures: SentenceTransformer.encode
+    sorts by text length itself, CrossEncoder.predict keeps the input order.
+    """
+    fixed = [
+        [library_order[i] for i in batch] for batch in fixed_batches(len(items), batch_size)
+    ]
+    budgeted = token_batches(lengths, budget, max_items)
+    plans = {
+        f"library {batch_size}": (fixed, lambda: library(items, batch_size)),
+        f"budget {budget}": (budgeted, lambda: [fn([items[i] for i in b]) for b in budgeted]),
+    }
+    fn([items[0]])  # warm-up
+    print(f"{title}: items={len(items)} tokens={sum(lengths)}")
+    print(f"{'plan':>14} {'batches':>8} {'padded':>9} {'padding':>8} {'seconds':>8}")
+    seconds = {}
+    for name, (batches, run_plan) in plans.items():
+        stats = padding_stats(lengths, batches)
+        seconds[name] = timed(run_plan)
+        print(
+            f"{name:>14} {stats['batches']:>8} {stats['padded_tokens']:>9} "
+            f"{stats['padding_ratio']:>8.1%} {seconds[name]:>8.2f}"
+        )
+    before, after = seconds.values()
+    print(f"speedup: {before / after:.2f}x" if after else "speedup: -")
+
+
+def run(folder: str, batch_size: int, budget: int, max_items: int, candidates: int):
+    chunker = get_chunker()
+    chunks = []
+    for fname in sorted(os.listdir(folder)):
+        chunks.extend(c["chunk_text"] for c in chunker.chunk(read_file(os.path.join(folder, fname))))
+
+    # Embedding: every chunk of the corpus, as ingestion encodes them
+    model = get_model()
+    compare(
+        "embedding",
+        lambda items, size: model.encode(items, batch_size=size),
+        lambda batch: model.encode(batch, batch_size=len(batch)),
+        chunks,
+        count_tokens(chunks),
+        list(np.argsort([-len(text) for text in chunks], kind="stable")),
+        batch_size,
+        budget,
+        max_items,
+    )
+
+    # Reranking: each labelled query against `candidates` chunks
+    cross = get_reranker()
+    pairs = [
+        (label["query"], chunks[(i * candidates + j) % len(chunks)])
+        for i, label in enumerate(load_labelled_queries())
+        for j in range(candidates)
+    ]
+    encoded = cross.tokenizer([q for q, _ in pairs], [t for _, t in pairs], truncation=True)
+    print()
+    compare(
+        "rerank",
+        lambda items, size: cross.predict(items, batch_size=size),
+        lambda batch: cross.predict(batch, batch_size=len(batch)),
+        pairs,
+        [len(ids) for ids in encoded["input_ids"]],
+        list(range(len(pairs))),
+        batch_size,
+        budget,
+        max_items,
+    )
+
+
+# python -m src.benchmarks.token_batching
+# python -m src.benchmarks.token_batching --budget 8192 --max-items 64
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Padding and wall time: library batching vs token-budget batches"
+    )
+    parser.add_argument("--folder", default=DATA_FOLDER)
+    parser.add_argument("--batch-size", type=int, default=32, help="library batch size (its default)")
+    parser.add_argument("--budget", type=int, default=TOKEN_BATCH_BUDGET, help="padded tokens per batch")
+    parser.add_argument("--max-items", type=int, default=TOKEN_BATCH_MAX_ITEMS)
+    parser.add_argument("--candidates", type=int, default=20, help="chunks reranked per query")
+    args = parser.parse_args()
+    run(args.folder, args.batch_size, args.budget, args.max_items, args.candidates)
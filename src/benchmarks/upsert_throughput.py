@@ -0,0 +1,131 @@
+# src/benchmarks/upsert_throughput.py
+import argparse
+import random
+import threading
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+from src.database.upsert_batcher import BatchUpserter, estimate_bytes
+
+
+class TransientIndexError(Exception):
+    status = 503
+
+
+class RecordingIndex:
+    """
+    Local stand-in for a Pinecone index: stores upserted vectors, records
+    every call (size, bytes, thread), and can inject latency, transient
+    failures and the request-size limit.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_per_vector: float = 0.0,
+        failure_rate: float = 0.0,
+        max_request_bytes: int = 2 * 1024 * 1024,
+        seed: int = 0,
+    ):
+        self.latency = latency
+        self.latency_per_vector = latency_per_vector
+        self.failure_rate = failure_rate
+        self.max_request_bytes = max_request_bytes
+        self.vectors: Dict[str, Tuple] = {}
+        self.calls: List[Dict] = []
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def upsert(self, vectors=None, **kwargs):
+        size = sum(estimate_bytes(v) for v in vectors)
+        time.sleep(self.latency + self.latency_per_vector * len(vectors))
+        with self._lock:
+            failed = self._random.random() < self.failure_rate
+            self.calls.append(
+                {
+                    "vectors": len(vectors),
+                    "bytes": size,
+                    "failed": failed,
+                    "thread": threading.current_thread().name,
+                }
+            )
+        if size > self.max_request_bytes:
+            raise ValueError(f"Request size {size} exceeds {self.max_request_bytes}")
+        if failed:
+            raise TransientIndexError("injected transient failure")
+        with self._lock:
+            for vector_id, values, metadata in vectors:
+                self.vectors[vector_id] = (values, metadata)
+        return {"upserted_count": len(vectors)}
+
+    def delete(self, ids=None, delete_all=False, **kwargs):
+        with self._lock:
+            if delete_all:
+                self.vectors.clear()
+            for vector_id in ids or []:
+                self.vectors.pop(vector_id, None)
+
+
+def make_payload(count: int, dim: int, text_chars: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    values = rng.normal(size=(count, dim)).astype(np.float32)
+    text = "x" * text_chars
+    return [
+        (f"doc_{i}", values[i].tolist(), {"chunk_text": text, "chunk_index": i})
+        for i in range(count)
+    ]
+
+
+def run(count, dim, text_chars, latency, per_vector, failure_rate, concurrency):
+    payload = make_payload(count, dim, text_chars)
+    print(
+        f"vectors={count} dim={dim} metadata_chars={text_chars} "
+        f"latency={latency * 1000:.0f}ms+{per_vector * 1000:.2f}ms/vector "
+        f"failure_rate={failure_rate}"
+    )
+
+    # Today's path: one upsert call with every vector of the document
+    index = RecordingIndex(latency, per_vector)
+    start = time.perf_counter()
+    try:
+        index.upsert(vectors=payload)
+        outcome = f"{count / (time.perf_counter() - start):,.0f} vectors/s"
+    except ValueError as e:
+        outcome = f"rejected ({e})"
+    print(f"{'single call':>14}: {outcome}")
+
+    print(f"{'workers':>14} {'batches':>8} {'max KB':>8} {'retries':>8} {'vectors/s':>10}")
+    for workers in concurrency:
+        index = RecordingIndex(latency, per_vector, failure_rate)
+        upserter = BatchUpserter(index, concurrency=workers, backoff_seconds=0.01)
+        stats = upserter.upsert(payload)
+        assert len(index.vectors) == count
+        max_kb = max(c["bytes"] for c in index.calls) / 1024
+        print(
+            f"{workers:>14} {stats['batches']:>8} {max_kb:>8.0f} "
+            f"{stats['retries']:>8} {stats['vectors_per_sec']:>10,.0f}"
+        )
+        upserter.executor.shutdown()
+
+
+# python -m src.benchmarks.upsert_throughput
+# python -m src.benchmarks.upsert_throughput --count 20000 --failure-rate 0.05
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched upsert throughput")
+    parser.add_argument("--count", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--text-chars", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--per-vector", type=float, default=0.0001)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+    run(
+        args.count,
+        args.dim,
+        args.text_chars,
+        args.latency,
+        args.per_vector,
+        args.failure_rate,
+        args.concurrency,
+    )
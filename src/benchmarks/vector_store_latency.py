@@ -0,0 +1,99 @@
+# src/benchmarks/vector_store_latency.py
+import argparse
+import tempfile
+import time
+import numpy as np
+from src.database.local_vector_store import LocalVectorStore
+
+BLOCK = 10000
+
+
+def synthetic(count: int, dim: int, clusters: int, seed: int = 0, batch: int = BLOCK):
+    """Unit vectors around random topic centers (closer to real embeddings than noise)."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    for start in range(0, count, batch):
+        n = min(batch, count - start)
+        block = centers[rng.integers(0, clusters, n)] + 0.6 * rng.standard_normal((n, dim)).astype(
+            np.float32
+        )
+        yield start, block / np.linalg.norm(block, axis=1, keepdims=True)
+
+
+def make_queries(size: int, dim: int, clusters: int, count: int):
+    """Stored vectors plus noise, so every query has true neighbours."""
+    rng = np.random.default_rng(1)
+    sample = np.concatenate(
+        [block[rng.integers(0, len(block), 8)] for _, block in synthetic(size, dim, clusters)]
+    )
+    picked = sample[rng.integers(0, len(sample), count)]
+    return picked + 0.3 * rng.standard_normal(picked.shape).astype(np.float32)
+
+
+def latency(store, queries, top_k: int, filter=None):
+    ms, results = [], []
+    for q in queries:
+        t = time.perf_counter()
+        hits = store.query(q, top_k=top_k, filter=filter)
+        ms.append((time.perf_counter() - t) * 1000)
+        results.append([h["id"] for h in hits])
+    return float(np.percentile(ms, 50)), float(np.percentile(ms, 99)), results
+
+
+def run(sizes, dim: int, queries: int, top_k: int, nprobe: int, clusters: int, batch: int):
+    # Stores as the app builds them (autosave on), filled in ingestion-sized
+    # upserts: "first/last ms" is the mean upsert+save of the first and last
+    # tenth of the batches, so a save that grows with the store shows up.
+    print(f"dim={dim} queries={queries} top_k={top_k} nprobe={nprobe} batch={batch}")
+    print(
+        f"{'vectors':>9} {'index':>6} {'build s':>8} {'first ms':>9} {'last ms':>8} "
+        f"{'p50 ms':>8} {'p99 ms':>8} {'filt p50':>9} {'filt p99':>9} {f'recall@{top_k}':>9}"
+    )
+    for size in sizes:
+        probe = make_queries(size, dim, clusters, queries)
+        with tempfile.TemporaryDirectory() as tmp:
+            exact = None
+            for mode in ("exact", "ivf"):
+                store = LocalVectorStore(f"{tmp}/{mode}", dim, index=mode, nprobe=nprobe)
+                upsert_ms = []
+                for offset, block in synthetic(size, dim, clusters, batch=batch):
+                    items = [
+                        (f"v{offset + i}", vector, {"file": f"doc{(offset + i) % 100}"})
+                        for i, vector in enumerate(block)
+                    ]
+                    start = time.perf_counter()
+                    store.upsert(items)
+                    upsert_ms.append((time.perf_counter() - start) * 1000)
+                build_s = sum(upsert_ms) / 1000
+                tenth = max(len(upsert_ms) // 10, 1)
+                first_ms, last_ms = np.mean(upsert_ms[:tenth]), np.mean(upsert_ms[-tenth:])
+
+                p50, p99, results = latency(store, probe, top_k)
+                fp50, fp99, _ = latency(store, probe, top_k, {"file": {"$in": ["doc1", "doc2"]}})
+                if mode == "exact":
+                    exact = results
+                recall = np.mean([len(set(a) & set(b)) / top_k for a, b in zip(exact, results)])
+                print(
+                    f"{size:>9} {mode:>6} {build_s:>8.1f} {first_ms:>9.2f} {last_ms:>8.2f} "
+                    f"{p50:>8.2f} {p99:>8.2f} "
+                    f"{fp50:>9.2f} {fp99:>9.2f} {recall:>9.3f}"
+                )
+                del store
+
+
+# python -m src.benchmarks.vector_store_latency
+# python -m src.benchmarks.vector_store_latency --sizes 10000 100000 --dim 256
+# python -m src.benchmarks.vector_store_latency --sizes 10000 --batch 50
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local vector store: p50/p99 query latency")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--dim", type=int, default=1024)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--nprobe", type=int, default=16)
+    parser.add_argument("--clusters", type=int, default=256)
+    parser.add_argument(
+        "--batch", type=int, default=64, help="vectors per upsert (INGEST_STREAM_BATCH)"
+    )
+    args = parser.parse_args()
+    run(args.sizes, args.dim, args.queries, args.top_k, args.nprobe, args.clusters, args.batch)
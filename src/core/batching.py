@@ -0,0 +1,76 @@
+# src/core/batching.py
+import os
+from typing import Callable, List, Sequence
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Every text in a forward pass is padded to the longest one, so a batch
+# costs len(batch) * longest tokens. Inputs are sorted by token length and
+# packed until that padded cost reaches the budget: many short texts share
+# a pass, long ones go in small batches, and little compute is spent on padding.
+TOKEN_BATCH_BUDGET = int(os.getenv("TOKEN_BATCH_BUDGET", "16384"))
+TOKEN_BATCH_MAX_ITEMS = int(os.getenv("TOKEN_BATCH_MAX_ITEMS", "128"))
+
+
+def token_batches(
+    lengths: Sequence[int],
+    token_budget: int = TOKEN_BATCH_BUDGET,
+    max_items: int = TOKEN_BATCH_MAX_ITEMS,
+) -> List[np.ndarray]:
+    """
+    Split item indices into batches of similar token length, longest first
+    (a batch that does not fit in memory fails on the first pass, not the
+    last). A batch holds at most max_items and, unless it is a single
+    oversized item, at most token_budget padded tokens.
+    """
+    lengths = np.maximum(np.asarray(lengths, dtype=np.int64), 1)
+    order = np.argsort(-lengths, kind="stable")
+    batches, start = [], 0
+    while start < len(order):
+        # Sorted descending: the first item sets the padded width
+        size = max(1, min(max_items, token_budget // int(lengths[order[start]])))
+        batches.append(order[start : start + size])
+        start += size
+    return batches
+
+
+def fixed_batches(count: int, batch_size: int) -> List[np.ndarray]:
+    """Arrival-order batches of a fixed size (what the model does by default)."""
+    return [np.arange(i, min(i + batch_size, count)) for i in range(0, count, batch_size)]
+
+
+def padding_stats(lengths: Sequence[int], batches: List[np.ndarray]) -> dict:
+    """Real vs padded tokens of a batch plan; padding_ratio = wasted share."""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    real = int(lengths.sum())
+    padded = int(sum(len(b) * lengths[b].max() for b in batches if len(b)))
+    return {
+        "batches": len(batches),
+        "real_tokens": real,
+        "padded_tokens": padded,
+        "padding_ratio": round(1 - real / padded, 3) if padded else 0.0,
+    }
+
+
+def run_batched(
+    items: Sequence,
+    lengths: Sequence[int],
+    fn: Callable[[list], np.ndarray],
+    token_budget: int = TOKEN_BATCH_BUDGET,
+    max_items: int = TOKEN_BATCH_MAX_ITEMS,
+) -> np.ndarray:
+    """
+    Call fn on token-budget batches of items and return its rows in the
+    original item order. fn gets a list and returns one row per item.
+    """
+    out = None
+    for batch in token_batches(lengths, token_budget, max_items):
+        rows = np.asarray(fn([items[i] for i in batch]))
+        if out is None:
+            out = np.empty((len(items),) + rows.shape[1:], dtype=rows.dtype)
+        out[batch] = rows
+    if out is None:
+        return np.zeros((0,), dtype=np.float32)
+    return out
@@ -0,0 +1,164 @@
+# src/core/context_packing.py
+import math
+import os
+import threading
+from typing import Dict, List, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from nltk.tokenize import sent_tokenize
+from src.database.bm25_index import tokenize
+
+load_dotenv()
+
+# Maximal marginal relevance after the rerank: each next hit maximizes
+# MMR_LAMBDA * relevance - (1 - MMR_LAMBDA) * similarity to the hits already
+# picked, over the best top_k * MMR_POOL reranked candidates
+MMR_ENABLED = os.getenv("MMR_ENABLED", "1") != "0"
+MMR_LAMBDA = float(os.getenv("MMR_LAMBDA", "0.5"))
+MMR_POOL = int(os.getenv("MMR_POOL", "3"))
+
+# Tokens of retrieved/tool text allowed into an answer-rewrite prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))
+# The Groq models' tokenizers are not available locally; Llama-family
+# tokenizers average about 4 characters per English token
+CHARS_PER_TOKEN = 4
+
+_totals = {"requests": 0, "tokens_in": 0, "tokens_out": 0, "sentences_dropped": 0}
+_totals_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+# -------------------------
+def mmr_select(relevance, vectors, k: int, lam: float = MMR_LAMBDA) -> List[int]:
+    """
+    Indices of k rows picked by maximal marginal relevance. relevance is
+    scaled to [0, 1]; similarities are cosine. One matrix product up front,
+    then each pick is a vectorized update of the max similarity to the
+    picked set.
+    """
+    relevance = np.asarray(relevance, dtype=np.float64)
+    n = len(relevance)
+    if n <= k:
+        return list(range(n))
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.ones(n)
+    v = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(v, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    v = v / norms
+    similarity = v @ v.T
+
+    picked = [int(np.argmax(relevance))]
+    closest = similarity[picked[0]].astype(np.float64)
+    available = np.ones(n, dtype=bool)
+    available[picked[0]] = False
+    while len(picked) < k:
+        score = np.where(available, lam * relevance - (1 - lam) * closest, -np.inf)
+        best = int(np.argmax(score))
+        picked.append(best)
+        available[best] = False
+        np.maximum(closest, similarity[best], out=closest)
+    return picked
+
+
+def diversify(hits: List[Dict], vectors: Dict[str, List[float]], k: int) -> List[Dict]:
+    """
+    The k hits MMR picks from ranked hits (best first), using the vectors
+    by hit id; a hit without a vector counts as unlike every other.
+    Relevance is rerank_score, or semantic_score for hits the reranker
+    skipped (pass hits of one kind: the two scales do not mix).
+    """
+    if len(hits) <= k:
+        return hits
+    dim = len(next(iter(vectors.values()))) if vectors else 1
+    matrix = np.zeros((len(hits), dim), dtype=np.float32)
+    for row, hit in enumerate(hits):
+        if hit["id"] in vectors:
+            matrix[row] = vectors[hit["id"]]
+    picked = mmr_select([hit.get("rerank_score", hit["semantic_score"]) for hit in hits], matrix, k)
+    return [hits[i] for i in picked]
+
+
+# -------------------------
+def pack_blocks(
+    query: str, blocks: List[str], budget: int = CONTEXT_TOKEN_BUDGET
+) -> Tuple[List[str], Dict]:
+    """
+    Fit text blocks (tool outputs, search hits) into `budget` tokens for a
+    prompt. Sentences repeated across blocks are kept once. If the rest is
+    still over budget, each block keeps its first sentence (it usually names
+    the step or source), then the sentences sharing the most words with the
+    query are added while they fit. Kept sentences stay in their original
+    order; a block that lost nothing is returned verbatim. Returns the
+    packed blocks and token counts.
+    """
+    terms = set(tokenize(query))
+    sentences = []  # (block, position, text, tokens, overlap)
+    seen = set()
+    trimmed = set()  # blocks that lost a sentence
+    counts = [0] * len(blocks)
+    for b, block in enumerate(blocks):
+        for position, sentence in enumerate(sent_tokenize(block or "")):
+            counts[b] += 1
+            tokens = estimate_tokens(sentence) + 1  # + the separator
+            key = " ".join(sentence.casefold().split())
+            if key in seen:
+                trimmed.add(b)
+                continue
+            seen.add(key)
+            overlap = len(terms.intersection(tokenize(sentence)))
+            sentences.append((b, position, sentence, tokens, overlap))
+
+    if sum(s[3] for s in sentences) > budget:
+        # Block openers first, then by query overlap (earlier blocks win ties)
+        def priority(i):
+            b, position, _, _, overlap = sentences[i]
+            return position != 0, -overlap, b, position
+
+        order = sorted(range(len(sentences)), key=priority)
+        kept, used = set(), 0
+        for i in order:
+            if used + sentences[i][3] <= budget:
+                kept.add(i)
+                used += sentences[i][3]
+        trimmed.update(s[0] for i, s in enumerate(sentences) if i not in kept)
+        sentences = [s for i, s in enumerate(sentences) if i in kept]
+
+    parts = [[] for _ in blocks]
+    for b, _, sentence, _, _ in sentences:
+        parts[b].append(sentence)
+    packed = [
+        " ".join(parts[b]) if b in trimmed else (block or "") for b, block in enumerate(blocks)
+    ]
+    tokens_in = sum(estimate_tokens(block or "") for block in blocks)
+    tokens_out = sum(estimate_tokens(block) for block in packed)
+    dropped = sum(counts) - len(sentences)
+
+    with _totals_lock:
+        _totals["requests"] += 1
+        _totals["tokens_in"] += tokens_in
+        _totals["tokens_out"] += tokens_out
+        _totals["sentences_dropped"] += dropped
+    return packed, {
+        "tokens_in": tokens_in,
+        "tokens_out": tokens_out,
+        "tokens_saved": tokens_in - tokens_out,
+        "sentences_dropped": dropped,
+    }
+
+
+def packing_stats() -> Dict:
+    with _totals_lock:
+        totals = dict(_totals)
+    requests = totals["requests"]
+    saved = totals["tokens_in"] - totals["tokens_out"]
+    return {
+        **totals,
+        "tokens_saved": saved,
+        "saved_per_request": round(saved / requests, 1) if requests else 0.0,
+        "budget": CONTEXT_TOKEN_BUDGET,
+        "mmr": {"enabled": MMR_ENABLED, "lambda": MMR_LAMBDA, "pool": MMR_POOL},
+    }
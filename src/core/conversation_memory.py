@@ -5,6 +5,7 @@ import json
 from typing import List, Dict
 from dotenv import load_dotenv
 from groq import Groq
+from src.core.context_packing import pack_blocks
 from src.functions_calling.tool_registry import tool_registry, custom_functions
 from src.prompts.conversation_prompts import PLANNER_PROMPT, EXECUTOR_PROMPT
 
@@ -129,10 +130,12 @@ def reply(session_id: str, user_input: str):
     plan = planner(user_input, session_id)
     results = executor(plan, session_id)
 
-    combined_results = "\n".join(
+    blocks = [
         f"Step {step['step']} ({step['action']}): {results.get(step['step'], 'No result')}"
         for step in plan.get("steps", [])
-    )
+    ]
+    blocks, context = pack_blocks(user_input, blocks)
+    combined_results = "\n".join(blocks)
 
     rewrite_prompt = f"""
     You are a helpful assistant. Summarize the following multi-step results
@@ -172,7 +175,7 @@ def reply(session_id: str, user_input: str):
     ]
 
     add_message(session_id, "assistant", f"Final Answer: {final_answer}")
-    return final_answer, trace
+    return final_answer, trace, context
 
 
 # -------------------------
@@ -197,9 +200,10 @@ if __name__ == "__main__":
         # print(f"Plan: {plan}")
         # print(f"Executor: {execute}")
 
-        answer, trace = reply(session_id, query)
+        answer, trace, context = reply(session_id, query)
         print("\n--- Trace ---")
         print(json.dumps(trace, indent=2, ensure_ascii=False))
+        print(f"Context tokens: {context}")
         print("\n--- Final Answer ---")
         print(answer)
         print("=" * 80)
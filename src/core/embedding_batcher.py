@@ -0,0 +1,169 @@
+# src/core/embedding_batcher.py
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, Dict, List
+from dotenv import load_dotenv
+from src.core.embedding_generator import encode
+from src.core.model_executor import run_model
+
+load_dotenv()
+
+# Query embeddings from concurrent requests that arrive within the window
+# are encoded in one forward pass (at most EMBED_BATCH_MAX_ITEMS texts).
+# Costs up to one window of extra latency when a query arrives alone.
+BATCHER_ENABLED = os.getenv("EMBED_BATCHER", "1") != "0"
+BATCH_WINDOW_MS = float(os.getenv("EMBED_BATCH_WINDOW_MS", "5"))
+BATCH_MAX_ITEMS = int(os.getenv("EMBED_BATCH_MAX_ITEMS", "32"))
+
+
+class Histogram:
+    """Counts per power-of-two bucket: <=1, <=2, <=4, ..."""
+
+    def __init__(self):
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def record(self, value: int):
+        bound = 1
+        while bound < value:
+            bound *= 2
+        self.buckets[bound] = self.buckets.get(bound, 0) + 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def as_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2) if self.count else 0.0,
+            "max": self.max,
+            "buckets": {f"<={b}": n for b, n in sorted(self.buckets.items())},
+        }
+
+
+# -------------------------
+class EmbeddingBatcher:
+    """
+    Collects single-text embedding requests from many threads and runs them
+    through `encode_fn` (list of texts -> array of vectors) in batches. The
+    first request of a batch opens a window of `window_ms`; the batch is sent
+    when the window closes or `max_items` texts are waiting, and each caller
+    gets its own row back through a Future.
+    """
+
+    def __init__(
+        self,
+        encode_fn: Callable = encode,
+        window_ms: float = BATCH_WINDOW_MS,
+        max_items: int = BATCH_MAX_ITEMS,
+    ):
+        self.encode_fn = encode_fn
+        self.window = max(0.0, window_ms) / 1000
+        self.max_items = max(1, max_items)
+        self.queue: queue.Queue = queue.Queue()
+        self.queue_depth = Histogram()  # requests waiting when one is submitted
+        self.batch_size = Histogram()
+        self.batches = 0
+        self.encode_seconds = 0.0
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._loop, name="embed-batcher", daemon=True
+                )
+                self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        if self._thread is None:
+            self._start()
+        future = Future()
+        with self._lock:
+            self.queue_depth.record(self.queue.qsize() + 1)
+        self.queue.put((text, future))
+        return future
+
+    def embed(self, text: str) -> List[float]:
+        return self.submit(text).result()
+
+    def _collect(self) -> List[tuple]:
+        batch = [self.queue.get()]
+        deadline = time.perf_counter() + self.window
+        while len(batch) < self.max_items:
+            remaining = deadline - time.perf_counter()
+            try:
+                if remaining > 0:
+                    batch.append(self.queue.get(timeout=remaining))
+                else:
+                    # Window is over: still take whatever is already queued
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _loop(self):
+        while True:
+            # A caller that gave up (cancelled await, timeout) is dropped; the
+            # others' futures can no longer be cancelled once running
+            batch = [item for item in self._collect() if item[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            started = time.perf_counter()
+            try:
+                vectors = self.encode_fn([text for text, _ in batch])
+                for (_, future), vector in zip(batch, vectors):
+                    future.set_result(list(map(float, vector)))
+            except Exception as e:
+                # Nothing may end this thread: every later query would wait on it
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            with self._lock:
+                self.batch_size.record(len(batch))
+                self.batches += 1
+                self.encode_seconds += time.perf_counter() - started
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "enabled": True,
+                "window_ms": self.window * 1000,
+                "max_items": self.max_items,
+                "pending": self.queue.qsize(),
+                "batches": self.batches,
+                "encode_seconds": round(self.encode_seconds, 3),
+                "batch_size": self.batch_size.as_dict(),
+                "queue_depth": self.queue_depth.as_dict(),
+            }
+
+
+embedding_batcher = EmbeddingBatcher() if BATCHER_ENABLED else None
+
+
+def embed_query(text: str) -> List[float]:
+    """embed_text for one query string, batched with concurrent callers."""
+    if embedding_batcher is None:
+        return encode([text])[0].tolist()
+    return embedding_batcher.embed(text)
+
+
+async def aembed_query(text: str) -> List[float]:
+    """embed_query for coroutines: awaits the batch without holding a thread."""
+    if embedding_batcher is None:
+        return await run_model(lambda: encode([text])[0].tolist())
+    return await asyncio.wrap_future(embedding_batcher.submit(text))
+
+
+def embedding_batcher_stats() -> Dict:
+    if embedding_batcher is None:
+        return {"enabled": False}
+    return embedding_batcher.stats()
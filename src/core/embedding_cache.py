@@ -0,0 +1,216 @@
+# src/core/embedding_cache.py
+import atexit
+import hashlib
+import json
+import os
+import threading
+from typing import List, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+CACHE_ENABLED = os.getenv("EMBED_CACHE", "1") != "0"
+CACHE_DIR = os.getenv("EMBED_CACHE_DIR", ".cache/embeddings")
+CACHE_MAX_MB = float(os.getenv("EMBED_CACHE_MAX_MB", "512"))
+CACHE_DTYPE = os.getenv("EMBED_CACHE_DTYPE", "float16")
+
+# Index is written to disk after this many new entries (and at exit)
+FLUSH_EVERY = 1024
+# Fraction of the cache freed at once when it is full
+EVICT_FRACTION = 0.1
+
+
+def normalize_text(text: str) -> str:
+    """Whitespace differences should not produce separate cache entries."""
+    return " ".join(text.split())
+
+
+def cache_key(model_name: str, dim: int, text: str) -> str:
+    raw = f"{model_name}\x1f{dim}\x1f{normalize_text(text)}"
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def _tag(key: str) -> int:
+    # 63 bits of the key, stored next to each vector so a slot that was
+    # reused after eviction can never be served for the wrong text
+    return int(key[:16], 16) >> 1
+
+
+# -------------------------
+class EmbeddingCache:
+    """
+    Disk-backed embedding cache for one (model, dimension) pair.
+
+    Layout in <directory>/<model>-<dim>-<dtype>/:
+        vectors.bin  memory-mapped [slots, dim] float16/float32 matrix
+        tags.bin     memory-mapped [slots] uint64 key tags
+        index.json   {key: [slot, last_used]}
+
+    The file grows on demand up to max_mb; when full, the least recently
+    used 10% of entries are evicted and their slots reused.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        dim: int,
+        directory: str = CACHE_DIR,
+        max_mb: float = CACHE_MAX_MB,
+        dtype: str = CACHE_DTYPE,
+    ):
+        self.model_name = model_name
+        self.dim = dim
+        self.dtype = np.dtype(dtype)
+        self.row_bytes = dim * self.dtype.itemsize
+        self.capacity = max(1, int(max_mb * 1024 * 1024) // self.row_bytes)
+        safe_name = model_name.replace("/", "__")
+        self.directory = os.path.join(directory, f"{safe_name}-{dim}-{self.dtype.name}")
+        os.makedirs(self.directory, exist_ok=True)
+        self.vectors_path = os.path.join(self.directory, "vectors.bin")
+        self.tags_path = os.path.join(self.directory, "tags.bin")
+        self.index_path = os.path.join(self.directory, "index.json")
+
+        self.entries = {}  # key -> [slot, last_used]
+        self.clock = 0
+        self.rows = 0  # allocated rows in the files
+        self.next_slot = 0
+        self.free_slots: List[int] = []
+        self.hits = self.misses = self.evictions = 0
+        self._unflushed = 0
+        self._lock = threading.RLock()
+        self._load()
+        atexit.register(self.flush)
+
+    # ---- storage ----
+    def _load(self):
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.clock = data.get("clock", 0)
+            self.next_slot = data.get("next_slot", 0)
+            self.free_slots = data.get("free_slots", [])
+        if os.path.exists(self.vectors_path):
+            self.rows = os.path.getsize(self.vectors_path) // self.row_bytes
+        # Drop entries the files cannot back (e.g. max_mb was lowered)
+        limit = min(self.rows, self.capacity)
+        self.entries = {k: v for k, v in self.entries.items() if v[0] < limit}
+        self.next_slot = min(self.next_slot, limit)
+        self.free_slots = [s for s in self.free_slots if s < limit]
+        self._open(self.rows)
+
+    def _open(self, rows: int):
+        self.vectors = self.tags = None
+        if rows == 0:
+            return
+        self.vectors = np.memmap(
+            self.vectors_path, dtype=self.dtype, mode="r+", shape=(rows, self.dim)
+        )
+        self.tags = np.memmap(self.tags_path, dtype=np.uint64, mode="r+", shape=(rows,))
+
+    def _grow(self, needed: int):
+        if needed <= self.rows:
+            return
+        rows = min(self.capacity, max(needed, self.rows * 2, 1024))
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.tags.flush()
+        for path, row_bytes in ((self.vectors_path, self.row_bytes), (self.tags_path, 8)):
+            with open(path, "ab") as f:
+                f.truncate(rows * row_bytes)
+        self.rows = rows
+        self._open(rows)
+
+    def _evict(self):
+        count = max(1, int(len(self.entries) * EVICT_FRACTION))
+        oldest = sorted(self.entries.items(), key=lambda kv: kv[1][1])[:count]
+        for key, (slot, _) in oldest:
+            del self.entries[key]
+            self.tags[slot] = 0
+            self.free_slots.append(slot)
+        self.evictions += len(oldest)
+
+    def _allocate(self) -> int:
+        if not self.free_slots and self.next_slot >= self.capacity:
+            self._evict()
+        if self.free_slots:
+            return self.free_slots.pop()
+        slot = self.next_slot
+        self.next_slot += 1
+        self._grow(self.next_slot)
+        return slot
+
+    # ---- public API ----
+    def get_many(self, texts: List[str]) -> Tuple[np.ndarray, List[int]]:
+        """
+        Batched lookup. Returns (vectors, missing): a float32 [len(texts), dim]
+        array filled for every hit, and the positions that still need encoding.
+        """
+        result = np.zeros((len(texts), self.dim), dtype=np.float32)
+        with self._lock:
+            keys = [cache_key(self.model_name, self.dim, t) for t in texts]
+            found, slots, missing = [], [], []
+            for i, key in enumerate(keys):
+                entry = self.entries.get(key)
+                if entry is not None and int(self.tags[entry[0]]) == _tag(key):
+                    self.clock += 1
+                    entry[1] = self.clock
+                    found.append(i)
+                    slots.append(entry[0])
+                else:
+                    missing.append(i)
+            if found:
+                # One gather from the memory map for the whole batch
+                result[found] = self.vectors[np.asarray(slots)]
+            self.hits += len(found)
+            self.misses += len(missing)
+        return result, missing
+
+    def put_many(self, texts: List[str], vectors):
+        vectors = np.asarray(vectors)
+        with self._lock:
+            for text, vector in zip(texts, vectors):
+                key = cache_key(self.model_name, self.dim, text)
+                entry = self.entries.get(key)
+                slot = entry[0] if entry is not None else self._allocate()
+                self.vectors[slot] = vector
+                self.tags[slot] = _tag(key)
+                self.clock += 1
+                self.entries[key] = [slot, self.clock]
+                self._unflushed += 1
+            if self._unflushed >= FLUSH_EVERY:
+                self.flush()
+
+    def flush(self):
+        with self._lock:
+            if self.vectors is not None:
+                self.vectors.flush()
+                self.tags.flush()
+            data = {
+                "entries": self.entries,
+                "clock": self.clock,
+                "next_slot": self.next_slot,
+                "free_slots": self.free_slots,
+            }
+            tmp = f"{self.index_path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.index_path)
+            self._unflushed = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_name,
+                "dim": self.dim,
+                "dtype": self.dtype.name,
+                "entries": len(self.entries),
+                "capacity": self.capacity,
+                "size_mb": round(self.rows * self.row_bytes / (1024 * 1024), 2),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "evictions": self.evictions,
+            }
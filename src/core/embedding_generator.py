@@ -1,13 +1,172 @@
 # src/core/embedding_generator.py
-from sentence_transformers import SentenceTransformer
+import os
+import numpy as np
+from dotenv import load_dotenv
+from src.core.batching import run_batched
+from src.core.embedding_cache import CACHE_ENABLED, EmbeddingCache, normalize_text
+from src.core.embedding_pool import get_pool, use_pool
+from src.utils.lazy import Lazy
 
-# Use this model for 1024 dims
-sbert = SentenceTransformer("Qwen/Qwen3-Embedding-0.6B")
+load_dotenv()
+
+# Use this model for 1024 dims (native width, see EMBEDDING_DIM)
+MODEL_NAME = "Qwen/Qwen3-Embedding-0.6B"
+
+# Inference backend (CPU):
+#   torch     full fp32 PyTorch
+#   int8      PyTorch with Linear layers dynamically quantized to int8
+#   onnx      ONNX Runtime graph (exported on first load unless a file is given)
+#   openvino  OpenVINO graph (same)
+# EMBEDDING_BACKEND_FILE picks a specific exported file inside the model
+# repo/cache, e.g. a pre-quantized "onnx/model_qint8_avx512_vnni.onnx".
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch").lower()
+EMBEDDING_BACKEND_FILE = os.getenv("EMBEDDING_BACKEND_FILE")
+BACKENDS = ("torch", "int8", "onnx", "openvino")
+
+
+def load_model(backend: str = EMBEDDING_BACKEND):
+    """Build the SentenceTransformer for a backend (imports torch on first call)."""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend} (choose from {BACKENDS})")
+    if backend in ("onnx", "openvino"):
+        model_kwargs = {"file_name": EMBEDDING_BACKEND_FILE} if EMBEDDING_BACKEND_FILE else {}
+        return SentenceTransformer(MODEL_NAME, backend=backend, model_kwargs=model_kwargs)
+    model = SentenceTransformer(MODEL_NAME)
+    if backend == "int8":
+        torch.ao.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True
+        )
+    return model
+
+
+# Output dimension. Qwen3-Embedding is trained with Matryoshka loss, so the
+# first N values of a vector are a usable N-dim embedding once re-normalized.
+# Index, upserts and queries all use this width (see vector_store).
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))
+
+
+def _create_model():
+    model = load_model()
+    native_dim = model.get_sentence_embedding_dimension()
+    if not 0 < EMBEDDING_DIM <= native_dim:
+        raise ValueError(f"EMBEDDING_DIM must be between 1 and {native_dim}, got {EMBEDDING_DIM}")
+    return model
+
+
+# Loaded on first use (or by the API's startup warm-up), not at import
+embedding_model = Lazy(
+    "embedding_model", _create_model, warmup=lambda model: model.encode(["warmup"])
+)
+
+
+def get_model():
+    return embedding_model.get()
+
+
+def truncate_embeddings(vectors, dim: int = EMBEDDING_DIM):
+    """Keep the first `dim` values of each row and L2-normalize again."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dim >= vectors.shape[-1]:
+        return vectors
+    vectors = vectors[..., :dim]
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def _model_encode(texts):
+    """Length-sorted, token-budget batches (see batching), rows in input order."""
+    texts = list(texts)
+    if not texts:
+        return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+    model = get_model()
+    max_length = getattr(model, "max_seq_length", None) or float("inf")
+    lengths = [min(n, max_length) for n in count_tokens(texts)]
+    vectors = run_batched(texts, lengths, lambda batch: model.encode(batch, batch_size=len(batch)))
+    return truncate_embeddings(vectors)
+
+
+def _encode_uncached(texts):
+    # Large bulk encodes (ingestion, graph building) go to the process pool
+    if use_pool(len(texts)):
+        return get_pool().encode(texts)
+    return _model_encode(texts)
+
+
+# Persistent cache keyed by (model, dim, text): repeated boilerplate,
+# re-ingested files and re-chunked documents skip the model entirely.
+# Backends give slightly different vectors, so each one has its own cache.
+CACHE_MODEL_NAME = MODEL_NAME
+if EMBEDDING_BACKEND != "torch":
+    CACHE_MODEL_NAME += f"-{EMBEDDING_BACKEND}"
+    if EMBEDDING_BACKEND_FILE:
+        CACHE_MODEL_NAME += f"-{os.path.splitext(os.path.basename(EMBEDDING_BACKEND_FILE))[0]}"
+embedding_cache = (
+    Lazy("embedding_cache", lambda: EmbeddingCache(CACHE_MODEL_NAME, EMBEDDING_DIM))
+    if CACHE_ENABLED
+    else None
+)
+
+
+def encode(texts):
+    """
+    Encode a list of texts to a float32 [len(texts), EMBEDDING_DIM] array
+    (truncated and re-normalized below the model's width). Cached texts
+    are read from the embedding cache in one batch; only the distinct misses
+    go through the model.
+    """
+    texts = list(texts)
+    if embedding_cache is None:
+        return _encode_uncached(texts)
+    if not texts:
+        return np.zeros((0, EMBEDDING_DIM), dtype=np.float32)
+
+    cache = embedding_cache.get()
+    vectors, missing = cache.get_many(texts)
+    if missing:
+        # Texts that only differ in whitespace share a cache key: encode once
+        position = {}
+        for i in missing:
+            position.setdefault(normalize_text(texts[i]), len(position))
+        unique = list(position)
+        fresh = _encode_uncached(unique)
+        cache.put_many(unique, fresh)
+        for i in missing:
+            vectors[i] = fresh[position[normalize_text(texts[i])]]
+    return vectors
+
+
+def embedding_cache_stats():
+    if embedding_cache is None:
+        return {"enabled": False, "backend": EMBEDDING_BACKEND}
+    if not embedding_cache.loaded:
+        return {"enabled": True, "backend": EMBEDDING_BACKEND, "loaded": False}
+    return {"enabled": True, "backend": EMBEDDING_BACKEND, **embedding_cache.get().stats()}
+
+
+def count_tokens(texts):
+    """Token count of each text under the embedding model's own tokenizer."""
+    texts = list(texts)
+    if not texts:
+        return []
+    ids = get_model().tokenizer(texts, add_special_tokens=False)["input_ids"]
+    return [len(x) for x in ids]
+
+
+def token_spans(text):
+    """Character (start, end) offsets of each token of `text`."""
+    encoded = get_model().tokenizer(
+        text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+    )
+    return encoded["offset_mapping"]
 
 
 def embed_text(text):
-    embeddings = sbert.encode(text)
-    return embeddings.tolist()
+    if isinstance(text, str):
+        return encode([text])[0].tolist()
+    return encode(text).tolist()
 
 
 # No tolist() the result will be <ndarray>
@@ -15,7 +174,7 @@ def embed_text(text):
 
 
 def embed_chunks(chunks):
-    embeddings = sbert.encode(chunks)
+    embeddings = encode(chunks)
     results = []
     for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
         results.append(
@@ -24,6 +183,32 @@ def embed_chunks(chunks):
     return results
 
 
+def pool_chunk_embeddings(chunks):
+    """
+    Build chunk vectors from the sentence vectors semantic_chunk already
+    computed (semantic_chunk(..., with_embeddings=True)) instead of encoding
+    the joined chunk text again: a length-weighted mean of the sentence
+    vectors (each normalized first), L2-normalized. Same output shape as
+    embed_chunks.
+    """
+    results = []
+    for i, chunk in enumerate(chunks):
+        weights = np.asarray(chunk["sentence_lengths"], dtype=np.float32)
+        vectors = np.asarray(chunk["sentence_embeddings"], dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+        if weights.sum() == 0:
+            weights = np.ones_like(weights)
+        pooled = weights @ vectors / weights.sum()
+        norm = np.linalg.norm(pooled)
+        if norm > 0:
+            pooled = pooled / norm
+        results.append(
+            {"chunk_text": chunk["chunk_text"], "chunk_index": i, "embedding": pooled.tolist()}
+        )
+    return results
+
+
 # python -m src.core.embedding_generator
 # Quick Test
 
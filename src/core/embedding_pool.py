@@ -0,0 +1,149 @@
+# src/core/embedding_pool.py
+import atexit
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Bulk embedding across processes. 0 keeps every encode in this process.
+# Each worker loads its own copy of the model (plan memory accordingly) and
+# is pinned to its own slice of the CPUs with matching torch threads.
+POOL_WORKERS = int(os.getenv("EMBED_POOL_WORKERS", "0"))
+# Only encodes of at least this many (uncached) texts go to the pool
+POOL_MIN_TEXTS = int(os.getenv("EMBED_POOL_MIN_TEXTS", "256"))
+# Texts per task sent to a worker
+POOL_SHARD_SIZE = int(os.getenv("EMBED_POOL_SHARD_SIZE", "64"))
+
+
+# -------------------------
+# Worker side. This module must stay free of model imports at the top:
+# spawned workers import it before the initializer has configured them.
+_encode = None
+
+
+def _init_worker(core_sets):
+    global _encode
+    cores = core_sets.get()
+    try:
+        os.sched_setaffinity(0, cores)
+    except (AttributeError, OSError):
+        pass  # not supported on this platform
+    # Workers encode only: the cache belongs to the parent, and a worker
+    # must never start a pool of its own
+    os.environ["EMBED_CACHE"] = "0"
+    os.environ["EMBED_POOL_WORKERS"] = "0"
+    os.environ["OMP_NUM_THREADS"] = str(len(cores))
+    import torch
+
+    torch.set_num_threads(len(cores))
+    from src.core.embedding_generator import _model_encode, get_model
+
+    get_model()
+    _encode = _model_encode
+
+
+def _encode_shard(texts: List[str]) -> np.ndarray:
+    return np.ascontiguousarray(_encode(texts), dtype=np.float32)
+
+
+def split_cores(workers: int) -> List[List[int]]:
+    """Contiguous, disjoint CPU sets, one per worker."""
+    if hasattr(os, "sched_getaffinity"):
+        cores = sorted(os.sched_getaffinity(0))
+    else:
+        cores = list(range(os.cpu_count() or 1))
+    workers = max(1, min(workers, len(cores)))
+    return [part.tolist() for part in np.array_split(np.asarray(cores), workers)]
+
+
+# -------------------------
+class EmbeddingPool:
+    """
+    Shards a list of texts across worker processes and reassembles the
+    vectors in input order into one contiguous float32 array.
+    """
+
+    def __init__(self, workers: int = POOL_WORKERS, shard_size: int = POOL_SHARD_SIZE):
+        self.core_sets = split_cores(workers)
+        self.workers = len(self.core_sets)
+        self.shard_size = max(1, shard_size)
+        # spawn: the API process runs model threads, which fork does not copy safely
+        context = multiprocessing.get_context("spawn")
+        queue = context.Queue()
+        for cores in self.core_sets:
+            queue.put(cores)
+        self.executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(queue,),
+        )
+        self.totals = {"texts": 0, "shards": 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def warmup(self):
+        """Start every worker and load its model before the first real call."""
+        futures = [self.executor.submit(_encode_shard, ["warmup"]) for _ in range(self.workers)]
+        for future in futures:
+            future.result()
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        started = time.perf_counter()
+        texts = list(texts)
+        starts = range(0, len(texts), self.shard_size)
+        futures = [
+            self.executor.submit(_encode_shard, texts[start : start + self.shard_size])
+            for start in starts
+        ]
+        result = None
+        for start, future in zip(starts, futures):
+            block = future.result()
+            if result is None:
+                result = np.empty((len(texts), block.shape[1]), dtype=np.float32)
+            result[start : start + len(block)] = block
+        with self._lock:
+            self.totals["texts"] += len(texts)
+            self.totals["shards"] += len(futures)
+            self.totals["seconds"] += time.perf_counter() - started
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            totals = dict(self.totals)
+        seconds = totals["seconds"]
+        totals["seconds"] = round(seconds, 3)
+        totals["texts_per_sec"] = round(totals["texts"] / seconds, 1) if seconds else 0.0
+        return {"enabled": True, "workers": self.workers, "cores": self.core_sets, **totals}
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> EmbeddingPool:
+    """The shared pool, started on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = EmbeddingPool()
+            atexit.register(_pool.close)
+        return _pool
+
+
+def use_pool(count: int) -> bool:
+    return POOL_WORKERS > 0 and count >= POOL_MIN_TEXTS
+
+
+def embedding_pool_stats() -> Dict:
+    if _pool is None:
+        return {"enabled": POOL_WORKERS > 0, "workers": POOL_WORKERS, "started": False}
+    return _pool.stats()
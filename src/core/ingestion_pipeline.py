@@ -0,0 +1,442 @@
+# src/core/ingestion_pipeline.py
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, List
+from dotenv import load_dotenv
+from src.core.embedding_generator import embed_chunks, pool_chunk_embeddings
+from src.core.job_manager import Job, JobCancelled
+from src.core.text_chunker import Chunker, get_chunker
+from src.database.ingest_manifest import IngestManifest, hash_text
+from src.database.vector_store import delete_vectors, flush, index_target, upsert_vectors
+from src.utils.file_loader import ParallelLoader, iter_file
+
+load_dotenv()
+
+# -------------------------
+# Workers per stage and queue depth between stages. A full queue blocks the
+# stage in front of it, so a slow stage throttles the ones feeding it.
+PARSE_WORKERS = int(os.getenv("INGEST_PARSE_WORKERS", "2"))
+CHUNK_WORKERS = int(os.getenv("INGEST_CHUNK_WORKERS", "1"))
+EMBED_WORKERS = int(os.getenv("INGEST_EMBED_WORKERS", "1"))
+UPSERT_WORKERS = int(os.getenv("INGEST_UPSERT_WORKERS", "2"))
+QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "4"))
+
+# "pooled": chunk vectors are length-weighted means of the sentence vectors
+# the chunker already computed (one model pass per document); chunkers
+# without sentence vectors (CHUNKER_STRATEGY=fixed) always encode.
+# "encode": re-encode every chunk text exactly (two model passes).
+CHUNK_EMBEDDINGS = os.getenv("INGEST_CHUNK_EMBEDDINGS", "pooled").lower()
+
+# Streaming: files are read page by page and chunked with a sliding window;
+# every STREAM_BATCH chunks go downstream as a "part" of the document, so
+# embedding and upserts start before a large file has been fully parsed.
+STREAMING = os.getenv("INGEST_STREAMING", "0") == "1"
+STREAM_BATCH = int(os.getenv("INGEST_STREAM_BATCH", "64"))
+
+_DONE = object()
+
+
+# -------------------------
+class StageStats:
+    """Thread-safe counters for one pipeline stage."""
+
+    def __init__(self, name: str, workers: int):
+        self.name = name
+        self.workers = workers
+        self.docs = 0
+        self.chunks = 0
+        self.errors = 0
+        self.busy_seconds = 0.0
+        self.first_start = None
+        self.last_end = None
+        self._lock = threading.Lock()
+
+    def record(self, started: float, ended: float, chunks: int, failed: bool):
+        with self._lock:
+            self.docs += 1
+            self.chunks += chunks
+            self.errors += int(failed)
+            self.busy_seconds += ended - started
+            if self.first_start is None or started < self.first_start:
+                self.first_start = started
+            if self.last_end is None or ended > self.last_end:
+                self.last_end = ended
+
+    def as_dict(self) -> Dict:
+        active = 0.0
+        if self.first_start is not None:
+            active = max(self.last_end - self.first_start, 1e-9)
+        return {
+            "workers": self.workers,
+            "docs": self.docs,
+            "chunks": self.chunks,
+            "errors": self.errors,
+            "busy_seconds": round(self.busy_seconds, 3),
+            "active_seconds": round(active, 3),
+            "docs_per_sec": round(self.docs / active, 2) if active else 0.0,
+            "chunks_per_sec": round(self.chunks / active, 2) if active else 0.0,
+            # Close to 1.0 means every worker of this stage was always busy
+            "utilization": (
+                round(self.busy_seconds / (self.workers * active), 3) if active else 0.0
+            ),
+        }
+
+
+# -------------------------
+def vector_id(fname: str, chunk_index: int) -> str:
+    return f"{fname}_{chunk_index}"
+
+
+def build_vectors(doc: Dict) -> List[Dict]:
+    """Turn the changed chunks of an embedded document into Pinecone vectors."""
+    fname = doc["file"]
+    changed = [doc["chunks"][i] for i in doc["changed"]]
+    return [
+        {
+            "id": vector_id(fname, chunk["chunk_index"]),
+            "embedding": embedding["embedding"],
+            "metadata": {
+                "chunk_text": chunk["chunk_text"],
+                "chunk_index": chunk["chunk_index"],
+                "file_name": fname,
+            },
+        }
+        for chunk, embedding in zip(changed, doc["embeddings"])
+    ]
+
+
+class IngestionPipeline:
+    """
+    parse -> chunk -> embed -> upsert, each stage running its own worker
+    threads and connected by bounded queues, so file parsing, model inference
+    and Pinecone I/O for different documents overlap.
+
+    The ingest manifest makes runs incremental: unchanged files never enter
+    the pipeline, only new or edited chunks are embedded and upserted, and
+    vectors of removed files or dropped chunks are deleted.
+
+    A document travels as one or more parts ({"part": n, "final": bool});
+    without streaming every document is a single final part.
+
+    Progress goes to `job` (per-file status, chunks embedded, vectors
+    upserted). Cancelling the job stops feeding new files, lets in-flight
+    parts drain without work, and leaves unfinished files out of the
+    manifest so the next run picks them up again.
+    """
+
+    def __init__(
+        self,
+        parse_workers: int = PARSE_WORKERS,
+        chunk_workers: int = CHUNK_WORKERS,
+        embed_workers: int = EMBED_WORKERS,
+        upsert_workers: int = UPSERT_WORKERS,
+        queue_size: int = QUEUE_SIZE,
+        manifest: IngestManifest = None,
+        chunk_embeddings: str = CHUNK_EMBEDDINGS,
+        streaming: bool = STREAMING,
+        stream_batch: int = STREAM_BATCH,
+        job: Job = None,
+        chunker: Chunker = None,
+    ):
+        if chunk_embeddings not in ("pooled", "encode"):
+            raise ValueError(f"Unknown chunk embedding mode: {chunk_embeddings}")
+        self.queue_size = max(1, queue_size)
+        self.chunk_embeddings = chunk_embeddings
+        self.chunker = chunker or get_chunker()
+        # Strategies that never embed sentences have nothing to pool
+        self.pooled = chunk_embeddings == "pooled" and self.chunker.sentence_vectors
+        self.streaming = streaming
+        self.stream_batch = max(1, stream_batch)
+        # A private Job when nobody tracks this run keeps the hooks unconditional
+        self.job = job or Job("ingest")
+        self.manifest = manifest or IngestManifest(target=index_target())
+        self.force = False
+        self.loader = None
+        self._emit = None  # put() of the embed queue, for streamed parts
+        self._files: Dict[str, Dict] = {}  # per-file progress across parts
+        self._files_lock = threading.Lock()
+        self.stages: List[tuple] = [
+            ("parse", self.parse, max(1, parse_workers)),
+            ("chunk", self.chunk, max(1, chunk_workers)),
+            ("embed", self.embed, max(1, embed_workers)),
+            ("upsert", self.upsert, max(1, upsert_workers)),
+        ]
+
+    # ---- stage functions: each one fills in part of the document dict ----
+    # ---- and returns how many chunks it handled, for the stage stats   ----
+    def parse(self, doc: Dict) -> int:
+        if self.streaming:
+            return 0  # pages are read lazily by the chunk stage
+        # Extraction itself runs in the loader's process pool (page ranges
+        # of big PDFs in parallel); this thread only waits for the result
+        loaded = self.loader.load(doc["path"])
+        if "error" in loaded:
+            raise RuntimeError(loaded["error"])
+        doc["text"] = loaded["text"]
+        doc["failed_pages"] = loaded["failed_pages"]
+        return 0
+
+    def chunk(self, doc: Dict) -> int:
+        if not self.streaming:
+            chunks = self.chunker.chunk(doc.pop("text"), with_embeddings=self.pooled)
+            self._set_chunks(doc, chunks)
+            doc.update(part=0, final=True)
+            return len(doc["chunks"])
+
+        stream = self.chunker.chunk_stream(iter_file(doc["path"]), with_embeddings=self.pooled)
+        batch, part, total = [], 0, 0
+        for chunk in stream:
+            self.job.check_cancelled()
+            batch.append(chunk)
+            total += 1
+            if len(batch) >= self.stream_batch:
+                piece = {k: doc[k] for k in ("order", "path", "file", "fingerprint")}
+                self._set_chunks(piece, batch)
+                piece.update(part=part, final=False)
+                self._emit(piece)
+                batch, part = [], part + 1
+        # The document itself carries the last (possibly empty) batch
+        self._set_chunks(doc, batch)
+        doc.update(part=part, final=True)
+        return total
+
+    def _set_chunks(self, doc: Dict, chunks: List[Dict]):
+        for chunk in chunks:
+            chunk["sha256"] = hash_text(chunk["chunk_text"])
+        doc["chunks"] = chunks
+        if self.force:
+            doc["changed"] = list(range(len(chunks)))
+        else:
+            doc["changed"] = self.manifest.changed_chunks(doc["file"], chunks)
+
+    def embed(self, doc: Dict) -> int:
+        changed = [doc["chunks"][i] for i in doc["changed"]]
+        if not changed:
+            doc["embeddings"] = []
+        elif self.pooled:
+            doc["embeddings"] = pool_chunk_embeddings(changed)
+        else:
+            doc["embeddings"] = embed_chunks([c["chunk_text"] for c in changed])
+        self.job.add("chunks_embedded", len(changed))
+        self.job.update_file(doc["file"], embedded=len(changed))
+        # Sentence vectors are not needed past this point
+        for chunk in doc["chunks"]:
+            chunk.pop("sentence_embeddings", None)
+            chunk.pop("sentence_lengths", None)
+        return len(changed)
+
+    def upsert(self, doc: Dict) -> int:
+        vectors = build_vectors(doc)
+        if vectors:
+            upsert_vectors(vectors)
+            self.job.add("vectors_upserted", len(vectors))
+        doc.pop("embeddings")
+
+        produced = [
+            (
+                c["chunk_index"],
+                {"id": vector_id(doc["file"], c["chunk_index"]), "sha256": c["sha256"]},
+            )
+            for c in doc["chunks"]
+        ]
+        # Keep only counts so finished parts do not hold on to chunk text
+        doc["embedded"] = len(doc.pop("changed"))
+        doc["chunk_count"] = len(doc.pop("chunks"))
+        doc["deleted"] = self._finish_part(doc, produced)
+        return len(vectors)
+
+    def _finish_part(self, doc: Dict, produced: List[tuple]) -> int:
+        """
+        Parts of one file can be upserted out of order by different workers.
+        The manifest entry is written (and stale vectors deleted) only once
+        every part of the file is done. Returns the number of deleted vectors.
+        """
+        with self._files_lock:
+            state = self._files.setdefault(
+                doc["file"], {"produced": [], "done": 0, "total": None}
+            )
+            state["produced"].extend(produced)
+            state["done"] += 1
+            if doc["final"]:
+                state["total"] = doc["part"] + 1
+            if state["done"] != state["total"]:
+                return 0
+            del self._files[doc["file"]]
+
+        produced = [entry for _, entry in sorted(state["produced"], key=lambda p: p[0])]
+        stale = self.manifest.record_file(doc["file"], doc["fingerprint"], produced)
+        if stale:
+            delete_vectors(stale)
+        self.job.update_file(doc["file"], status="done", chunks=len(produced))
+        return len(stale)
+
+    # -------------------------
+    def _work(
+        self,
+        fn: Callable[[Dict], int],
+        stats: StageStats,
+        inbox: queue.Queue,
+        outbox: Callable[[Dict], None],
+    ):
+        while True:
+            doc = inbox.get()
+            if doc is _DONE:
+                return
+            # Failed documents skip the remaining stages but still flow
+            # through so the report lists them in order.
+            if "error" not in doc and self.job.cancelled:
+                doc["error"] = "cancelled"
+                self.job.update_file(doc["file"], status="cancelled")
+            if "error" not in doc:
+                self.job.update_file(doc["file"], status=stats.name)
+                started = time.perf_counter()
+                handled = 0
+                try:
+                    handled = fn(doc)
+                except JobCancelled:
+                    doc["error"] = "cancelled"
+                    self.job.update_file(doc["file"], status="cancelled")
+                except Exception as e:
+                    doc["error"] = f"{stats.name}: {e}"
+                    self.job.update_file(doc["file"], status="failed", error=doc["error"])
+                stats.record(started, time.perf_counter(), handled, "error" in doc)
+            outbox(doc)
+
+    def run(self, paths: List[str], force: bool = False) -> Dict:
+        """
+        Ingest `paths`. With force=True every file is re-embedded even if the
+        manifest says it is unchanged. Files in the manifest that are not in
+        `paths` are treated as removed and their vectors are deleted.
+        """
+        started = time.perf_counter()
+        self.force = force
+        self.job.set_total(len(paths))
+        stats = [StageStats(name, workers) for name, _, workers in self.stages]
+        inboxes = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        finished: List[Dict] = []
+        # Worker processes start on first use, so a run with nothing to parse
+        # never spawns any
+        self.loader = ParallelLoader()
+        self._emit = inboxes[2].put
+        self._files = {}
+
+        threads = []
+        for i, (name, fn, workers) in enumerate(self.stages):
+            outbox = inboxes[i + 1].put if i + 1 < len(inboxes) else finished.append
+            stage_threads = [
+                threading.Thread(
+                    target=self._work,
+                    args=(fn, stats[i], inboxes[i], outbox),
+                    name=f"ingest-{name}-{w}",
+                    daemon=True,
+                )
+                for w in range(workers)
+            ]
+            for t in stage_threads:
+                t.start()
+            threads.append(stage_threads)
+
+        removed = []
+        try:
+            # put() blocks while the parse queue is full (backpressure)
+            for order, path in enumerate(paths):
+                if self.job.cancelled:
+                    break
+                doc = {"order": order, "path": path, "file": os.path.basename(path)}
+                try:
+                    unchanged, doc["fingerprint"] = self.manifest.check(path)
+                except OSError as e:
+                    doc["error"] = f"check: {e}"
+                    self.job.update_file(doc["file"], status="failed", error=doc["error"])
+                    finished.append(doc)
+                    continue
+                if unchanged and not force:
+                    doc["unchanged"] = True
+                    doc["chunk_count"] = self.manifest.chunk_count(doc["file"])
+                    self.job.update_file(
+                        doc["file"], status="unchanged", chunks=doc["chunk_count"]
+                    )
+                    finished.append(doc)
+                    continue
+                self.job.update_file(doc["file"], status="queued")
+                inboxes[0].put(doc)
+
+            # Shut stages down front to back: a stage only gets its stop
+            # signals once every worker upstream has exited and flushed.
+            for i, stage_threads in enumerate(threads):
+                for _ in stage_threads:
+                    inboxes[i].put(_DONE)
+                for t in stage_threads:
+                    t.join()
+
+            # A cancelled run did not look at every file: do not prune
+            if not self.job.cancelled:
+                removed = self.manifest.remove_missing(
+                    [os.path.basename(p) for p in paths]
+                )
+                if removed:
+                    delete_vectors(removed)
+        finally:
+            self.loader.close()
+            self.manifest.save()
+            flush()
+
+        # Fold parts back into one entry per file, in input order
+        finished.sort(key=lambda d: (d["order"], d.get("part", 0)))
+        entries: Dict[int, Dict] = {}
+        for doc in finished:
+            entry = entries.setdefault(doc["order"], {"file": doc["file"], "chunks": 0})
+            entry["chunks"] += doc.get("chunk_count", len(doc.get("chunks", [])))
+            if doc.get("failed_pages"):
+                entry["failed_pages"] = doc["failed_pages"]
+            if doc.get("unchanged"):
+                entry["unchanged"] = True
+            elif "error" in doc:
+                entry["error"] = doc["error"]
+            else:
+                entry["embedded"] = entry.get("embedded", 0) + doc["embedded"]
+                entry["deleted"] = entry.get("deleted", 0) + doc["deleted"]
+        ingested = list(entries.values())
+        # Any failed file makes the run partial (or failed, if nothing else
+        # got through); the job takes this as its final status
+        failed = sum(1 for entry in ingested if "error" in entry)
+        if not failed:
+            status = "completed"
+        elif failed == len(ingested):
+            status = "failed"
+        else:
+            status = "partial"
+
+        stage_report = {s.name: s.as_dict() for s in stats}
+        elapsed = time.perf_counter() - started
+        return {
+            "status": status,
+            "files_failed": failed,
+            "ingested": ingested,
+            "cancelled": self.job.cancelled,
+            "stats": {
+                "elapsed_seconds": round(elapsed, 3),
+                "docs_per_sec": round(len(paths) / elapsed, 2) if elapsed else 0.0,
+                "files_unchanged": sum(1 for d in finished if d.get("unchanged")),
+                "chunks_embedded": stats[2].chunks,
+                "vectors_deleted": len(removed)
+                + sum(d.get("deleted", 0) for d in finished),
+                "stages": stage_report,
+                "bottleneck": max(
+                    stage_report, key=lambda n: stage_report[n]["utilization"]
+                ),
+            },
+        }
+
+
+# python -m src.core.ingestion_pipeline
+# Quick Test
+
+# if __name__ == "__main__":
+#     import json
+#     DATA_FOLDER = "src/data/"
+#     paths = [os.path.join(DATA_FOLDER, f) for f in os.listdir(DATA_FOLDER)]
+#     report = IngestionPipeline().run(paths)
+#     print(json.dumps(report, indent=2))
@@ -0,0 +1,215 @@
+# src/core/job_manager.py
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Background jobs (ingestion, graph building) that may run at the same time.
+# Extra submissions wait in the queue instead of competing for CPU with the
+# chat endpoints.
+JOBS_MAX_CONCURRENT = int(os.getenv("JOBS_MAX_CONCURRENT", "1"))
+# Scheduling niceness for job threads (Linux only; threads they start inherit it)
+JOBS_NICE = int(os.getenv("JOBS_NICE", "10"))
+# Finished jobs kept for GET /jobs; older ones are dropped
+JOBS_KEEP_FINISHED = int(os.getenv("JOBS_KEEP_FINISHED", "100"))
+
+FINAL_FILE_STATES = ("done", "unchanged", "failed", "cancelled")
+
+
+class JobCancelled(Exception):
+    pass
+
+
+# -------------------------
+class Job:
+    """
+    Progress of one background job. Workers report through update_file /
+    add and poll `cancelled`; the API reads snapshots through as_dict.
+    """
+
+    def __init__(self, kind: str, params: Dict = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params or {}
+        self.status = "queued"
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.files_total = 0
+        self.files_done = 0
+        self.counters = {"chunks_embedded": 0, "vectors_upserted": 0}
+        self.files: Dict[str, Dict] = {}
+        self.result = None
+        self.error = None
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+        with self._lock:
+            if self.status in ("queued", "running"):
+                self.status = "cancelling"
+
+    def check_cancelled(self):
+        if self.cancelled:
+            raise JobCancelled()
+
+    def set_total(self, files: int):
+        with self._lock:
+            self.files_total = files
+
+    def update_file(self, fname: str, **fields):
+        """Set per-file fields; integer fields add up across calls (parts)."""
+        with self._lock:
+            entry = self.files.setdefault(fname, {})
+            was_final = entry.get("status") in FINAL_FILE_STATES
+            if was_final:
+                fields.pop("status", None)  # a finished file stays finished
+            for key, value in fields.items():
+                if isinstance(value, int) and key in entry and key != "status":
+                    entry[key] += value
+                else:
+                    entry[key] = value
+            if not was_final and entry.get("status") in FINAL_FILE_STATES:
+                self.files_done += 1
+
+    def add(self, counter: str, amount: int):
+        with self._lock:
+            self.counters[counter] = self.counters.get(counter, 0) + amount
+
+    def as_dict(self, with_files: bool = True) -> Dict:
+        with self._lock:
+            end = self.finished_at or time.time()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            eta = None
+            if self.status == "running" and 0 < self.files_done < self.files_total:
+                eta = elapsed / self.files_done * (self.files_total - self.files_done)
+            data = {
+                "job_id": self.id,
+                "kind": self.kind,
+                "status": self.status,
+                "params": self.params,
+                "created_at": self.created_at,
+                "elapsed_seconds": round(elapsed, 2),
+                "eta_seconds": round(eta, 1) if eta is not None else None,
+                "progress": {
+                    "files_total": self.files_total,
+                    "files_done": self.files_done,
+                    **self.counters,
+                },
+                "error": self.error,
+                "result": self.result,
+            }
+            if with_files:
+                data["files"] = {k: dict(v) for k, v in self.files.items()}
+            return data
+
+
+# -------------------------
+def _lower_thread_priority():
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), JOBS_NICE)
+    except (AttributeError, OSError):
+        pass  # not supported on this platform / not permitted
+
+
+class JobManager:
+    def __init__(
+        self, max_concurrent: int = JOBS_MAX_CONCURRENT, keep_finished: int = JOBS_KEEP_FINISHED
+    ):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, max_concurrent),
+            thread_name_prefix="job",
+            initializer=_lower_thread_priority,
+        )
+        self.keep_finished = keep_finished
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._kind_locks: Dict[str, threading.Lock] = {}
+
+    def submit(
+        self, kind: str, fn: Callable[[Job], Dict], serial: bool = False, **params
+    ) -> Job:
+        """
+        Queue fn(job) for background execution; its return value is the
+        result. With serial=True, jobs of this kind run one at a time even
+        when JOBS_MAX_CONCURRENT allows more (e.g. ingestion, which owns the
+        ingest manifest and the BM25 index files); the next one stays
+        "queued" until the previous finishes.
+        """
+        job = Job(kind, params)
+        with self._lock:
+            self.jobs[job.id] = job
+            kind_lock = self._kind_locks.setdefault(kind, threading.Lock()) if serial else None
+        self.executor.submit(self._run, job, fn, kind_lock)
+        return job
+
+    def _run(self, job: Job, fn: Callable[[Job], Dict], kind_lock: threading.Lock = None):
+        acquired = False
+        if kind_lock is not None:
+            # Wait for the running job of this kind; a cancel ends the wait
+            while not acquired and not job.cancelled:
+                acquired = kind_lock.acquire(timeout=0.5)
+        try:
+            self._run_job(job, fn)
+        finally:
+            if acquired:
+                kind_lock.release()
+            self._prune()
+
+    def _run_job(self, job: Job, fn: Callable[[Job], Dict]):
+        if job.cancelled:
+            job.status, job.finished_at = "cancelled", time.time()
+            return
+        job.status, job.started_at = "running", time.time()
+        try:
+            job.result = fn(job)
+            if job.cancelled:
+                job.status = "cancelled"
+            elif isinstance(job.result, dict) and "status" in job.result:
+                # e.g. ingestion: "partial" / "failed" when files failed
+                job.status = job.result["status"]
+                if job.status != "completed":
+                    job.error = f"{job.result.get('files_failed', 0)} file(s) failed"
+            else:
+                job.status = "completed"
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status, job.error = "failed", str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def _prune(self):
+        """Drop the oldest finished jobs beyond keep_finished."""
+        with self._lock:
+            finished = [job for job in self.jobs.values() if job.finished_at is not None]
+            finished.sort(key=lambda job: job.finished_at)
+            for job in finished[: max(0, len(finished) - self.keep_finished)]:
+                del self.jobs[job.id]
+
+    def get(self, job_id: str) -> Job:
+        return self.jobs.get(job_id)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            jobs = list(self.jobs.values())
+        return [job.as_dict(with_files=False) for job in jobs]
+
+    def cancel(self, job_id: str) -> Job:
+        job = self.jobs.get(job_id)
+        if job:
+            job.cancel()
+        return job
+
+
+job_manager = JobManager()
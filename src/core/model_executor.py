@@ -0,0 +1,101 @@
+# src/core/model_executor.py
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Threads that run model inference (and other blocking retrieval work) for
+# async callers. Kept small and separate from FastAPI's threadpool: models
+# already use several cores per call, and a burst of searches must not take
+# the threads that sync endpoints and agents need.
+MODEL_EXECUTOR_WORKERS = int(os.getenv("MODEL_EXECUTOR_WORKERS", "2"))
+
+
+# -------------------------
+class ModelExecutor:
+    """
+    A bounded thread pool for blocking calls made from coroutines. run()
+    awaits the call without blocking the event loop; stats() shows how long
+    calls waited for a free worker.
+    """
+
+    def __init__(self, workers: int = MODEL_EXECUTOR_WORKERS):
+        self.workers = max(1, workers)
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="model")
+        self.submitted = self.running = 0
+        self.wait_seconds = self.run_seconds = self.max_wait = 0.0
+        self._lock = threading.Lock()
+
+    def _call(self, queued: float, fn: Callable):
+        started = time.perf_counter()
+        with self._lock:
+            self.running += 1
+            self.wait_seconds += started - queued
+            self.max_wait = max(self.max_wait, started - queued)
+        try:
+            return fn()
+        finally:
+            with self._lock:
+                self.running -= 1
+                self.run_seconds += time.perf_counter() - started
+
+    async def run(self, fn: Callable, *args, **kwargs):
+        with self._lock:
+            self.submitted += 1
+        loop = asyncio.get_running_loop()
+        call = partial(self._call, time.perf_counter(), partial(fn, *args, **kwargs))
+        return await loop.run_in_executor(self.executor, call)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            done = max(self.submitted - self.running, 1)
+            return {
+                "workers": self.workers,
+                "submitted": self.submitted,
+                "running": self.running,
+                "mean_wait_ms": round(self.wait_seconds / done * 1000, 2),
+                "max_wait_ms": round(self.max_wait * 1000, 2),
+                "run_seconds": round(self.run_seconds, 3),
+            }
+
+
+model_executor = ModelExecutor()
+
+
+async def run_model(fn: Callable, *args, **kwargs):
+    """Await a blocking call (inference, local index scan) on the model executor."""
+    return await model_executor.run(fn, *args, **kwargs)
+
+
+def model_executor_stats() -> Dict:
+    return model_executor.stats()
+
+
+# -------------------------
+# Sync callers (tool functions, scripts) reach the async retrieval path
+# through one long-lived loop thread, so per-loop clients such as
+# Pinecone's aiohttp session are reused instead of rebuilt per call.
+_bridge_loop = None
+_bridge_lock = threading.Lock()
+
+
+def _get_bridge_loop() -> asyncio.AbstractEventLoop:
+    global _bridge_loop
+    with _bridge_lock:
+        if _bridge_loop is None:
+            _bridge_loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_bridge_loop.run_forever, name="retrieval-loop", daemon=True
+            ).start()
+        return _bridge_loop
+
+
+def run_sync(coro):
+    """Run a coroutine to completion from sync code (not from a running loop)."""
+    return asyncio.run_coroutine_threadsafe(coro, _get_bridge_loop()).result()
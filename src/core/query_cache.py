@@ -0,0 +1,197 @@
+# src/core/query_cache.py
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Entries per cache (0 disables) and seconds an entry stays valid
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL = float(os.getenv("QUERY_CACHE_TTL", "300"))
+# Cross-encoder scores are small and reused across top_k / candidate_k
+# variations of a query, so many more of them are kept
+RERANK_CACHE_SIZE = int(os.getenv("RERANK_CACHE_SIZE", "16384"))
+# Processes sharing one index (the API and the MCP servers) see each
+# other's writes through this file: every invalidation writes a new token
+# to it, and a process that reads a token it has not seen clears its own
+# result caches. Checked at most every INDEX_GENERATION_CHECK seconds.
+INDEX_GENERATION_PATH = os.getenv("INDEX_GENERATION_PATH", ".cache/index_generation")
+INDEX_GENERATION_CHECK = float(os.getenv("INDEX_GENERATION_CHECK", "1"))
+
+_MISSING = object()
+
+
+def normalize_query(text: str) -> str:
+    """Case, surrounding punctuation and whitespace do not change the key."""
+    return " ".join(text.casefold().split()).strip(" ?!.,;:")
+
+
+# -------------------------
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+
+    Each entry remembers how long it took to compute, so every hit adds that
+    time to `saved_seconds`. clear() bumps `generation`; a put() made with an
+    older generation (computed before the clear) is dropped, so a result
+    that raced with an invalidation is never stored.
+    """
+
+    def __init__(self, name: str, max_entries: int = QUERY_CACHE_SIZE, ttl: float = QUERY_CACHE_TTL):
+        self.name = name
+        self.max_entries = max(0, max_entries)
+        self.ttl = ttl
+        self.entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires, cost)
+        self.generation = 0
+        self.hits = self.misses = self.expired = self.evictions = self.invalidations = 0
+        self.saved_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default=None):
+        with self._lock:
+            entry = self.entries.get(key, _MISSING)
+            if entry is not _MISSING and entry[1] < time.monotonic():
+                del self.entries[key]
+                self.expired += 1
+                entry = _MISSING
+            if entry is _MISSING:
+                self.misses += 1
+                return default
+            self.entries.move_to_end(key)
+            self.hits += 1
+            self.saved_seconds += entry[2]
+        # Callers may modify what they get back
+        return copy.deepcopy(entry[0])
+
+    def put(self, key: Hashable, value, cost_seconds: float = 0.0, generation: int = None):
+        if self.max_entries == 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self.entries[key] = (copy.deepcopy(value), time.monotonic() + self.ttl, cost_seconds)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.generation += 1
+            self.invalidations += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "saved_ms": round(self.saved_seconds * 1000, 1),
+            }
+
+
+# Query text -> vector: depends only on the model, so it survives ingestion
+query_embeddings = TTLCache("query_embeddings")
+# (query text, top_k) -> reranked hits: depends on the index content
+query_results = TTLCache("query_results")
+# (query text, chunk id) -> rerank score: an upsert may change the text
+# behind an id, so these are cleared with the results
+rerank_scores = TTLCache("rerank_scores", RERANK_CACHE_SIZE)
+
+
+# -------------------------
+class SharedGeneration:
+    """
+    A token in a file, replaced on every index write by any process.
+    changed() is cheap: one stat per `interval`, and the file is read only
+    when its mtime moved.
+    """
+
+    def __init__(self, path: str = INDEX_GENERATION_PATH, interval: float = INDEX_GENERATION_CHECK):
+        self.path = path
+        self.interval = interval
+        self.seen = self._read()
+        self.seen_mtime = None
+        self.next_check = 0.0
+        self._lock = threading.Lock()
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def bump(self):
+        token = f"{time.time_ns()}-{os.getpid()}"
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(token)
+        os.replace(tmp, self.path)
+        with self._lock:
+            self.seen = token
+
+    def changed(self) -> bool:
+        """True once for every token written (by another process) since the last call."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.next_check:
+                return False
+            self.next_check = now + self.interval
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                return False
+            if mtime == self.seen_mtime:
+                return False
+            self.seen_mtime = mtime
+            token = self._read()
+            if token is None or token == self.seen:
+                return False
+            self.seen = token
+            return True
+
+
+index_generation = SharedGeneration()
+
+
+def invalidate_results():
+    """
+    Called whenever vectors are written to or deleted from the index: clears
+    this process's result caches and tells the other processes to.
+    """
+    query_results.clear()
+    rerank_scores.clear()
+    try:
+        index_generation.bump()
+    except OSError:
+        pass  # read-only disk: other processes fall back to QUERY_CACHE_TTL
+
+
+def sync_index_generation():
+    """Clear the result caches if another process wrote to the index."""
+    if index_generation.changed():
+        query_results.clear()
+        rerank_scores.clear()
+
+
+def query_cache_stats() -> Dict:
+    return {
+        "embeddings": query_embeddings.stats(),
+        "results": query_results.stats(),
+        "rerank_scores": rerank_scores.stats(),
+    }
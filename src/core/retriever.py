@@ -1,39 +1,541 @@
 # src/core/retriever.py
-from sentence_transformers import CrossEncoder
-from src.core.embedding_generator import embed_text
-from src.database.pineconedb import query_vector
+import asyncio
+import copy
+import os
+import threading
+import time
+from typing import Dict, List, Tuple
+import numpy as np
+from dotenv import load_dotenv
+from src.core.batching import run_batched
+from src.core.context_packing import MMR_ENABLED, MMR_POOL, diversify
+from src.core.embedding_batcher import aembed_query
+from src.core.embedding_generator import encode
+from src.core.model_executor import run_model, run_sync
+from src.core.query_cache import (
+    normalize_query,
+    query_embeddings,
+    query_results,
+    rerank_scores,
+    sync_index_generation,
+)
+from src.database.bm25_index import tokenize
+from src.database.vector_store import (
+    afetch_vectors,
+    aquery_vector,
+    attach_chunk_texts,
+    lexical_search,
+)
+from src.utils.lazy import Lazy
 
-reranker = CrossEncoder("cross-encoder/ms-marco-MiniLM-L6-v2")
+load_dotenv()
 
+RERANKER_NAME = "cross-encoder/ms-marco-MiniLM-L6-v2"
 
-def retrieve_and_rerank(query: str, top_k: int = 5):
+# Dense and BM25 candidates are merged by reciprocal-rank fusion before the
+# cross-encoder, so exact terms (clause numbers, names) the embedding misses
+# still reach the reranker
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "1") != "0"
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Candidates fetched from each side (dense, BM25) and reranked; only top_k
+# of them are returned, so the cross-encoder can promote hits from deeper
+# in the ANN ranking. Up to twice this many pairs per query go through the
+# cross-encoder with hybrid search on: raise it (or set a budget) knowing
+# the rerank time grows with it
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+# Cross-encoder time per request in ms (0 = no cap). Uncached candidates
+# are scored best-first in waves of RERANK_WAVE; once the cap is spent the
+# rest stay unscored, ranked below the scored ones in retrieval order.
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "0"))
+RERANK_WAVE = int(os.getenv("RERANK_WAVE", "16"))
+
+# Cascade: a query whose retrieval order is already convincing skips the
+# cross-encoder. Confidence is the lower of two cheap signals: the first
+# hit's dense-score lead over every other candidate (full at
+# RERANK_CASCADE_MARGIN) and the share of the query's terms its text
+# contains. At or above RERANK_CASCADE_THRESHOLD the retrieval order is
+# returned as is. Off by default until the threshold is tuned on the real
+# models (src/benchmarks/rerank_cascade.py); rerank="auto" requests then
+# always rerank.
+RERANK_CASCADE = os.getenv("RERANK_CASCADE", "0") != "0"
+RERANK_CASCADE_THRESHOLD = float(os.getenv("RERANK_CASCADE_THRESHOLD", "0.6"))
+RERANK_CASCADE_MARGIN = float(os.getenv("RERANK_CASCADE_MARGIN", "0.1"))
+# Per-request rerank modes: "auto" (cascade), "always" (cross-encoder on
+# every query) and "never" (retrieval order, e.g. for "is it in the
+# database?" checks)
+RERANK_MODES = ("auto", "always", "never")
+
+_rerank_counters = {
+    "requests": 0,
+    "pairs_scored": 0,
+    "pairs_cached": 0,
+    "pairs_skipped": 0,
+    "budget_exceeded": 0,
+    "cascaded": 0,
+    "seconds": 0.0,
+}
+_rerank_lock = threading.Lock()
+
+
+def _create_reranker():
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(RERANKER_NAME)
+
+
+reranker = Lazy(
+    "reranker", _create_reranker, warmup=lambda model: model.predict([("warmup", "warmup")])
+)
+
+
+def get_reranker():
+    return reranker.get()
+
+
+def rerank_pairs(pairs):
+    """Cross-encoder scores of (query, text) pairs, batched by token length."""
+    if not pairs:
+        return []
+    model = get_reranker()
+    encoded = model.tokenizer(
+        [query for query, _ in pairs], [text for _, text in pairs], truncation=True
+    )
+    lengths = [len(ids) for ids in encoded["input_ids"]]
+    return run_batched(pairs, lengths, lambda batch: model.predict(batch, batch_size=len(batch)))
+
+
+def hit_text(hit: Dict) -> str:
+    return hit.get("metadata", {}).get("chunk_text") or hit.get("text", "")
+
+
+def cascade_confidence(query: str, hits: List[Dict]) -> float:
     """
-    Semantic search + Cross-encoder rerank.
-    Returns: list of hits with both semantic_score and rerank_score
+    How far the retrieval order can be trusted without the cross-encoder,
+    in [0, 1]: the lower of the first hit's semantic_score lead over the
+    other candidates (scaled by RERANK_CASCADE_MARGIN) and the share of the
+    query's terms found in its text. Hits need their chunk text attached.
     """
-    query_emb = embed_text(query)
-    semantic_hits = query_vector(query_emb, top_k=top_k)
+    if len(hits) < 2:
+        return 1.0
+    lead = hits[0]["semantic_score"] - max(hit["semantic_score"] for hit in hits[1:])
+    confidence = min(max(lead / RERANK_CASCADE_MARGIN, 0.0), 1.0)
+    terms = set(tokenize(query))
+    if terms:
+        overlap = len(terms.intersection(tokenize(hit_text(hits[0])))) / len(terms)
+        confidence = min(confidence, overlap)
+    return confidence
+
+
+def rerank_many(
+    requests: List[Tuple[str, List[Dict]]],
+    min_scored: int,
+    generation: int,
+    budget_ms: float = None,
+):
+    """
+    Set rerank_score on the hits of every (query, hits) request, reusing
+    cached (query, chunk id) scores; the uncached pairs of all requests go
+    to the cross-encoder together. Hits are taken best retrieval rank
+    first. With a budget (budget_ms per request, default RERANK_BUDGET_MS),
+    at least min_scored uncached hits of each request are scored and the
+    rest only while the budget lasts. Returns each request's counts:
+    scored, cached, skipped.
+    """
+    pending, all_stats = [], []
+    for query, hits in requests:
+        key = normalize_query(query)
+        todo = []
+        for hit in hits:
+            score = rerank_scores.get((key, hit["id"]))
+            if score is None:
+                todo.append(hit)
+            else:
+                hit["rerank_score"] = score
+        pending.append((query, key, todo))
+        all_stats.append(
+            {
+                "candidates": len(hits),
+                "scored": 0,
+                "cached": len(hits) - len(todo),
+                "skipped": 0,
+                "rerank_ms": 0.0,
+            }
+        )
+
+    budget_ms = RERANK_BUDGET_MS if budget_ms is None else budget_ms
+    budget = budget_ms / 1000 * len(requests)
+    wave = max(RERANK_WAVE, min_scored) if budget > 0 else None
+    scored = 0
+    started = time.perf_counter()
+    while any(todo for _, _, todo in pending):
+        if scored and time.perf_counter() - started >= budget:
+            break
+        # The next `wave` hits of every request (all of them without a budget)
+        batch = []
+        for i, (_, _, todo) in enumerate(pending):
+            take = len(todo) if wave is None else wave
+            batch.extend((i, hit) for hit in todo[:take])
+            del todo[:take]
+        wave = RERANK_WAVE
+        batch_started = time.perf_counter()
+        scores = rerank_pairs([(pending[i][0], hit_text(hit)) for i, hit in batch])
+        cost = (time.perf_counter() - batch_started) / len(batch)
+        for (i, hit), score in zip(batch, scores):
+            hit["rerank_score"] = float(score)
+            rerank_scores.put((pending[i][1], hit["id"]), hit["rerank_score"], cost, generation)
+            all_stats[i]["scored"] += 1
+        scored += len(batch)
+    elapsed = time.perf_counter() - started
+
+    for (_, _, todo), stats in zip(pending, all_stats):
+        stats["skipped"] = len(todo)
+        stats["rerank_ms"] = round(elapsed * 1000, 2)
+    with _rerank_lock:
+        _rerank_counters["requests"] += len(requests)
+        _rerank_counters["pairs_scored"] += scored
+        _rerank_counters["pairs_cached"] += sum(stats["cached"] for stats in all_stats)
+        _rerank_counters["pairs_skipped"] += sum(stats["skipped"] for stats in all_stats)
+        _rerank_counters["budget_exceeded"] += sum(bool(stats["skipped"]) for stats in all_stats)
+        _rerank_counters["seconds"] += elapsed
+    return all_stats
+
+
+def rerank_hits(query: str, hits: List[Dict], min_scored: int, generation: int) -> Dict:
+    """rerank_many for a single query."""
+    return rerank_many([(query, hits)], min_scored, generation)[0]
+
+
+def rerank_stats() -> Dict:
+    with _rerank_lock:
+        counters = dict(_rerank_counters)
+    pairs = counters["pairs_scored"] + counters["pairs_cached"]
+    counters["cache_rate"] = round(counters["pairs_cached"] / pairs, 3) if pairs else 0.0
+    counters["ms"] = round(counters.pop("seconds") * 1000, 1)
+    counters["candidates"] = RERANK_CANDIDATES
+    counters["budget_ms"] = RERANK_BUDGET_MS
+    counters["cascade"] = {
+        "enabled": RERANK_CASCADE,
+        "threshold": RERANK_CASCADE_THRESHOLD,
+        "margin": RERANK_CASCADE_MARGIN,
+    }
+    return counters
 
-    if not semantic_hits:
-        return []
 
-    for hit in semantic_hits:
-        hit["semantic_score"] = float(hit.get("score", 0.0))
+async def embed_queries(queries: List[str]) -> List:
+    """
+    Query vectors, from the query cache where possible. A single miss goes
+    through the embedding batcher (shared with concurrent requests); more
+    are encoded together in one pass on the model executor.
+    """
+    keys = [normalize_query(query) for query in queries]
+    vectors = [query_embeddings.get(key) for key in keys]
+    missing = [i for i, vector in enumerate(vectors) if vector is None]
+    if missing:
+        started = time.perf_counter()
+        if len(missing) == 1:
+            fresh = [await aembed_query(queries[missing[0]])]
+        else:
+            fresh = (await run_model(encode, [queries[i] for i in missing])).tolist()
+        cost = (time.perf_counter() - started) / len(missing)
+        for i, vector in zip(missing, fresh):
+            vectors[i] = vector
+            query_embeddings.put(keys[i], vector, cost)
+    return vectors
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = RRF_K) -> Dict[str, float]:
+    """sum(1 / (k + rank)) over every ranking an id appears in (rank from 1)."""
+    fused = {}
+    for ranking in rankings:
+        for rank, vector_id in enumerate(ranking, start=1):
+            fused[vector_id] = fused.get(vector_id, 0.0) + 1.0 / (k + rank)
+    return fused
+
+
+async def fuse_lexical(query_emb, semantic_hits: List[Dict], lexical) -> List[Dict]:
+    """
+    Add the BM25 hits to the dense hits, ordered by fused rank. Hits only
+    the lexical side found are fetched from the vector store in one call and
+    get their cosine score, so every hit has a semantic_score.
+    """
+    if not lexical:
+        return semantic_hits
+    by_id = {hit["id"]: hit for hit in semantic_hits}
+    missing = [vector_id for vector_id, _ in lexical if vector_id not in by_id]
+    if missing:
+        q = np.asarray(query_emb, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        for vector_id, vector in (await afetch_vectors(missing)).items():
+            values = np.asarray(vector["values"], dtype=np.float32)
+            by_id[vector_id] = {
+                "id": vector_id,
+                "score": float(values @ q / (np.linalg.norm(values) or 1.0)),
+                "metadata": vector["metadata"],
+                "values": vector["values"],
+            }
+    # BM25 entries whose vector is gone (not fetched) are dropped
+    lexical = [(vector_id, score) for vector_id, score in lexical if vector_id in by_id]
+    for vector_id, score in lexical:
+        by_id[vector_id]["bm25_score"] = score
+    fused = reciprocal_rank_fusion(
+        [[hit["id"] for hit in semantic_hits], [vector_id for vector_id, _ in lexical]]
+    )
+    for vector_id, hit in by_id.items():
+        hit["fused_score"] = fused[vector_id]
+    return sorted(by_id.values(), key=lambda hit: hit["fused_score"], reverse=True)
+
+
+async def aretrieve_and_rerank_many(
+    queries: List[str],
+    top_k: int = 5,
+    candidate_k: int = None,
+    with_stats: bool = False,
+    rerank: str = "auto",
+    budget_ms: float = None,
+):
+    """
+    Semantic search (+ BM25, fused by rank) + Cross-encoder rerank for a
+    list of queries at once: one embedding pass for the queries not in the
+    cache, concurrent vector-store queries, and one cross-encoder batch for
+    every (query, candidate) pair. candidate_k hits per query (default
+    RERANK_CANDIDATES, never fewer than top_k) are fetched per side and
+    reranked; the best top_k are kept.
+    rerank picks the mode (see RERANK_MODES): with "auto" a query whose
+    cascade_confidence reaches RERANK_CASCADE_THRESHOLD keeps its retrieval
+    order and skips the cross-encoder. budget_ms caps the cross-encoder
+    time per query (default RERANK_BUDGET_MS).
+    Returns: one list of hits per query, in input order, each hit with
+    semantic_score, rerank_path ("cross_encoder", "cascade", "retrieval" or
+    "budget") and rerank_score when scored (and bm25_score / fused_score
+    when hybrid search is on), plus each query's rerank counts, path and
+    confidence when with_stats is set.
+
+    Results are cached per (normalized query, top_k, candidate_k, mode)
+    and rerank scores per (normalized query, chunk id), until they expire or
+    the index changes (see query_cache). Repeated queries are computed once.
+
+    Never blocks the event loop: embedding, BM25 and the rerank run on the
+    model executor (or the embedding batcher), and vector-store reads use
+    the store's async I/O. BM25 runs while the queries are embedded.
+    """
+    if rerank not in RERANK_MODES:
+        raise ValueError(f"rerank must be one of {RERANK_MODES}, got {rerank!r}")
+    candidate_k = max(candidate_k or RERANK_CANDIDATES, top_k)
+    # Ingestion may have run in another process (the API, for the MCP servers)
+    sync_index_generation()
+    keys = [(normalize_query(query), top_k, candidate_k, rerank) for query in queries]
+    found = {}
+    for key in dict.fromkeys(keys):
+        cached = query_results.get(key)
+        if cached is not None:
+            found[key] = (cached, {"result_cached": True})
 
-    # Cross-encoder rerank
-    candidate_texts = [
-        hit.get("metadata", {}).get("chunk_text") or hit.get("text", "")
-        for hit in semantic_hits
+    todo = {}
+    for query, key in zip(queries, keys):
+        if key not in found:
+            todo.setdefault(key, query)
+    if todo:
+        found.update(
+            zip(
+                todo,
+                await _search_uncached(
+                    list(todo.values()), top_k, candidate_k, rerank, budget_ms
+                ),
+            )
+        )
+
+    results, stats, seen = [], [], set()
+    for key in keys:
+        hits, query_stats = found[key]
+        # Callers may modify the hits: a repeated query gets its own copy
+        results.append(copy.deepcopy(hits) if key in seen else hits)
+        stats.append(query_stats)
+        seen.add(key)
+    if with_stats:
+        return results, stats
+    return results
+
+
+async def _search_uncached(
+    queries: List[str], top_k: int, candidate_k: int, mode: str, budget_ms: float
+):
+    generation = query_results.generation
+    score_generation = rerank_scores.generation
+    started = time.perf_counter()
+
+    lexical = (
+        asyncio.ensure_future(run_model(lambda: [lexical_search(q, candidate_k) for q in queries]))
+        if HYBRID_SEARCH
+        else None
+    )
+    try:
+        embeddings = await embed_queries(queries)
+        semantic = await asyncio.gather(
+            *(
+                aquery_vector(query_emb, top_k=candidate_k, include_values=MMR_ENABLED)
+                for query_emb in embeddings
+            )
+        )
+    except BaseException:
+        if lexical is not None:
+            lexical.cancel()
+        raise
+
+    if lexical is not None:
+        semantic = await asyncio.gather(
+            *(
+                fuse_lexical(query_emb, hits, lexical_hits)
+                for query_emb, hits, lexical_hits in zip(embeddings, semantic, await lexical)
+            )
+        )
+
+    for hits in semantic:
+        for hit in hits:
+            hit["semantic_score"] = float(hit.get("score", 0.0))
+
+    # Chunk texts of every candidate in one lookup, then the cascade: the
+    # cross-encoder reranks only the queries it is not confident about;
+    # hits left unscored (by the cascade or the budget) keep their
+    # retrieval order after the scored ones
+    def rerank():
+        attach_chunk_texts([hit for hits in semantic for hit in hits])
+        confidence = [cascade_confidence(q, hits) for q, hits in zip(queries, semantic)]
+        if mode == "never":
+            paths = ["retrieval"] * len(queries)
+        elif mode == "auto" and RERANK_CASCADE:
+            paths = [
+                "cascade" if c >= RERANK_CASCADE_THRESHOLD else "cross_encoder"
+                for c in confidence
+            ]
+        else:
+            paths = ["cross_encoder"] * len(queries)
+        todo = [i for i, path in enumerate(paths) if path == "cross_encoder"]
+        scored = iter(
+            rerank_many(
+                [(queries[i], semantic[i]) for i in todo], top_k, score_generation, budget_ms
+            )
+            if todo
+            else []
+        )
+        all_stats = []
+        for hits, path, c in zip(semantic, paths, confidence):
+            if path == "cross_encoder":
+                stats = next(scored)
+            else:
+                stats = {
+                    "candidates": len(hits),
+                    "scored": 0,
+                    "cached": 0,
+                    "skipped": 0,
+                    "rerank_ms": 0.0,
+                }
+            stats["path"] = path
+            stats["confidence"] = round(c, 3)
+            for hit in hits:
+                if "rerank_score" in hit:
+                    hit["rerank_path"] = "cross_encoder"
+                else:
+                    hit["rerank_path"] = "budget" if path == "cross_encoder" else path
+            all_stats.append(stats)
+        with _rerank_lock:
+            _rerank_counters["cascaded"] += paths.count("cascade")
+        return all_stats
+
+    all_stats = await run_model(rerank)
+    ranked = []
+    for hits in semantic:
+        scored = [hit for hit in hits if "rerank_score" in hit]
+        unscored = [hit for hit in hits if "rerank_score" not in hit]
+        ranked.append(sorted(scored, key=lambda x: x["rerank_score"], reverse=True) + unscored)
+
+    # Near-duplicate chunks (same passage in several documents, overlapping
+    # windows) give way to the next best distinct ones: MMR over the best
+    # reranked hits (by semantic_score for a query the cascade or "never"
+    # left unscored). The search returned their vectors (include_values);
+    # only hits without one are fetched, in one call
+    pools = [
+        (
+            [hit for hit in hits[: top_k * MMR_POOL] if "rerank_score" in hit]
+            if stats["path"] == "cross_encoder"
+            else hits[: top_k * MMR_POOL]
+        )
+        for hits, stats in zip(ranked, all_stats)
     ]
-    rerank_scores = reranker.predict([(query, text) for text in candidate_texts])
+    pool_hits = [hit for pool in pools if len(pool) > top_k for hit in pool]
+    vectors = {}
+    if MMR_ENABLED and pool_hits:
+        vectors = {hit["id"]: hit["values"] for hit in pool_hits if "values" in hit}
+        missing = {hit["id"] for hit in pool_hits} - vectors.keys()
+        if missing:
+            vectors.update(
+                {vid: v["values"] for vid, v in (await afetch_vectors(missing)).items()}
+            )
+    for hits in semantic:  # not returned or cached
+        for hit in hits:
+            hit.pop("values", None)
+
+    cost = (time.perf_counter() - started) / len(queries)
+    out = []
+    for query, hits, pool, stats in zip(queries, ranked, pools, all_stats):
+        stats["diversified"] = 0
+        if vectors and len(pool) > top_k:
+            picked = diversify(pool, vectors, top_k)
+            plain = {hit["id"] for hit in pool[:top_k]}
+            stats["diversified"] = sum(hit["id"] not in plain for hit in picked)
+            hits = picked
+        else:
+            hits = hits[:top_k]
+        # A ranking cut short by the budget is not cached; its scores are, so
+        # the next request gets further
+        if not stats["skipped"]:
+            key = (normalize_query(query), top_k, candidate_k, mode)
+            query_results.put(key, hits, cost, generation)
+        out.append((hits, {"result_cached": False, **stats}))
+    return out
+
+
+async def aretrieve_and_rerank(
+    query: str,
+    top_k: int = 5,
+    candidate_k: int = None,
+    with_stats: bool = False,
+    rerank: str = "auto",
+    budget_ms: float = None,
+):
+    """aretrieve_and_rerank_many for one query: top_k hits (and its rerank counts)."""
+    results, stats = await aretrieve_and_rerank_many(
+        [query], top_k, candidate_k, True, rerank, budget_ms
+    )
+    if with_stats:
+        return results[0], stats[0]
+    return results[0]
+
+
+def retrieve_and_rerank(
+    query: str,
+    top_k: int = 5,
+    candidate_k: int = None,
+    with_stats: bool = False,
+    rerank: str = "auto",
+    budget_ms: float = None,
+):
+    """Blocking form of aretrieve_and_rerank, for sync callers."""
+    return run_sync(aretrieve_and_rerank(query, top_k, candidate_k, with_stats, rerank, budget_ms))
 
-    # Add rerank_score to each hit
-    for hit, score in zip(semantic_hits, rerank_scores):
-        hit["rerank_score"] = float(score)
 
-    # Sort by rerank_score in descending order
-    semantic_hits = sorted(semantic_hits, key=lambda x: x["rerank_score"], reverse=True)
-    return semantic_hits
+def retrieve_and_rerank_many(
+    queries: List[str],
+    top_k: int = 5,
+    candidate_k: int = None,
+    with_stats: bool = False,
+    rerank: str = "auto",
+    budget_ms: float = None,
+):
+    """Blocking form of aretrieve_and_rerank_many, for sync callers."""
+    return run_sync(
+        aretrieve_and_rerank_many(queries, top_k, candidate_k, with_stats, rerank, budget_ms)
+    )
 
 
 # -------------------------
@@ -1,46 +1,443 @@
 # src/core/text_chunker.py
-from typing import List, Dict
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Iterator, List, Tuple
 import numpy as np
 from nltk.tokenize import sent_tokenize
-from sklearn.metrics.pairwise import cosine_similarity
-from src.core.embedding_generator import embed_text
+from src.core.embedding_generator import count_tokens, embed_text, token_spans
 from pypdf import PdfReader
-import os
+
+# Rows/columns per similarity tile. Peak memory of the grouping step is
+# block_size x block_size float64 values (8 MB at 1024) instead of n x n.
+SIMILARITY_BLOCK_SIZE = int(os.getenv("CHUNK_SIMILARITY_BLOCK_SIZE", "1024"))
+
+# Sliding window for semantic_chunk_stream, in sentences
+STREAM_WINDOW = int(os.getenv("CHUNK_STREAM_WINDOW", "256"))
+STREAM_OVERLAP = int(os.getenv("CHUNK_STREAM_OVERLAP", "32"))
+
+# Chunking strategy used by ingestion and graph building (see CHUNKERS)
+CHUNKER_STRATEGY = os.getenv("CHUNKER_STRATEGY", "semantic").lower()
+# Upper bound on chunk length, in embedding-model tokens. The cross-encoder
+# reads at most 512 tokens for query + chunk, so anything longer would be
+# embedded in full but truncated at rerank time.
+CHUNK_MAX_TOKENS = int(os.getenv("CHUNK_MAX_TOKENS", "384"))
+# The same bound for the default semantic chunker; 0 (the default) keeps the
+# groups semantic_chunk has always made. Setting it changes chunk ids and
+# texts, so re-ingest with force=true afterwards.
+SEMANTIC_CHUNK_MAX_TOKENS = int(os.getenv("SEMANTIC_CHUNK_MAX_TOKENS", "0"))
+# Tokens shared by consecutive windows of the fixed-window chunker
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "64"))
 
 
-def semantic_chunk(text: str, similarity_threshold: float = 0.7) -> List[Dict]:
+def _normalize_rows(embeddings: np.ndarray) -> np.ndarray:
+    """L2-normalize rows, leaving zero vectors untouched (same as sklearn)."""
+    norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+    norms[norms == 0.0] = 1.0
+    return embeddings / norms
+
+
+def group_sentences(
+    embeddings, similarity_threshold: float = 0.7, block_size: int = None
+) -> List[List[int]]:
+    """
+    Group sentence indices the same way the original pairwise loop did:
+    walk sentences in order, each unvisited sentence i starts a group and
+    pulls in every later unvisited sentence j with cos(i, j) > threshold.
+
+    Similarities come from normalized matrix products computed tile by tile,
+    so no n x n matrix is ever built. Columns already claimed by a group are
+    dropped from later tiles, which makes the work shrink as groups form.
+    """
+    if len(embeddings) == 0:
+        return []
+    unit = _normalize_rows(np.asarray(embeddings, dtype=np.float64))
+    n = len(unit)
+    block_size = max(1, block_size or SIMILARITY_BLOCK_SIZE)
+    visited = np.zeros(n, dtype=bool)
+    groups: List[List[int]] = []
+
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        rows = np.flatnonzero(~visited[start:stop]) + start
+        if len(rows) == 0:
+            continue
+
+        # Diagonal tile: decides which rows of this block are seeds. A row is
+        # a seed only if no earlier seed (in this or a previous block) took it.
+        tile = unit[rows] @ unit[rows].T
+        seeds, members = [], {}
+        for a, i in enumerate(rows):
+            if visited[i]:
+                continue
+            visited[i] = True
+            hits = rows[(tile[a] > similarity_threshold) & (rows > i)]
+            hits = hits[~visited[hits]]
+            visited[hits] = True
+            seeds.append((a, i))
+            members[i] = [int(i)] + hits.tolist()
+
+        # Off-diagonal tiles: every later column goes to the first seed (in
+        # order) that matches it, exactly as the sequential scan would.
+        seed_vecs = unit[[i for _, i in seeds]]
+        cols_left = np.flatnonzero(~visited[stop:]) + stop
+        for c0 in range(0, len(cols_left), block_size):
+            cols = cols_left[c0 : c0 + block_size]
+            sims = seed_vecs @ unit[cols].T
+            for s, (_, i) in enumerate(seeds):
+                hits = cols[(sims[s] > similarity_threshold) & ~visited[cols]]
+                if len(hits):
+                    visited[hits] = True
+                    members[i].extend(hits.tolist())
+
+        groups.extend(members[i] for _, i in seeds)
+    return groups
+
+
+def _window_bounds(n: int, max_tokens: int, overlap: int) -> List[Tuple[int, int]]:
+    """[start, stop) token ranges of overlapping windows that cover n tokens."""
+    step = max(1, max_tokens - overlap)
+    bounds = []
+    for start in range(0, n, step):
+        bounds.append((start, min(start + max_tokens, n)))
+        if start + max_tokens >= n:
+            break
+    return bounds
+
+
+def split_by_tokens(text: str, max_tokens: int, overlap: int = 0) -> List[str]:
+    """Cut text into pieces of at most max_tokens model tokens."""
+    spans = token_spans(text)
+    if len(spans) <= max_tokens:
+        return [text]
+    pieces = [
+        text[spans[a][0] : spans[b - 1][1]].strip()
+        for a, b in _window_bounds(len(spans), max_tokens, overlap)
+    ]
+    return [piece for piece in pieces if piece]
+
+
+def _split_sentences(text: str, max_tokens: int = None) -> Tuple[List[str], List[int]]:
+    """
+    Sentences of `text` and their token counts. With a budget, a sentence
+    that alone exceeds it is cut into token windows that become sentences
+    of their own. Without one, no tokenization is done and counts are 0.
+    """
+    sentences = sent_tokenize(text)
+    if not max_tokens:
+        return sentences, [0] * len(sentences)
+    tokens = count_tokens(sentences)
+    if max(tokens, default=0) <= max_tokens:
+        return sentences, tokens
+    split = []
+    for sentence, count in zip(sentences, tokens):
+        split.extend([sentence] if count <= max_tokens else split_by_tokens(sentence, max_tokens))
+    return split, count_tokens(split)
+
+
+def bound_groups(
+    groups: List[List[int]], tokens: List[int], max_tokens: int
+) -> List[List[int]]:
+    """
+    Split every group whose joined sentences exceed max_tokens into
+    consecutive runs, keeping the order of the group. Each joining space
+    counts as one token so the budget also holds where the tokenizer merges
+    differently across sentence boundaries.
+    """
+    bounded = []
+    for group in groups:
+        run, used = [], 0
+        for j in group:
+            cost = tokens[j] + (1 if run else 0)
+            if run and used + cost > max_tokens:
+                bounded.append(run)
+                run, used, cost = [], 0, tokens[j]
+            run.append(j)
+            used += cost
+        bounded.append(run)
+    return bounded
+
+
+def _make_chunk(
+    index: int, sentences: List[str], embeddings, with_embeddings: bool
+) -> Dict:
+    chunk = {"chunk_index": index, "chunk_text": " ".join(sentences)}
+    if with_embeddings:
+        chunk["sentence_embeddings"] = np.asarray(embeddings)
+        chunk["sentence_lengths"] = [len(sentence) for sentence in sentences]
+    return chunk
+
+
+def semantic_chunk(
+    text: str,
+    similarity_threshold: float = 0.7,
+    with_embeddings: bool = False,
+    max_tokens: int = None,
+) -> List[Dict]:
     """
     Semantic chunking: group sentences based on cosine similarity.
     If similarity < threshold then start new chunk.
+
+    with_embeddings=True also returns, per chunk, the sentence vectors that
+    were computed for grouping ("sentence_embeddings", one row per sentence)
+    and the sentence lengths in characters ("sentence_lengths"), so callers
+    can build chunk vectors without running the model again.
+
+    With max_tokens, groups longer than the budget are split (bound_groups).
     """
     if not text:
         return []
 
     # Split into sentences and generate embedding for each sentence
-    sentences = sent_tokenize(text)
+    sentences, tokens = _split_sentences(text, max_tokens)
     embeddings = np.array(embed_text(sentences))
-    chunks: List[Dict] = []
-    visited = set()
-    idx = 0
+    groups = group_sentences(embeddings, similarity_threshold)
+    if max_tokens:
+        groups = bound_groups(groups, tokens, max_tokens)
+
+    return [
+        _make_chunk(idx, [sentences[j] for j in group], embeddings[group], with_embeddings)
+        for idx, group in enumerate(groups)
+    ]
+
+
+def semantic_chunk_stream(
+    segments: Iterable[str],
+    similarity_threshold: float = 0.7,
+    window: int = STREAM_WINDOW,
+    overlap: int = STREAM_OVERLAP,
+    with_embeddings: bool = False,
+    max_tokens: int = None,
+) -> Iterator[Dict]:
+    """
+    Streaming variant of semantic_chunk over pages/paragraphs (see
+    file_loader.iter_file). Sentences are grouped inside a sliding window of
+    `window` sentences: groups that start before the last `overlap` sentences
+    are emitted, the others are carried into the next window (with their
+    vectors, so nothing is embedded twice). Memory stays bounded by the
+    window, and the first chunks come out before the input is exhausted.
+
+    Unlike semantic_chunk, a group can only pull in sentences that fall
+    within one window of its first sentence.
+    """
+    window = max(2, window)
+    overlap = min(max(0, overlap), window - 1)
+    sentences: List[str] = []
+    tokens: List[int] = []
+    embeddings = np.zeros((0, 0))
+    pending: List[str] = []
+    pending_tokens: List[int] = []
+    chunk_index = 0
+
+    def fill(count: int):
+        nonlocal sentences, tokens, embeddings, pending, pending_tokens
+        new, pending = pending[:count], pending[count:]
+        new_tokens, pending_tokens = pending_tokens[:count], pending_tokens[count:]
+        vectors = np.array(embed_text(new))
+        sentences = sentences + new
+        tokens = tokens + new_tokens
+        embeddings = vectors if len(embeddings) == 0 else np.vstack([embeddings, vectors])
+
+    def emit(final: bool) -> Iterator[Dict]:
+        nonlocal sentences, tokens, embeddings, chunk_index
+        carry_from = len(sentences) if final else len(sentences) - overlap
+        carried: List[int] = []
+        for group in group_sentences(embeddings, similarity_threshold):
+            if group[0] >= carry_from:
+                carried.extend(group)
+                continue
+            runs = bound_groups([group], tokens, max_tokens) if max_tokens else [group]
+            for run in runs:
+                yield _make_chunk(
+                    chunk_index, [sentences[j] for j in run], embeddings[run], with_embeddings
+                )
+                chunk_index += 1
+        carried.sort()
+        sentences = [sentences[j] for j in carried]
+        tokens = [tokens[j] for j in carried]
+        embeddings = embeddings[carried]
+
+    for segment in segments:
+        new, new_tokens = _split_sentences(segment, max_tokens)
+        pending.extend(new)
+        pending_tokens.extend(new_tokens)
+        while len(sentences) + len(pending) >= window:
+            fill(window - len(sentences))
+            yield from emit(final=False)
+
+    if pending:
+        fill(len(pending))
+    if sentences:
+        yield from emit(final=True)
+
+
+# -------------------------
+class Chunker(ABC):
+    """
+    A chunking strategy: turns text into [{"chunk_index", "chunk_text"}, ...].
+
+    Strategies that embed sentences to place boundaries set
+    sentence_vectors = True; with with_embeddings=True their chunks also carry
+    "sentence_embeddings" and "sentence_lengths" for pool_chunk_embeddings.
+    """
+
+    name = ""
+    sentence_vectors = False
+
+    @abstractmethod
+    def chunk(self, text: str, with_embeddings: bool = False) -> List[Dict]:
+        """Chunks of `text`, in order."""
+
+    def chunk_stream(
+        self, segments: Iterable[str], with_embeddings: bool = False
+    ) -> Iterator[Dict]:
+        """Chunk pages/paragraphs as they arrive. Default: all at once."""
+        yield from self.chunk("\n".join(segments), with_embeddings)
+
+
+class SemanticChunker(Chunker):
+    """Today's grouping (semantic_chunk); with max_tokens, longer groups are split."""
+
+    name = "semantic"
+    sentence_vectors = True
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.7,
+        max_tokens: int = SEMANTIC_CHUNK_MAX_TOKENS,
+        window: int = STREAM_WINDOW,
+        overlap: int = STREAM_OVERLAP,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_tokens = max_tokens
+        self.window = window
+        self.overlap = overlap
+
+    def chunk(self, text: str, with_embeddings: bool = False) -> List[Dict]:
+        return semantic_chunk(
+            text, self.similarity_threshold, with_embeddings, self.max_tokens
+        )
+
+    def chunk_stream(
+        self, segments: Iterable[str], with_embeddings: bool = False
+    ) -> Iterator[Dict]:
+        return semantic_chunk_stream(
+            segments,
+            self.similarity_threshold,
+            self.window,
+            self.overlap,
+            with_embeddings,
+            self.max_tokens,
+        )
+
+
+class AdjacentSemanticChunker(Chunker):
+    """
+    Keeps sentences in document order and starts a new chunk when a sentence
+    is less similar than the threshold to the one before it, or when adding
+    it would exceed max_tokens. Chunks are contiguous spans of text, and the
+    walk needs only one sentence of context, so streaming is exact.
+    """
+
+    name = "adjacent"
+    sentence_vectors = True
+
+    def __init__(self, similarity_threshold: float = 0.7, max_tokens: int = CHUNK_MAX_TOKENS):
+        self.similarity_threshold = similarity_threshold
+        self.max_tokens = max_tokens
+
+    def chunk(self, text: str, with_embeddings: bool = False) -> List[Dict]:
+        if not text:
+            return []
+        return list(self.chunk_stream([text], with_embeddings))
+
+    def chunk_stream(
+        self, segments: Iterable[str], with_embeddings: bool = False
+    ) -> Iterator[Dict]:
+        index, run, vectors, used, previous = 0, [], [], 0, None
+        for segment in segments:
+            sentences, tokens = _split_sentences(segment, self.max_tokens)
+            if not sentences:
+                continue
+            embeddings = np.array(embed_text(sentences))
+            unit = _normalize_rows(embeddings.astype(np.float64))
+            for j, sentence in enumerate(sentences):
+                cost = tokens[j] + (1 if run else 0)
+                if run and (
+                    float(unit[j] @ previous) < self.similarity_threshold
+                    or (self.max_tokens and used + cost > self.max_tokens)
+                ):
+                    yield _make_chunk(index, run, vectors, with_embeddings)
+                    index, run, vectors, used, cost = index + 1, [], [], 0, tokens[j]
+                run.append(sentence)
+                vectors.append(embeddings[j])
+                used += cost
+                previous = unit[j]
+        if run:
+            yield _make_chunk(index, run, vectors, with_embeddings)
+
+
+class FixedWindowChunker(Chunker):
+    """
+    Windows of max_tokens model tokens, consecutive windows sharing
+    `overlap` tokens. No model calls, so it is the fastest strategy; chunk
+    vectors must be encoded afterwards (no sentence vectors to pool).
+    """
+
+    name = "fixed"
+    sentence_vectors = False
+
+    def __init__(self, max_tokens: int = CHUNK_MAX_TOKENS, overlap: int = CHUNK_OVERLAP_TOKENS):
+        self.max_tokens = max(1, max_tokens)
+        self.overlap = min(max(0, overlap), self.max_tokens - 1)
+
+    def chunk(self, text: str, with_embeddings: bool = False) -> List[Dict]:
+        if not text:
+            return []
+        return list(self.chunk_stream([text]))
+
+    def chunk_stream(
+        self, segments: Iterable[str], with_embeddings: bool = False
+    ) -> Iterator[Dict]:
+        step = self.max_tokens - self.overlap
+        index, buffer = 0, ""
+        for segment in segments:
+            buffer = f"{buffer}\n{segment}" if buffer else segment
+            spans = token_spans(buffer)
+            # Emit the windows that have more text after them; the rest of
+            # the buffer (from the next window start) waits for more input
+            starts = range(0, len(spans) - self.max_tokens, step)
+            for start in starts:
+                stop = start + self.max_tokens
+                text = buffer[spans[start][0] : spans[stop - 1][1]].strip()
+                if text:
+                    yield {"chunk_index": index, "chunk_text": text}
+                    index += 1
+            if starts:
+                buffer = buffer[spans[starts[-1] + step][0] :]
+
+        if not buffer.strip():
+            return
+        spans = token_spans(buffer)
+        for start, stop in _window_bounds(len(spans), self.max_tokens, self.overlap):
+            text = buffer[spans[start][0] : spans[stop - 1][1]].strip()
+            if text:
+                yield {"chunk_index": index, "chunk_text": text}
+                index += 1
 
-    for i, sentence in enumerate(sentences):
-        if i in visited:
-            continue
 
-        # Start new chunk
-        chunk = [sentence]
-        visited.add(i)
+CHUNKERS = {
+    SemanticChunker.name: SemanticChunker,
+    AdjacentSemanticChunker.name: AdjacentSemanticChunker,
+    FixedWindowChunker.name: FixedWindowChunker,
+}
 
-        for j in range(i + 1, len(sentences)):
-            if j not in visited:
-                sim = cosine_similarity([embeddings[i]], [embeddings[j]])[0][0]
-                if sim > similarity_threshold:
-                    chunk.append(sentences[j])
-                    visited.add(j)
 
-        chunks.append({"chunk_index": idx, "chunk_text": " ".join(chunk)})
-        idx += 1
-    return chunks
+def get_chunker(name: str = None, **options) -> Chunker:
+    """Chunker for a strategy name (default: CHUNKER_STRATEGY)."""
+    name = (name or CHUNKER_STRATEGY).lower()
+    if name not in CHUNKERS:
+        raise ValueError(f"Unknown chunker strategy: {name} (choose from {sorted(CHUNKERS)})")
+    return CHUNKERS[name](**options)
 
 
 # python -m src.core.text_chunker
@@ -0,0 +1,482 @@
+# src/database/bm25_index.py
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Lexical index kept next to the vector index (see vector_store)
+BM25_ENABLED = os.getenv("BM25_ENABLED", "1") != "0"
+BM25_PATH = os.getenv("BM25_PATH", ".cache/bm25")
+BM25_K1 = float(os.getenv("BM25_K1", "1.2"))
+BM25_B = float(os.getenv("BM25_B", "0.75"))
+# Postings added since the last merge, as a share of the merged ones, that
+# trigger folding them into the compact arrays
+BM25_MERGE_RATIO = float(os.getenv("BM25_MERGE_RATIO", "0.1"))
+# Terms in more than this share of chunks do not nominate candidates when
+# the query has rarer terms; they are only looked up for the chunks the rare
+# terms matched (their postings are the longest to scan)
+BM25_MAX_DF_RATIO = float(os.getenv("BM25_MAX_DF_RATIO", "0.05"))
+# At most this many candidates (best by their rare-term score) get the
+# common-term lookups
+BM25_MAX_CANDIDATES = int(os.getenv("BM25_MAX_CANDIDATES", "20000"))
+# Rows kept per common term, best first by that term's weight ("champion
+# list"): a query of only common terms takes its candidates from these
+BM25_CHAMPIONS = int(os.getenv("BM25_CHAMPIONS", "2000"))
+# Seconds between checks for writes made by another process (the MCP servers
+# search the index the API ingests into)
+BM25_RELOAD_CHECK = float(os.getenv("BM25_RELOAD_CHECK", "1"))
+BM25_VERSION = 1
+
+# Words, numbers and dotted/hyphenated codes ("12.3", "a-1", "u.s") stay whole
+TOKEN_RE = re.compile(r"\w+(?:[.\-/]\w+)*")
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the "
+    "this to was were which will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+# -------------------------
+def _csr(terms: np.ndarray, rows: np.ndarray, tfs: np.ndarray, vocab_size: int):
+    """(term, row, tf) triples -> offsets, docs, tfs with each term's rows sorted."""
+    order = np.lexsort((rows, terms))
+    counts = np.bincount(terms, minlength=vocab_size)
+    offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    return offsets, rows[order].astype(np.int32), tfs[order].astype(np.uint16)
+
+
+class BM25Index:
+    """
+    Okapi BM25 over the chunks in the vector index, keyed by vector id.
+
+    Merged postings are three flat arrays (CSR layout): offsets[term] ..
+    offsets[term + 1] index into docs (int32 row) and tfs (uint16). Chunks
+    added since go to a delta of (term, row, tf) triples, indexed the same
+    way on the next search and folded into the merged arrays once it grows
+    past BM25_MERGE_RATIO. Deleted rows are masked (df counts live rows only)
+    and dropped at the merge, which renumbers the live ones; save() merges
+    once dead rows pass BM25_MERGE_RATIO too.
+    On disk:
+        postings.npz  offsets, docs, tfs and the champion lists of common
+                      terms (rewritten only by a merge)
+        rows.npz      token count and alive flag of every row
+        delta.npz     unmerged triples
+        meta.json     vocabulary, row ids, target
+        log.jsonl     add/delete batches since the last save(), appended per
+                      call when autosave is set, replayed on load
+
+    Another process that appended to the log or saved is picked up by the
+    next search (checked every BM25_RELOAD_CHECK seconds): new log lines are
+    replayed, a newer meta.json reloads everything.
+    """
+
+    def __init__(
+        self,
+        path: str = BM25_PATH,
+        target: Dict = None,
+        k1: float = BM25_K1,
+        b: float = BM25_B,
+        autosave: bool = True,
+    ):
+        self.path = path
+        # Vector index these chunks belong to (same guard as the ingest manifest)
+        self.target = target
+        self.k1 = k1
+        self.b = b
+        self.autosave = autosave
+        self._meta_path = os.path.join(path, "meta.json")
+        self._log_path = os.path.join(path, "log.jsonl")
+        self._lock = threading.RLock()
+        self._reset()
+        self._load()
+
+    def _reset(self):
+        self.vocab: Dict[str, int] = {}
+        self.ids: List[str] = []
+        self.row_of: Dict[str, int] = {}
+        self.lengths = np.zeros(0, dtype=np.int32)
+        self.alive = np.zeros(0, dtype=bool)
+        self.offsets = np.zeros(1, dtype=np.int64)
+        self.docs = np.zeros(0, dtype=np.int32)
+        self.tfs = np.zeros(0, dtype=np.uint16)
+        self.champions: Dict[int, np.ndarray] = {}
+        self.pending: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self.delta_size = 0
+        self._delta = None  # CSR over pending, built on the next search
+        self.total_length = 0
+        self._postings_dirty = True  # postings.npz out of date
+        self._meta_mtime = None  # meta.json and log.jsonl as last read or written
+        self._log_offset = 0
+        self._next_check = time.monotonic() + BM25_RELOAD_CHECK
+
+    # -------------------------
+    def _load(self):
+        self._meta_mtime = _mtime(self._meta_path)
+        if self._meta_mtime is not None:
+            with open(self._meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            # Another version or vector index is rebuilt by the next save()
+            same_target = meta.get("target", self.target) == self.target
+            if meta.get("version") == BM25_VERSION and same_target:
+                self._load_snapshot(meta)
+        self._replay()  # log lines carry their target too
+
+    def _load_snapshot(self, meta: Dict):
+        self.vocab = {term: i for i, term in enumerate(meta["vocab"])}
+        self.ids = meta["ids"]
+        with np.load(os.path.join(self.path, "postings.npz")) as data:
+            self.offsets, self.docs, self.tfs = data["offsets"], data["docs"], data["tfs"]
+            bounds = data["champion_offsets"]
+            self.champions = {
+                int(tid): data["champion_rows"][bounds[i] : bounds[i + 1]]
+                for i, tid in enumerate(data["champion_terms"])
+            }
+        with np.load(os.path.join(self.path, "rows.npz")) as data:
+            self.lengths, self.alive = data["lengths"], data["alive"]
+        with np.load(os.path.join(self.path, "delta.npz")) as data:
+            if len(data["terms"]):
+                self.pending = [(data["terms"], data["rows"], data["tfs"])]
+                self.delta_size = len(data["terms"])
+        self.row_of = {vid: row for row, vid in enumerate(self.ids) if self.alive[row]}
+        self.total_length = int(self.lengths[self.alive].sum())
+        self._postings_dirty = False
+
+    def _replay(self):
+        """Apply the log lines written since `_log_offset` (complete lines only)."""
+        try:
+            with open(self._log_path, "rb") as f:
+                f.seek(self._log_offset)
+                data = f.read()
+        except OSError:
+            return
+        data = data[: data.rfind(b"\n") + 1]
+        for line in data.splitlines():
+            record = json.loads(line)
+            if record.get("target") != self.target:
+                continue
+            if "add" in record:
+                self._add(record["add"])
+            else:
+                self._delete(record["delete"])
+        self._log_offset += len(data)
+
+    def _append_log(self, **record):
+        if not self.autosave:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps({"target": self.target, **record}) + "\n")
+            self._log_offset = f.tell()
+
+    def refresh(self):
+        """Catch up with writes made by another process (see the class docstring)."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check:
+                return
+            self._next_check = now + BM25_RELOAD_CHECK
+            log_size = _size(self._log_path)
+            # A save (meta.json rewritten, log emptied) or more log lines
+            if _mtime(self._meta_path) != self._meta_mtime or log_size < self._log_offset:
+                self._reset()
+                self._load()
+            elif log_size > self._log_offset:
+                self._replay()
+
+    def save(self):
+        """Snapshot everything and empty the log."""
+        with self._lock:
+            os.makedirs(self.path, exist_ok=True)
+            dead = len(self.ids) - self.count
+            if (
+                self.delta_size > BM25_MERGE_RATIO * max(len(self.docs), 1)
+                or dead > BM25_MERGE_RATIO * max(len(self.ids), 1)
+            ):
+                self.merge()
+            if self._postings_dirty:
+                champion_terms = np.asarray(sorted(self.champions), dtype=np.int32)
+                champion_rows = [self.champions[tid] for tid in champion_terms]
+                self._write_npz(
+                    "postings.npz",
+                    offsets=self.offsets,
+                    docs=self.docs,
+                    tfs=self.tfs,
+                    champion_terms=champion_terms,
+                    champion_offsets=np.cumsum([0] + [len(r) for r in champion_rows]),
+                    champion_rows=(
+                        np.concatenate(champion_rows) if champion_rows else np.zeros(0, np.int32)
+                    ),
+                )
+                self._postings_dirty = False
+            terms, rows, tfs = self._pending_arrays()
+            self._write_npz("delta.npz", terms=terms, rows=rows, tfs=tfs)
+            self._write_npz("rows.npz", lengths=self.lengths, alive=self.alive)
+            meta = {
+                "version": BM25_VERSION,
+                "target": self.target,
+                "vocab": sorted(self.vocab, key=self.vocab.get),
+                "ids": self.ids,
+            }
+            tmp = os.path.join(self.path, "meta.json.tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(tmp, self._meta_path)
+            self._meta_mtime = _mtime(self._meta_path)
+            with open(self._log_path, "w", encoding="utf-8"):
+                self._log_offset = 0
+
+    def _write_npz(self, name: str, **arrays):
+        tmp = os.path.join(self.path, name + ".tmp.npz")
+        np.savez(tmp, **arrays)
+        os.replace(tmp, os.path.join(self.path, name))
+
+    def _pending_arrays(self):
+        if not self.pending:
+            return np.zeros(0, np.int32), np.zeros(0, np.int32), np.zeros(0, np.uint16)
+        if len(self.pending) > 1:
+            self.pending = [tuple(np.concatenate(part) for part in zip(*self.pending))]
+        return self.pending[0]
+
+    # -------------------------
+    @property
+    def count(self) -> int:
+        return len(self.row_of)
+
+    def add(self, items: Iterable[Tuple[str, str]]):
+        """Index (vector_id, text) pairs; an existing id is replaced (and of an
+        id given twice, the last text wins)."""
+        with self._lock:
+            items = list(dict(items).items())
+            self._add(items)
+            self._append_log(add=items)
+
+    def _add(self, items: List[Tuple[str, str]]):
+        self._delete([vid for vid, _ in items])
+        vocab = self.vocab
+        terms, rows, tfs, lengths = [], [], [], []
+        row = len(self.ids)
+        for vid, text in items:
+            tokens = tokenize(text)
+            counts = Counter(tokens)
+            terms.extend([vocab.setdefault(term, len(vocab)) for term in counts])
+            tfs.extend(counts.values())
+            rows.extend([row] * len(counts))
+            self.ids.append(vid)
+            self.row_of[vid] = row
+            lengths.append(len(tokens))
+            row += 1
+        if terms:
+            self.pending.append(
+                (
+                    np.asarray(terms, dtype=np.int32),
+                    np.asarray(rows, dtype=np.int32),
+                    np.minimum(np.asarray(tfs), 65535).astype(np.uint16),
+                )
+            )
+            self.delta_size += len(terms)
+            self._delta = None
+        self.lengths = np.concatenate([self.lengths, np.asarray(lengths, dtype=np.int32)])
+        self.alive = np.concatenate([self.alive, np.ones(len(items), dtype=bool)])
+        self.total_length += sum(lengths)
+
+    def delete(self, ids: Iterable[str]):
+        with self._lock:
+            ids = list(ids)
+            self._delete(ids)
+            self._append_log(delete=ids)
+
+    def _delete(self, ids) -> int:
+        deleted = 0
+        for vid in ids:
+            row = self.row_of.pop(vid, None)
+            if row is not None:
+                self.alive[row] = False
+                self.total_length -= int(self.lengths[row])
+                deleted += 1
+        return deleted
+
+    def merge(self):
+        """
+        Fold the delta into the CSR arrays, drop deleted (and replaced) rows
+        with their postings and renumber the live rows in order.
+        """
+        with self._lock:
+            terms, rows, tfs = self._pending_arrays()
+            base_terms = np.repeat(
+                np.arange(len(self.offsets) - 1, dtype=np.int32), np.diff(self.offsets)
+            )
+            terms = np.concatenate([base_terms, terms])
+            rows = np.concatenate([self.docs, rows])
+            tfs = np.concatenate([self.tfs, tfs])
+            keep = self.alive[rows]
+            live = np.flatnonzero(self.alive)
+            renumber = np.zeros(len(self.ids), dtype=np.int32)
+            renumber[live] = np.arange(len(live), dtype=np.int32)
+            self.offsets, self.docs, self.tfs = _csr(
+                terms[keep], renumber[rows[keep]], tfs[keep], len(self.vocab)
+            )
+            self.ids = [self.ids[row] for row in live]
+            self.row_of = {vid: row for row, vid in enumerate(self.ids)}
+            self.lengths = self.lengths[live]
+            self.alive = np.ones(len(live), dtype=bool)
+            self.pending, self.delta_size, self._delta = [], 0, None
+            self._build_champions()
+            self._postings_dirty = True
+
+    def _build_champions(self):
+        self.champions = {}
+        n = self.count
+        if n == 0:
+            return
+        avgdl = self.total_length / n
+        df = np.diff(self.offsets)
+        for tid in np.flatnonzero(df > BM25_MAX_DF_RATIO * n):
+            docs, tfs = self._slice((self.offsets, self.docs, self.tfs), tid)
+            self.champions[int(tid)] = self._top_rows(docs, tfs, avgdl)
+
+    def _top_rows(self, docs, tfs, avgdl: float) -> np.ndarray:
+        """The BM25_CHAMPIONS rows where one term weighs most, ascending."""
+        if len(docs) <= BM25_CHAMPIONS:
+            return docs
+        weights = self._weights(docs, tfs, avgdl, df=1)  # idf is a constant factor here
+        return np.sort(docs[np.argpartition(-weights, BM25_CHAMPIONS - 1)[:BM25_CHAMPIONS]])
+
+    def _candidates(self, tid: int, docs, tfs, avgdl: float) -> np.ndarray:
+        """Champion rows of a common term, plus the best of its unmerged rows."""
+        merged = int(self.offsets[tid + 1] - self.offsets[tid]) if tid < len(self.offsets) - 1 else 0
+        champions = self.champions.get(tid)
+        if champions is None:
+            return self._top_rows(docs, tfs, avgdl)
+        return np.concatenate([champions, self._top_rows(docs[merged:], tfs[merged:], avgdl)])
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+            self.save()
+
+    # -------------------------
+    @staticmethod
+    def _slice(csr, tid: int):
+        offsets, docs, tfs = csr
+        if tid >= len(offsets) - 1:
+            return docs[:0], tfs[:0]
+        return docs[offsets[tid] : offsets[tid + 1]], tfs[offsets[tid] : offsets[tid + 1]]
+
+    def _postings(self, tid: int):
+        """Rows (ascending: delta rows are newer than merged ones) and tfs of a term."""
+        docs, tfs = self._slice((self.offsets, self.docs, self.tfs), tid)
+        if self.pending:
+            if self._delta is None:
+                self._delta = _csr(*self._pending_arrays(), len(self.vocab))
+            extra_docs, extra_tfs = self._slice(self._delta, tid)
+            if len(extra_docs):
+                docs = np.concatenate([docs, extra_docs])
+                tfs = np.concatenate([tfs, extra_tfs])
+        return docs, tfs
+
+    def _weights(self, docs, tfs, avgdl: float, df: int = None) -> np.ndarray:
+        n = self.count
+        df = len(docs) if df is None else df
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        tf = tfs.astype(np.float32)
+        norm = self.k1 * (1 - self.b + self.b * self.lengths[docs] / avgdl)
+        return idf * tf * (self.k1 + 1) / (tf + norm)
+
+    def search(self, query: str, top_k: int = 5) -> List[Tuple[str, float]]:
+        """[(vector_id, bm25_score), ...], best first."""
+        with self._lock:
+            self.refresh()
+            n = self.count
+            if n == 0 or top_k <= 0:
+                return []
+            avgdl = self.total_length / n
+            has_dead = n < len(self.ids)  # postings of deleted rows until the next merge
+            postings = []
+            for term in dict.fromkeys(tokenize(query)):
+                tid = self.vocab.get(term)
+                if tid is not None:
+                    docs, tfs = self._postings(tid)
+                    # df counts live chunks only
+                    df = int(np.count_nonzero(self.alive[docs])) if has_dead else len(docs)
+                    if df:
+                        postings.append((tid, docs, tfs, df))
+            if not postings:
+                return []
+            rare = [p for p in postings if p[3] <= BM25_MAX_DF_RATIO * n]
+            common = [p for p in postings if p[3] > BM25_MAX_DF_RATIO * n]
+
+            if rare:
+                docs = np.concatenate([d for _, d, _, _ in rare])
+                weights = np.concatenate(
+                    [self._weights(d, t, avgdl, df) for _, d, t, df in rare]
+                )
+                # Few postings: sum per distinct row; many: one dense bincount
+                if len(docs) * 8 < len(self.ids):
+                    rows, inverse = np.unique(docs, return_inverse=True)
+                    scores = np.bincount(inverse, weights=weights)
+                else:
+                    dense = np.bincount(docs, weights=weights, minlength=len(self.ids))
+                    rows = np.flatnonzero(dense)
+                    scores = dense[rows]
+                if has_dead:  # before the cap, so dead rows take no candidate slot
+                    live = self.alive[rows]
+                    rows, scores = rows[live], scores[live]
+                if len(rows) > BM25_MAX_CANDIDATES:
+                    keep = np.argpartition(-scores, BM25_MAX_CANDIDATES - 1)[:BM25_MAX_CANDIDATES]
+                    keep.sort()
+                    rows, scores = rows[keep], scores[keep]
+            else:
+                # Only common words: candidates come from their champion lists
+                rows = np.unique(
+                    np.concatenate([self._candidates(tid, d, t, avgdl) for tid, d, t, _ in common])
+                )
+                scores = np.zeros(len(rows))
+
+            # Postings are sorted by row (merged rows first, the delta's
+            # newer rows after), so common terms are a binary search per row
+            for _, docs, tfs, df in common:
+                pos = np.minimum(np.searchsorted(docs, rows), len(docs) - 1)
+                found = docs[pos] == rows
+                scores[found] += self._weights(docs[pos[found]], tfs[pos[found]], avgdl, df)
+
+            live = self.alive[rows]
+            rows, scores = rows[live], scores[live]
+            if len(rows) > top_k:
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+                rows, scores = rows[best], scores[best]
+            order = np.argsort(-scores, kind="stable")
+            return [(self.ids[rows[i]], float(scores[i])) for i in order]
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "chunks": self.count,
+                "terms": len(self.vocab),
+                "postings": int(len(self.docs)),
+                "delta_postings": self.delta_size,
+            }
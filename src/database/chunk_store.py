@@ -0,0 +1,103 @@
+# src/database/chunk_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Chunk text lives here, keyed by vector id; the vector index only keeps
+# compact metadata (file name, chunk index), see vector_store
+CHUNK_STORE_ENABLED = os.getenv("CHUNK_STORE_ENABLED", "1") != "0"
+CHUNK_STORE_PATH = os.getenv("CHUNK_STORE_PATH", ".cache/chunks.sqlite3")
+# SQLite's default limit on bound parameters per statement is 999
+LOOKUP_BATCH = 900
+
+
+# -------------------------
+class ChunkStore:
+    """
+    SQLite table of (vector id -> chunk text). One connection shared by all
+    threads behind a lock; WAL mode so the file stays readable while a
+    write is in progress. get_many() is one indexed IN (...) lookup per 900
+    ids, which is how retrieval reads the text of all its candidates.
+    """
+
+    def __init__(self, path: str = CHUNK_STORE_PATH, target: Dict = None):
+        self.path = path
+        # Vector index these chunks belong to (same guard as the ingest manifest)
+        self.target = target
+        self.lookups = self.lookup_ids = self.lookup_misses = 0
+        self.lookup_seconds = 0.0
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute("CREATE TABLE IF NOT EXISTS chunks (id TEXT PRIMARY KEY, text TEXT NOT NULL)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._check_target()
+
+    def _check_target(self):
+        row = self.db.execute("SELECT value FROM meta WHERE key = 'target'").fetchone()
+        target = json.dumps(self.target, sort_keys=True)
+        if row is not None and row[0] != target:
+            # Texts of another index: ids may collide, so start empty
+            self.db.execute("DELETE FROM chunks")
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES ('target', ?)", (target,))
+        self.db.commit()
+
+    def put_many(self, items: Iterable[Tuple[str, str]]):
+        with self._lock:
+            self.db.executemany("INSERT OR REPLACE INTO chunks VALUES (?, ?)", items)
+            self.db.commit()
+
+    def get_many(self, ids: List[str]) -> Dict[str, str]:
+        ids = list(dict.fromkeys(ids))
+        started = time.perf_counter()
+        out = {}
+        with self._lock:
+            for start in range(0, len(ids), LOOKUP_BATCH):
+                part = ids[start : start + LOOKUP_BATCH]
+                out.update(
+                    self.db.execute(
+                        f"SELECT id, text FROM chunks WHERE id IN ({','.join('?' * len(part))})",
+                        part,
+                    ).fetchall()
+                )
+            self.lookups += 1
+            self.lookup_ids += len(ids)
+            self.lookup_misses += len(ids) - len(out)
+            self.lookup_seconds += time.perf_counter() - started
+        return out
+
+    def delete_many(self, ids: Iterable[str]):
+        with self._lock:
+            self.db.executemany("DELETE FROM chunks WHERE id = ?", ((i,) for i in ids))
+            self.db.commit()
+
+    def clear(self):
+        with self._lock:
+            self.db.execute("DELETE FROM chunks")
+            self.db.commit()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            chunks = self.db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+            pages = self.db.execute("PRAGMA page_count").fetchone()[0]
+            page_size = self.db.execute("PRAGMA page_size").fetchone()[0]
+            return {
+                "path": self.path,
+                "chunks": chunks,
+                "file_mb": round(pages * page_size / 2**20, 2),
+                "lookups": self.lookups,
+                "ids_per_lookup": round(self.lookup_ids / self.lookups, 1) if self.lookups else 0.0,
+                "misses": self.lookup_misses,
+                "mean_lookup_ms": (
+                    round(self.lookup_seconds / self.lookups * 1000, 3) if self.lookups else 0.0
+                ),
+            }
@@ -0,0 +1,131 @@
+# src/database/ingest_manifest.py
+import hashlib
+import json
+import os
+import threading
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+MANIFEST_PATH = os.getenv("INGEST_MANIFEST_PATH", ".cache/ingest_manifest.json")
+MANIFEST_VERSION = 1
+
+
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# -------------------------
+class IngestManifest:
+    """
+    Persistent record of what is already in the vector index:
+        {file_name: {"size", "mtime_ns", "sha256",
+                     "chunks": [{"id": vector_id, "sha256": chunk_hash}, ...]}}
+
+    A file whose size and mtime are unchanged is trusted without reading it;
+    otherwise its content hash decides. Chunks are compared by position, since
+    the vector ID of a chunk is f"{file_name}_{chunk_index}".
+    """
+
+    def __init__(self, path: str = MANIFEST_PATH, target: Dict = None):
+        self.path = path
+        # Index the recorded vectors live in (name, dimension): a manifest
+        # written for another index or width describes nothing that is there
+        self.target = target
+        self.files: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if (
+                data.get("version") == MANIFEST_VERSION
+                and data.get("target", target) == target
+            ):
+                self.files = data.get("files", {})
+
+    def check(self, path: str) -> Tuple[bool, Dict]:
+        """Return (unchanged, fingerprint) for a file on disk."""
+        fname = os.path.basename(path)
+        stat = os.stat(path)
+        entry = self.files.get(fname)
+        if (
+            entry
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return True, {k: entry[k] for k in ("size", "mtime_ns", "sha256")}
+
+        fingerprint = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "sha256": hash_file(path),
+        }
+        if entry and entry["sha256"] == fingerprint["sha256"]:
+            # Touched but identical: remember the new mtime for the fast path
+            with self._lock:
+                entry["mtime_ns"] = fingerprint["mtime_ns"]
+            return True, fingerprint
+        return False, fingerprint
+
+    def chunk_count(self, fname: str) -> int:
+        return len(self.files.get(fname, {}).get("chunks", []))
+
+    def changed_chunks(self, fname: str, chunks: List[Dict]) -> List[int]:
+        """
+        Positions (in `chunks`) of chunks whose text differs from what was
+        last upserted under the same chunk_index.
+        """
+        old = self.files.get(fname, {}).get("chunks", [])
+        changed = []
+        for i, chunk in enumerate(chunks):
+            idx = chunk["chunk_index"]
+            if idx >= len(old) or old[idx]["sha256"] != chunk["sha256"]:
+                changed.append(i)
+        return changed
+
+    def record_file(self, fname: str, fingerprint: Dict, chunks: List[Dict]) -> List[str]:
+        """
+        Store the new state of a file after its vectors were upserted.
+        Returns vector IDs that existed before but are no longer produced.
+        """
+        with self._lock:
+            old = self.files.get(fname, {}).get("chunks", [])
+            new_ids = {c["id"] for c in chunks}
+            self.files[fname] = {**fingerprint, "chunks": chunks}
+        return [c["id"] for c in old if c["id"] not in new_ids]
+
+    def remove_missing(self, present: List[str]) -> List[str]:
+        """Forget files that are gone from disk; returns their vector IDs."""
+        present = set(present)
+        stale = []
+        with self._lock:
+            for fname in [f for f in self.files if f not in present]:
+                stale.extend(c["id"] for c in self.files.pop(fname)["chunks"])
+        return stale
+
+    def save(self):
+        """Write atomically so a crash never leaves a half-written manifest."""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            data = {"version": MANIFEST_VERSION, "target": self.target, "files": self.files}
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+
+def reset_manifest(path: str = MANIFEST_PATH):
+    """Drop the manifest, e.g. after the vector index was wiped."""
+    if os.path.exists(path):
+        os.remove(path)
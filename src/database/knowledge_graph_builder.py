@@ -3,11 +3,11 @@ import os
 import json
 import asyncio
 from dotenv import load_dotenv
-from langchain_neo4j import Neo4jGraph
-from langchain.schema import Document
 from groq import Groq
 from src.utils.file_loader import read_file
-from src.core.text_chunker import semantic_chunk
+from src.core.text_chunker import get_chunker
+from src.core.job_manager import Job
+from src.utils.lazy import Lazy
 
 
 # === Load environment variables ===
@@ -18,13 +18,25 @@ DATA_FOLDER = "src/data/"
 groq_client = Groq(api_key=os.getenv("GROQ_API_KEY"))
 GROQ_MODEL = os.getenv("GROQ_MODEL")
 
+
 # === Neo4j Connector ===
-graph = Neo4jGraph(
-    url=os.getenv("NEO4J_URI"),
-    username=os.getenv("NEO4J_USERNAME"),
-    password=os.getenv("NEO4J_PASSWORD"),
-    refresh_schema=True,
-)
+def _connect_graph():
+    from langchain_neo4j import Neo4jGraph
+
+    return Neo4jGraph(
+        url=os.getenv("NEO4J_URI"),
+        username=os.getenv("NEO4J_USERNAME"),
+        password=os.getenv("NEO4J_PASSWORD"),
+        refresh_schema=True,
+    )
+
+
+# Connected (schema refresh included) on first use; search does not need it
+neo4j_graph = Lazy("neo4j_graph", _connect_graph, required=False)
+
+
+def get_graph():
+    return neo4j_graph.get()
 
 
 # -----------------------------------------------------
@@ -86,16 +98,28 @@ async def extract_graph_with_groq(text: str) -> dict:
 
 
 # -----------------------------------------------------
-async def build_graph():
-    for fname in os.listdir(DATA_FOLDER):
+async def build_graph(job: Job = None):
+    """
+    Extract entities/relations from every chunk and push them to Neo4j.
+    With a job, progress is reported per file and cancellation is checked
+    before each chunk.
+    """
+    job = job or Job("knowledge_graph")
+    fnames = os.listdir(DATA_FOLDER)
+    job.set_total(len(fnames))
+    for fname in fnames:
+        job.check_cancelled()
+        job.update_file(fname, status="chunking")
         path = os.path.join(DATA_FOLDER, fname)
         text = read_file(path)
-        chunks = semantic_chunk(text)
+        chunks = get_chunker().chunk(text)
         chunk_texts = [chunk["chunk_text"] for chunk in chunks]
 
         print(f"\nFile: {fname} | {len(chunks)} chunks found.")
+        job.update_file(fname, status="extracting", chunks=len(chunks), extracted=0)
 
         for idx, chunk in enumerate(chunk_texts):
+            job.check_cancelled()
             print(f"→ Extracting chunk {idx+1}/{len(chunks)}...")
 
             # Call Groq to extract graph
@@ -104,7 +128,7 @@ async def build_graph():
             rels = graph_data.get("relationships", [])
 
             # Push to Neo4j
-            with graph._driver.session() as session:
+            with get_graph()._driver.session() as session:
                 for n in nodes:
                     session.run(
                         """
@@ -126,6 +150,9 @@ async def build_graph():
                         target=r.get("target"),
                         type=r.get("type", "RELATED_TO"),
                     )
+            job.update_file(fname, extracted=1)
+
+        job.update_file(fname, status="done")
 
     print("\nGraph successfully built and pushed to Neo4j!")
 
@@ -0,0 +1,586 @@
+# src/database/local_vector_store.py
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+from src.database.vector_store import VectorStore
+
+load_dotenv()
+
+# exact = brute-force scan of the memory-mapped matrix
+# ivf   = inverted file: k-means lists, only the nprobe closest are scanned
+# auto  = exact below LOCAL_IVF_MIN_VECTORS, ivf above
+LOCAL_INDEX = os.getenv("LOCAL_INDEX", "auto").lower()
+LOCAL_IVF_MIN_VECTORS = int(os.getenv("LOCAL_IVF_MIN_VECTORS", "50000"))
+LOCAL_IVF_NPROBE = int(os.getenv("LOCAL_IVF_NPROBE", "16"))
+# Seconds between checks for rows another process saved (the MCP servers
+# read the store the API ingests into)
+LOCAL_STORE_RELOAD_CHECK = float(os.getenv("LOCAL_STORE_RELOAD_CHECK", "1"))
+INDEX_MODES = ("exact", "ivf", "auto")
+
+# Rows scored per matrix product while assigning vectors to IVF lists
+ASSIGN_BLOCK = 65536
+
+
+def _mtime(path: str):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def matches(metadata: Optional[Dict], flt: Optional[Dict]) -> bool:
+    """
+    Evaluate a Pinecone-style metadata filter, so the same filter works on
+    both backends: {"field": value}, {"field": {"$eq" | "$ne" | "$in" |
+    "$nin" | "$gt" | "$gte" | "$lt" | "$lte": value}}, "$and" / "$or" lists.
+    """
+    if not flt:
+        return True
+    metadata = metadata or {}
+    for key, condition in flt.items():
+        if key == "$and":
+            if not all(matches(metadata, c) for c in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches(metadata, c) for c in condition):
+                return False
+            continue
+        if not isinstance(condition, dict):
+            condition = {"$eq": condition}
+        value = metadata.get(key)
+        for op, target in condition.items():
+            if op == "$eq":
+                ok = value == target
+            elif op == "$ne":
+                ok = value != target
+            elif op == "$in":
+                ok = value in target
+            elif op == "$nin":
+                ok = value not in target
+            elif op in ("$gt", "$gte", "$lt", "$lte"):
+                if value is None:
+                    return False
+                ok = {
+                    "$gt": value > target,
+                    "$gte": value >= target,
+                    "$lt": value < target,
+                    "$lte": value <= target,
+                }[op]
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+            if not ok:
+                return False
+    return True
+
+
+def spherical_kmeans(sample: np.ndarray, lists: int, iterations: int = 8, seed: int = 0):
+    """K-means on unit vectors with cosine similarity; returns unit centroids."""
+    rng = np.random.default_rng(seed)
+    centroids = sample[rng.choice(len(sample), lists, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(sample @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, sample)
+        empty = ~np.any(sums, axis=1)
+        # Lists that lost every point restart from a random sample
+        sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+        centroids = _normalize(sums)
+    return centroids
+
+
+# -------------------------
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector index persisted under `path`:
+        vectors.f32     float32 [capacity, dimension] matrix, memory-mapped
+        store.sqlite3   id, metadata and IVF list of every row
+        ivf.npz         IVF centroids
+
+    Vectors are L2-normalized on upsert, so a dot product is the cosine
+    score Pinecone returns. Deleted rows are reused by later upserts.
+    save() writes only the rows changed since the last save, so autosave
+    costs O(batch), not O(store). (A store.json from before is imported
+    once.)
+
+    Every save stamps its rows with the next `seq` (deleted rows go to the
+    freed table with it), so another process sharing the path catches up on
+    its next read by loading just the rows stamped after its own seq; the
+    vectors come through the shared memory map. clear() changes the epoch,
+    which reloads everything. Checked every LOCAL_STORE_RELOAD_CHECK seconds.
+    """
+
+    name = "local"
+
+    def __init__(
+        self,
+        path: str,
+        dimension: int,
+        index: str = LOCAL_INDEX,
+        nprobe: int = LOCAL_IVF_NPROBE,
+        ivf_min_vectors: int = LOCAL_IVF_MIN_VECTORS,
+        autosave: bool = True,
+    ):
+        if index not in INDEX_MODES:
+            raise ValueError(f"Unknown local index: {index} (choose from {INDEX_MODES})")
+        self.path = path
+        self.dimension = dimension
+        self.index = index
+        self.nprobe = nprobe
+        self.ivf_min_vectors = ivf_min_vectors
+        self.autosave = autosave  # False: call save() yourself (bulk loads)
+        self.ids: List[Optional[str]] = []
+        self.metadata: List[Optional[Dict]] = []
+        self.row_of: Dict[str, int] = {}
+        self.free: List[int] = []
+        self.centroids = None
+        self.assign = np.zeros(0, dtype=np.int32)
+        self.trained_on = 0
+        self._lists = None  # per-centroid arrays of live rows, rebuilt after writes
+        self._dirty = set()  # rows changed since the last save
+        self._centroids_dirty = False
+        self.seq = 0  # last save seen (ours or another process's)
+        self._epoch = None
+        self._ivf_mtime = None
+        self._next_check = time.monotonic() + LOCAL_STORE_RELOAD_CHECK
+        self.totals = {"vectors": 0, "batches": 0, "retries": 0, "seconds": 0.0}
+        self._lock = threading.RLock()
+
+        os.makedirs(path, exist_ok=True)
+        self._matrix_path = os.path.join(path, "vectors.f32")
+        self._json_path = os.path.join(path, "store.json")
+        self._ivf_path = os.path.join(path, "ivf.npz")
+        self.matrix = None
+        self.db = sqlite3.connect(os.path.join(path, "store.sqlite3"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS rows (row INTEGER PRIMARY KEY, id TEXT NOT NULL, "
+            "metadata TEXT NOT NULL, list INTEGER, seq INTEGER NOT NULL DEFAULT 0)"
+        )
+        if "seq" not in {column[1] for column in self.db.execute("PRAGMA table_info(rows)")}:
+            self.db.execute("ALTER TABLE rows ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+        self.db.execute("CREATE INDEX IF NOT EXISTS rows_seq ON rows (seq)")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS freed (row INTEGER PRIMARY KEY, seq INTEGER NOT NULL)"
+        )
+        self.db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self.db.commit()
+        self._load()
+
+    # -------------------------
+    def _check_dimension(self, dimension: int):
+        if dimension != self.dimension:
+            raise RuntimeError(
+                f"Local vector store '{self.path}' has dimension {dimension} "
+                f"but EMBEDDING_DIM={self.dimension}. Use another LOCAL_STORE_PATH."
+            )
+
+    def _meta(self) -> Dict[str, str]:
+        return dict(self.db.execute("SELECT key, value FROM meta"))
+
+    def _load(self):
+        self.db.execute("BEGIN")  # rows and seq from one snapshot
+        meta = self._meta()
+        records = self.db.execute(
+            "SELECT row, id, metadata, list FROM rows ORDER BY row"
+        ).fetchall()
+        self.db.commit()
+        if "dimension" in meta:
+            self._check_dimension(int(meta["dimension"]))
+        else:
+            self.db.execute("INSERT INTO meta VALUES ('dimension', ?)", (str(self.dimension),))
+            self.db.commit()
+        self.seq, self._epoch = int(meta.get("seq", 0)), meta.get("epoch")
+        size = records[-1][0] + 1 if records else 0
+        self.ids, self.metadata = [None] * size, [None] * size
+        lists = {}
+        for row, vector_id, metadata, list_id in records:
+            self.ids[row], self.metadata[row] = vector_id, json.loads(metadata)
+            if list_id is not None:
+                lists[row] = list_id
+        self.row_of = {vid: row for row, vid in enumerate(self.ids) if vid is not None}
+        self.free = [row for row, vid in enumerate(self.ids) if vid is None]
+        self._open_matrix(max(len(self.ids), 1024))
+        self._grow_assign()
+        if lists:
+            self.assign[list(lists)] = list(lists.values())
+        self._lists = None
+        if self._load_centroids() and not lists:
+            with np.load(self._ivf_path) as ivf:
+                if "assign" in ivf:  # written by the store.json layout
+                    self.assign[: len(ivf["assign"])] = ivf["assign"]
+                    self._dirty.update(self.row_of.values())
+        if not records and os.path.exists(self._json_path):
+            self._import_json()
+
+    def _load_centroids(self) -> bool:
+        self._ivf_mtime = _mtime(self._ivf_path)
+        if self._ivf_mtime is None:
+            self.centroids, self.trained_on = None, 0
+            return False
+        with np.load(self._ivf_path) as ivf:
+            self.centroids = ivf["centroids"]
+            self.trained_on = int(ivf["trained_on"])
+        self._lists = None
+        return True
+
+    def refresh(self):
+        """Catch up with saves made by another process (see the class docstring)."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self._next_check or self._dirty:  # unsaved writes of our own
+                return
+            self._next_check = now + LOCAL_STORE_RELOAD_CHECK
+            self.db.execute("BEGIN")
+            meta = self._meta()
+            changed = freed = []
+            seq = int(meta.get("seq", 0))
+            if meta.get("epoch") == self._epoch and seq > self.seq:
+                changed = self.db.execute(
+                    "SELECT row, id, metadata, list FROM rows WHERE seq > ?", (self.seq,)
+                ).fetchall()
+                freed = self.db.execute(
+                    "SELECT row FROM freed WHERE seq > ?", (self.seq,)
+                ).fetchall()
+            self.db.commit()
+            if meta.get("epoch") != self._epoch:
+                self._load()
+                return
+            if _mtime(self._ivf_path) != self._ivf_mtime:
+                self._load_centroids()
+            if seq <= self.seq:
+                return
+            for (row,) in freed:
+                if row < len(self.ids):
+                    self._set_row(row, None, None)
+            for row, vector_id, metadata, _ in changed:
+                self._set_row(row, vector_id, json.loads(metadata))
+            self._reserve_view(len(self.ids))
+            for row, _, _, list_id in changed:
+                if list_id is not None:
+                    self.assign[row] = list_id
+            self.free = [row for row, vid in enumerate(self.ids) if vid is None]
+            self.seq, self._lists = seq, None
+
+    def _set_row(self, row: int, vector_id: Optional[str], metadata: Optional[Dict]):
+        while len(self.ids) <= row:
+            self.ids.append(None)
+            self.metadata.append(None)
+        old = self.ids[row]
+        if old is not None and self.row_of.get(old) == row:
+            del self.row_of[old]
+        self.ids[row], self.metadata[row] = vector_id, metadata
+        if vector_id is not None:
+            self.row_of[vector_id] = row
+
+    def _reserve_view(self, rows: int):
+        """Map the rows another process added (its file is already that long)."""
+        if rows > len(self.matrix):
+            self._open_matrix(rows)
+            self._grow_assign()
+
+    def _import_json(self):
+        """Move ids/metadata of the old store.json layout into SQLite."""
+        with open(self._json_path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self._check_dimension(data["dimension"])
+        self.ids, self.metadata = data["ids"], data["metadata"]
+        self.row_of = {vid: row for row, vid in enumerate(self.ids) if vid is not None}
+        self.free = [row for row, vid in enumerate(self.ids) if vid is None]
+        self._reserve(len(self.ids))
+        self._dirty.update(range(len(self.ids)))
+        self.save()
+        os.replace(self._json_path, self._json_path + ".imported")
+
+    def _open_matrix(self, capacity: int):
+        if self.matrix is not None:
+            self.matrix.flush()
+            self.matrix = None
+        bytes_needed = capacity * self.dimension * 4
+        with open(self._matrix_path, "ab") as f:
+            if f.tell() < bytes_needed:
+                f.truncate(bytes_needed)
+        size = os.path.getsize(self._matrix_path) // (self.dimension * 4)
+        self.matrix = np.memmap(
+            self._matrix_path, dtype=np.float32, mode="r+", shape=(size, self.dimension)
+        )
+
+    def _reserve(self, rows: int):
+        if rows > len(self.matrix):
+            self._open_matrix(max(rows, 2 * len(self.matrix)))
+            self._grow_assign()
+
+    def _grow_assign(self):
+        extra = len(self.matrix) - len(self.assign)
+        if extra > 0:
+            self.assign = np.concatenate([self.assign, np.zeros(extra, dtype=np.int32)])
+
+    def save(self):
+        """Persist the rows changed since the last save (and retrained centroids)."""
+        with self._lock:
+            self.matrix.flush()
+            # Centroids first: a reader that sees the new lists also finds them
+            if self._centroids_dirty:
+                tmp = self._ivf_path + ".tmp.npz"
+                np.savez(tmp, centroids=self.centroids, trained_on=self.trained_on)
+                os.replace(tmp, self._ivf_path)
+                self._ivf_mtime = _mtime(self._ivf_path)
+                self._centroids_dirty = False
+            if self._dirty:
+                dirty = sorted(self._dirty)
+                dead = [(row,) for row in dirty if self.ids[row] is None]
+                trained = self.centroids is not None
+                seq = int(self._meta().get("seq", 0)) + 1
+                self.db.executemany("DELETE FROM rows WHERE row = ?", dead)
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO freed VALUES (?, ?)", ((row, seq) for (row,) in dead)
+                )
+                live = [row for row in dirty if self.ids[row] is not None]
+                self.db.executemany(
+                    "INSERT OR REPLACE INTO rows VALUES (?, ?, ?, ?, ?)",
+                    (
+                        (
+                            row,
+                            self.ids[row],
+                            json.dumps(self.metadata[row]),
+                            int(self.assign[row]) if trained else None,
+                            seq,
+                        )
+                        for row in live
+                    ),
+                )
+                self.db.executemany("DELETE FROM freed WHERE row = ?", ((row,) for row in live))
+                self.db.execute("INSERT OR REPLACE INTO meta VALUES ('seq', ?)", (str(seq),))
+                self.db.commit()
+                self.seq = seq
+                self._dirty.clear()
+
+    # -------------------------
+    @property
+    def count(self) -> int:
+        return len(self.row_of)
+
+    def _use_ivf(self) -> bool:
+        if self.index == "auto":
+            return self.count >= self.ivf_min_vectors
+        return self.index == "ivf" and self.count > 0
+
+    def _train(self):
+        """(Re)build the IVF lists: about sqrt(n) lists, trained on a sample."""
+        rows = np.fromiter(self.row_of.values(), dtype=np.int64)
+        lists = max(1, min(int(np.sqrt(len(rows))), len(rows)))
+        rng = np.random.default_rng(0)
+        sample = rows if len(rows) <= lists * 32 else rng.choice(rows, lists * 32, replace=False)
+        self.centroids = spherical_kmeans(np.asarray(self.matrix[np.sort(sample)]), lists)
+        self._centroids_dirty = True
+        self._assign_rows(np.sort(rows))
+        self.trained_on = len(rows)
+
+    def _assign_rows(self, rows: np.ndarray):
+        for start in range(0, len(rows), ASSIGN_BLOCK):
+            block = rows[start : start + ASSIGN_BLOCK]
+            self.assign[block] = np.argmax(self.matrix[block] @ self.centroids.T, axis=1)
+        self._dirty.update(rows.tolist())
+        self._lists = None
+
+    def _ivf_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            rows = np.fromiter(self.row_of.values(), dtype=np.int64)
+            order = rows[np.argsort(self.assign[rows], kind="stable")]
+            bounds = np.searchsorted(self.assign[order], np.arange(len(self.centroids) + 1))
+            self._lists = [order[bounds[i] : bounds[i + 1]] for i in range(len(self.centroids))]
+        return self._lists
+
+    # -------------------------
+    def upsert(self, payload: List[tuple]) -> Dict:
+        """payload: (id, values, metadata) tuples, as for Pinecone."""
+        started = time.perf_counter()
+        with self._lock:
+            values = np.asarray([values for _, values, _ in payload], dtype=np.float32)
+            if values.size and values.shape[1] != self.dimension:
+                raise ValueError(
+                    f"Vector has {values.shape[1]} dimensions, store holds {self.dimension}"
+                )
+            rows = []
+            for vector_id, _, metadata in payload:
+                row = self.row_of.get(vector_id)
+                if row is None:
+                    if self.free:
+                        row = self.free.pop()
+                    else:
+                        row = len(self.ids)
+                        self.ids.append(None)
+                        self.metadata.append(None)
+                    self.ids[row] = vector_id
+                    self.row_of[vector_id] = row
+                self.metadata[row] = metadata or {}
+                self._dirty.add(row)
+                rows.append(row)
+            rows = np.asarray(rows, dtype=np.int64)
+            self._reserve(len(self.ids))
+            if len(rows):
+                self.matrix[rows] = _normalize(values)
+
+            if self._use_ivf():
+                # Lists trained on a much smaller store no longer fit the data
+                if self.centroids is None or self.count >= 2 * self.trained_on:
+                    self._train()
+                elif len(rows):
+                    self._assign_rows(rows)
+            self._lists = None
+            if self.autosave:
+                self.save()
+
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.totals["vectors"] += len(payload)
+            self.totals["batches"] += 1
+            self.totals["seconds"] += elapsed
+        return {
+            "vectors": len(payload),
+            "batches": 1,
+            "retries": 0,
+            "seconds": round(elapsed, 4),
+            "vectors_per_sec": round(len(payload) / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def delete(self, ids) -> int:
+        with self._lock:
+            deleted = 0
+            for vector_id in ids:
+                row = self.row_of.pop(vector_id, None)
+                if row is None:
+                    continue
+                self.ids[row] = None
+                self.metadata[row] = None
+                self.free.append(row)
+                self._dirty.add(row)
+                deleted += 1
+            if deleted:
+                self._lists = None
+                if self.autosave:
+                    self.save()
+            return deleted
+
+    def fetch(self, ids) -> Dict[str, Dict]:
+        self.refresh()
+        with self._lock:
+            out = {}
+            for vector_id in ids:
+                row = self.row_of.get(vector_id)
+                if row is not None:
+                    out[vector_id] = {
+                        "values": self.matrix[row].tolist(),
+                        "metadata": self.metadata[row],
+                    }
+            return out
+
+    def query(
+        self, vector, top_k: int = 5, filter: Dict = None, include_values: bool = False
+    ) -> List[Dict]:
+        self.refresh()
+        q = _normalize(np.asarray(vector, dtype=np.float32))
+        if q.shape[-1] != self.dimension:
+            raise ValueError(f"Vector has {q.shape[-1]} dimensions, store holds {self.dimension}")
+        # Pick the rows under the lock, score them outside it so concurrent
+        # queries overlap (numpy releases the GIL in the matrix product)
+        with self._lock:
+            if not self.row_of:
+                return []
+            matrix = self.matrix
+            if self._use_ivf() and self.centroids is not None:
+                lists = self._ivf_lists()
+                probe = np.argsort(-(self.centroids @ q))[: self.nprobe]
+                rows = np.sort(np.concatenate([lists[c] for c in probe]))
+                candidates, dead = matrix[rows], []
+            else:
+                rows = np.arange(len(self.ids))
+                candidates, dead = matrix[: len(rows)], list(self.free)
+        scores = np.asarray(candidates @ q)
+        if dead:
+            scores[dead] = -np.inf
+        with self._lock:
+            return self._top(rows, scores, top_k, filter, include_values)
+
+    def _top(
+        self, rows, scores, top_k: int, filter: Dict, include_values: bool = False
+    ) -> List[Dict]:
+        """Best rows by score; with a filter, widen the candidate set until enough match."""
+        n = len(scores)
+        if top_k <= 0 or n == 0:
+            return []
+        want = top_k if not filter else top_k * 8
+        while True:
+            take = min(n, want)
+            idx = np.argpartition(-scores, take - 1)[:take] if take < n else np.arange(n)
+            idx = idx[np.argsort(-scores[idx], kind="stable")]
+            hits = []
+            for i in idx:
+                if scores[i] == -np.inf:
+                    break
+                row = int(rows[i])
+                if self.ids[row] is None:  # deleted while scoring
+                    continue
+                if matches(self.metadata[row], filter):
+                    hits.append(
+                        {
+                            "id": self.ids[row],
+                            "score": float(scores[i]),
+                            "metadata": dict(self.metadata[row]),
+                        }
+                    )
+                    if include_values:
+                        hits[-1]["values"] = self.matrix[row].tolist()
+                    if len(hits) == top_k:
+                        return hits
+            if take == n:
+                return hits
+            want *= 8
+
+    # -------------------------
+    def describe(self) -> Dict:
+        with self._lock:
+            return {
+                "backend": self.name,
+                "path": self.path,
+                "index": "ivf" if self._use_ivf() else "exact",
+                "vectors": self.count,
+                "dimension": self.dimension,
+                "lists": 0 if self.centroids is None else len(self.centroids),
+                "nprobe": self.nprobe,
+            }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            totals = dict(self.totals)
+        seconds = totals["seconds"]
+        totals["seconds"] = round(seconds, 3)
+        totals["vectors_per_sec"] = round(totals["vectors"] / seconds, 1) if seconds else 0.0
+        return totals
+
+    def clear(self):
+        with self._lock:
+            self.ids, self.metadata, self.row_of, self.free = [], [], {}, []
+            self.centroids, self.trained_on, self._lists = None, 0, None
+            self._dirty.clear()
+            self._centroids_dirty = False
+            if os.path.exists(self._ivf_path):
+                os.remove(self._ivf_path)
+            self._ivf_mtime = None
+            self.db.execute("DELETE FROM rows")
+            self.db.execute("DELETE FROM freed")
+            # Other processes reload everything on a new epoch
+            self._epoch = f"{time.time_ns()}-{os.getpid()}"
+            self.db.execute("INSERT OR REPLACE INTO meta VALUES ('epoch', ?)", (self._epoch,))
+            self.db.commit()
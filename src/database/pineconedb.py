@@ -1,25 +1,105 @@
 # src/database/pineconedb.py
+import asyncio
 import os
 import time
+import weakref
 from dotenv import load_dotenv
-from pinecone import Pinecone, ServerlessSpec
+from src.database.upsert_batcher import BatchUpserter
+from src.utils.lazy import Lazy
 
 load_dotenv()
 
-pinecone = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
 index_name = os.getenv("PINECONE_INDEX")
 region = os.getenv("PINECONE_ENV")
+# Data-plane host of the index; looked up on connect when not set
+index_host = os.getenv("PINECONE_HOST")
+# Width of stored vectors; same variable as embedding_generator.EMBEDDING_DIM
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))
 
-if index_name not in pinecone.list_indexes().names():
-    pinecone.create_index(
-        name=index_name,
-        dimension=1024,
-        metric="cosine",
-        spec=ServerlessSpec(cloud="aws", region=region),
-    )
-    time.sleep(2)
 
-index = pinecone.Index(index_name)
+def _connect():
+    """Open the index, creating it on first use (network calls)."""
+    global index_host
+    from pinecone import Pinecone, ServerlessSpec
+
+    pinecone = Pinecone(api_key=os.getenv("PINECONE_API_KEY"))
+    if index_name not in pinecone.list_indexes().names():
+        pinecone.create_index(
+            name=index_name,
+            dimension=EMBEDDING_DIM,
+            metric="cosine",
+            spec=ServerlessSpec(cloud="aws", region=region),
+        )
+        time.sleep(2)
+    else:
+        # One index never mixes widths: vectors of another dimension would be
+        # rejected on upsert, and scores across widths are not comparable
+        index_dim = pinecone.describe_index(index_name).dimension
+        if index_dim != EMBEDDING_DIM:
+            raise RuntimeError(
+                f"Pinecone index '{index_name}' has dimension {index_dim} but "
+                f"EMBEDDING_DIM={EMBEDDING_DIM}. Use another PINECONE_INDEX or "
+                f"delete the index to re-create it at the new width."
+            )
+    if not index_host:
+        index_host = pinecone.describe_index(index_name).host
+    return pinecone.Index(index_name)
+
+
+pinecone_index = Lazy(
+    "pinecone_index", _connect, warmup=lambda index: index.describe_index_stats()
+)
+# Size-aware, concurrent, retrying upserts (see upsert_batcher)
+upserter = Lazy("upserter", lambda: BatchUpserter(get_index()), required=False)
+
+
+def get_index():
+    return pinecone_index.get()
+
+
+# The asyncio client (pinecone[asyncio]) holds an aiohttp session, which
+# belongs to one event loop: one client per loop, dropped with the loop.
+# The per-loop lock keeps concurrent first calls from each building one.
+_async_indexes = weakref.WeakKeyDictionary()
+_async_locks = weakref.WeakKeyDictionary()
+
+
+async def get_async_index():
+    loop = asyncio.get_running_loop()
+    index = _async_indexes.get(loop)
+    if index is not None:
+        return index
+    lock = _async_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        index = _async_indexes.get(loop)
+        if index is None:
+            from pinecone import Pinecone
+
+            if not pinecone_index.loaded:
+                # First use: creates/checks the index and resolves its host
+                await asyncio.to_thread(get_index)
+            index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).IndexAsyncio(host=index_host)
+            _async_indexes[loop] = index
+    return index
+
+
+async def aclose_async_index():
+    """Close the running loop's asyncio client (its aiohttp session), if any."""
+    index = _async_indexes.pop(asyncio.get_running_loop(), None)
+    if index is not None:
+        await index.close()
+
+
+def _check_dimension(values):
+    if len(values) != EMBEDDING_DIM:
+        raise ValueError(
+            f"Vector has {len(values)} dimensions, index '{index_name}' stores {EMBEDDING_DIM}"
+        )
+
+
+def index_target():
+    """What the ingest manifest describes: vectors of this width in this index."""
+    return {"index": index_name, "dimension": EMBEDDING_DIM}
 
 
 def upsert_vectors(vectors):
@@ -27,12 +107,86 @@ def upsert_vectors(vectors):
         (vector["id"], vector["embedding"], vector.get("metadata", {}))
         for vector in vectors
     ]
-    index.upsert(payload)
+    for _, values, _ in payload:
+        _check_dimension(values)
+    return upserter.get().upsert(payload)
 
 
-def query_vector(vector, top_k=5):
-    result = index.query(vector=vector, top_k=top_k, include_metadata=True)
-    return [
-        {"id": match.id, "score": match.score, "metadata": match.metadata}
-        for match in result.matches
-    ]
+def upsert_stats():
+    if not upserter.loaded:
+        return {"vectors": 0, "batches": 0, "retries": 0, "seconds": 0.0, "vectors_per_sec": 0.0}
+    return upserter.get().stats()
+
+
+def _matches(result, include_values: bool):
+    hits = []
+    for match in result.matches:
+        hits.append({"id": match.id, "score": match.score, "metadata": match.metadata})
+        if include_values:
+            hits[-1]["values"] = match.values
+    return hits
+
+
+def query_vector(vector, top_k=5, filter=None, include_values=False):
+    _check_dimension(vector)
+    result = get_index().query(
+        vector=vector,
+        top_k=top_k,
+        filter=filter,
+        include_metadata=True,
+        include_values=include_values,
+    )
+    return _matches(result, include_values)
+
+
+async def aquery_vector(vector, top_k=5, filter=None, include_values=False):
+    """query_vector over non-blocking HTTP."""
+    _check_dimension(vector)
+    index = await get_async_index()
+    result = await index.query(
+        vector=vector,
+        top_k=top_k,
+        filter=filter,
+        include_metadata=True,
+        include_values=include_values,
+    )
+    return _matches(result, include_values)
+
+
+def delete_vectors(ids, batch_size=1000):
+    ids = list(ids)
+    for start in range(0, len(ids), batch_size):
+        get_index().delete(ids=ids[start : start + batch_size])
+
+
+def fetch_vectors(ids, batch_size=1000):
+    ids = list(ids)
+    out = {}
+    for start in range(0, len(ids), batch_size):
+        result = get_index().fetch(ids=ids[start : start + batch_size])
+        for vector_id, vector in result.vectors.items():
+            out[vector_id] = {"values": list(vector.values), "metadata": vector.metadata}
+    return out
+
+
+async def afetch_vectors(ids, batch_size=1000):
+    ids = list(ids)
+    index = await get_async_index()
+    results = await asyncio.gather(
+        *(index.fetch(ids=ids[start : start + batch_size]) for start in range(0, len(ids), batch_size))
+    )
+    out = {}
+    for result in results:
+        for vector_id, vector in result.vectors.items():
+            out[vector_id] = {"values": list(vector.values), "metadata": vector.metadata}
+    return out
+
+
+def describe_index():
+    stats = get_index().describe_index_stats()
+    return {
+        "backend": "pinecone",
+        "index": index_name,
+        "vectors": stats.total_vector_count,
+        "dimension": EMBEDDING_DIM,
+    }
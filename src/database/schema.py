@@ -1,10 +1,32 @@
 # src/database/schema.py
-from pydantic import BaseModel
+import os
+from typing import List, Literal, Optional
+from dotenv import load_dotenv
+from pydantic import BaseModel, Field
+
+load_dotenv()
+
+# Per-request caps: candidate_k is the vector fetch, BM25 pass and
+# cross-encoder batch of every query in the request
+SEARCH_MAX_TOP_K = int(os.getenv("SEARCH_MAX_TOP_K", "100"))
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "500"))
 
 
 class SearchResult(BaseModel):
     question: str
-    top_k: int = 5
+    top_k: int = Field(5, ge=1, le=SEARCH_MAX_TOP_K)
+    # hits reranked before keeping top_k
+    candidate_k: Optional[int] = Field(None, ge=1, le=SEARCH_MAX_CANDIDATES)
+    rerank: Literal["auto", "always", "never"] = "auto"  # "auto": cascade may skip the reranker
+    budget_ms: Optional[float] = None  # cross-encoder time cap for this request
+
+
+class BatchSearchRequest(BaseModel):
+    questions: List[str]
+    top_k: int = Field(5, ge=1, le=SEARCH_MAX_TOP_K)
+    candidate_k: Optional[int] = Field(None, ge=1, le=SEARCH_MAX_CANDIDATES)
+    rerank: Literal["auto", "always", "never"] = "auto"
+    budget_ms: Optional[float] = None
 
 
 class ConversationRequest(BaseModel):
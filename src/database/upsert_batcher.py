@@ -0,0 +1,140 @@
+# src/database/upsert_batcher.py
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Pinecone rejects upsert requests above 2 MB or 1000 vectors
+UPSERT_MAX_BATCH_VECTORS = int(os.getenv("UPSERT_MAX_BATCH_VECTORS", "200"))
+UPSERT_MAX_BATCH_BYTES = int(os.getenv("UPSERT_MAX_BATCH_BYTES", str(1900 * 1024)))
+UPSERT_CONCURRENCY = int(os.getenv("UPSERT_CONCURRENCY", "4"))
+UPSERT_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "4"))
+UPSERT_BACKOFF_SECONDS = float(os.getenv("UPSERT_BACKOFF_SECONDS", "0.5"))
+
+# Request bodies are JSON: a float32 value serializes to up to ~20 characters
+BYTES_PER_VALUE = 20
+TRANSIENT_STATUS = (408, 429, 500, 502, 503, 504)
+
+VectorTuple = Tuple[str, List[float], Dict]
+
+
+def estimate_bytes(vector: VectorTuple) -> int:
+    vector_id, values, metadata = vector
+    meta = len(json.dumps(metadata, ensure_ascii=False)) if metadata else 0
+    return len(vector_id) + len(values) * BYTES_PER_VALUE + meta + 32
+
+
+def make_batches(
+    payload: List[VectorTuple],
+    max_vectors: int = UPSERT_MAX_BATCH_VECTORS,
+    max_bytes: int = UPSERT_MAX_BATCH_BYTES,
+) -> List[List[VectorTuple]]:
+    """Split vectors into consecutive batches under both the count and byte limit."""
+    batches, current, current_bytes = [], [], 0
+    for vector in payload:
+        size = estimate_bytes(vector)
+        if current and (len(current) >= max_vectors or current_bytes + size > max_bytes):
+            batches.append(current)
+            current, current_bytes = [], 0
+        current.append(vector)
+        current_bytes += size
+    if current:
+        batches.append(current)
+    return batches
+
+
+def is_transient(error: Exception) -> bool:
+    """Rate limits, server errors, timeouts and dropped connections are retried."""
+    status = getattr(error, "status", None) or getattr(error, "status_code", None)
+    if status in TRANSIENT_STATUS:
+        return True
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    name = type(error).__name__
+    return any(word in name for word in ("Timeout", "Connection", "Service", "Protocol"))
+
+
+# -------------------------
+class BatchUpserter:
+    """
+    Upsert through a bounded thread pool: vectors are split by count and
+    estimated request size, batches are sent concurrently, and transient
+    failures are retried with exponential backoff and jitter.
+    """
+
+    def __init__(
+        self,
+        index,
+        max_vectors: int = UPSERT_MAX_BATCH_VECTORS,
+        max_bytes: int = UPSERT_MAX_BATCH_BYTES,
+        concurrency: int = UPSERT_CONCURRENCY,
+        max_retries: int = UPSERT_MAX_RETRIES,
+        backoff_seconds: float = UPSERT_BACKOFF_SECONDS,
+    ):
+        self.index = index
+        self.max_vectors = max_vectors
+        self.max_bytes = max_bytes
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, concurrency), thread_name_prefix="upsert"
+        )
+        self.totals = {"vectors": 0, "batches": 0, "retries": 0, "seconds": 0.0}
+        self._lock = threading.Lock()
+
+    def _send(self, batch: List[VectorTuple]) -> int:
+        """Send one batch; returns how many retries it needed."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.index.upsert(vectors=batch)
+                return attempt
+            except Exception as e:
+                if attempt == self.max_retries or not is_transient(e):
+                    raise
+                delay = self.backoff_seconds * (2**attempt)
+                time.sleep(delay * (0.5 + random.random()))
+
+    def upsert(self, payload: List[VectorTuple]) -> Dict:
+        started = time.perf_counter()
+        batches = make_batches(payload, self.max_vectors, self.max_bytes)
+        futures = [self.executor.submit(self._send, batch) for batch in batches]
+
+        retries, errors = 0, []
+        for future in futures:
+            try:
+                retries += future.result()
+            except Exception as e:
+                errors.append(e)
+        elapsed = time.perf_counter() - started
+
+        sent = sum(len(b) for b, f in zip(batches, futures) if f.exception() is None)
+        with self._lock:
+            self.totals["vectors"] += sent
+            self.totals["batches"] += len(batches)
+            self.totals["retries"] += retries
+            self.totals["seconds"] += elapsed
+        if errors:
+            raise RuntimeError(
+                f"{len(errors)}/{len(batches)} upsert batches failed: {errors[0]}"
+            )
+        return {
+            "vectors": len(payload),
+            "batches": len(batches),
+            "retries": retries,
+            "seconds": round(elapsed, 4),
+            "vectors_per_sec": round(len(payload) / elapsed, 1) if elapsed else 0.0,
+        }
+
+    def stats(self) -> Dict:
+        with self._lock:
+            totals = dict(self.totals)
+        seconds = totals["seconds"]
+        totals["seconds"] = round(seconds, 3)
+        totals["vectors_per_sec"] = round(totals["vectors"] / seconds, 1) if seconds else 0.0
+        return totals
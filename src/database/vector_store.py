@@ -0,0 +1,269 @@
+# src/database/vector_store.py
+import os
+from abc import ABC, abstractmethod
+from typing import Dict, List
+from dotenv import load_dotenv
+from src.core.model_executor import run_model
+from src.core.query_cache import invalidate_results
+from src.database.bm25_index import BM25_ENABLED, BM25_PATH, BM25Index
+from src.database.chunk_store import CHUNK_STORE_ENABLED, CHUNK_STORE_PATH, ChunkStore
+from src.utils.lazy import Lazy
+
+load_dotenv()
+
+# pinecone = managed index (network round trip per call)
+# local    = in-process index under LOCAL_STORE_PATH (see local_vector_store)
+VECTOR_STORE = os.getenv("VECTOR_STORE", "pinecone").lower()
+LOCAL_STORE_PATH = os.getenv("LOCAL_STORE_PATH", ".cache/vector_store")
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))
+STORES = ("pinecone", "local")
+
+
+# -------------------------
+class VectorStore(ABC):
+    """
+    What retrieval and ingestion need from a vector index. Vectors are
+    (id, values, metadata) tuples, scores are cosine similarities, and
+    filters use Pinecone's metadata filter syntax on every backend.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def upsert(self, payload: List[tuple]) -> Dict:
+        """Insert or replace the (id, values, metadata) vectors."""
+
+    @abstractmethod
+    def query(
+        self, vector, top_k: int = 5, filter: Dict = None, include_values: bool = False
+    ) -> List[Dict]:
+        """[{"id", "score", "metadata"}, ...], best first (and "values" if asked)."""
+
+    @abstractmethod
+    def delete(self, ids):
+        """Remove the ids (unknown ids are ignored)."""
+
+    @abstractmethod
+    def fetch(self, ids) -> Dict[str, Dict]:
+        """{id: {"values", "metadata"}} for the ids that exist."""
+
+    # Async reads default to the blocking ones on the model executor;
+    # network backends override them with non-blocking I/O
+    async def aquery(
+        self, vector, top_k: int = 5, filter: Dict = None, include_values: bool = False
+    ) -> List[Dict]:
+        return await run_model(
+            self.query, vector, top_k=top_k, filter=filter, include_values=include_values
+        )
+
+    async def afetch(self, ids) -> Dict[str, Dict]:
+        return await run_model(self.fetch, ids)
+
+    async def aclose(self):
+        """Release what the async reads opened on the running loop."""
+
+    @abstractmethod
+    def describe(self) -> Dict:
+        """Index configuration and size (also the warm-up call)."""
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Write-path counters, for GET /stats."""
+
+
+class PineconeStore(VectorStore):
+    """The managed index in pineconedb (persistence is Pinecone's)."""
+
+    name = "pinecone"
+
+    def __init__(self):
+        # Imported here so a local setup never registers or connects Pinecone
+        from src.database import pineconedb
+
+        self.db = pineconedb
+
+    def upsert(self, payload):
+        return self.db.upsert_vectors(
+            [{"id": i, "embedding": v, "metadata": m} for i, v, m in payload]
+        )
+
+    def query(self, vector, top_k=5, filter=None, include_values=False):
+        return self.db.query_vector(
+            vector, top_k=top_k, filter=filter, include_values=include_values
+        )
+
+    def delete(self, ids):
+        self.db.delete_vectors(ids)
+
+    def fetch(self, ids):
+        return self.db.fetch_vectors(ids)
+
+    async def aquery(self, vector, top_k=5, filter=None, include_values=False):
+        return await self.db.aquery_vector(
+            vector, top_k=top_k, filter=filter, include_values=include_values
+        )
+
+    async def afetch(self, ids):
+        return await self.db.afetch_vectors(ids)
+
+    async def aclose(self):
+        await self.db.aclose_async_index()
+
+    def describe(self):
+        return self.db.describe_index()
+
+    def stats(self):
+        return self.db.upsert_stats()
+
+    def target(self) -> Dict:
+        return self.db.index_target()
+
+
+def _create_store() -> VectorStore:
+    if VECTOR_STORE == "pinecone":
+        return PineconeStore()
+    if VECTOR_STORE == "local":
+        from src.database.local_vector_store import LocalVectorStore
+
+        return LocalVectorStore(LOCAL_STORE_PATH, EMBEDDING_DIM)
+    raise ValueError(f"Unknown VECTOR_STORE: {VECTOR_STORE} (choose from {STORES})")
+
+
+vector_store = Lazy("vector_store", _create_store, warmup=lambda store: store.describe())
+
+
+def get_store() -> VectorStore:
+    return vector_store.get()
+
+
+# BM25 over the same chunks, updated by every upsert/delete below
+lexical_index = (
+    Lazy("bm25_index", lambda: BM25Index(BM25_PATH, target=index_target()))
+    if BM25_ENABLED
+    else None
+)
+# Chunk text by vector id, so the vector index only stores compact metadata
+chunk_store = (
+    Lazy("chunk_store", lambda: ChunkStore(CHUNK_STORE_PATH, target=index_target()))
+    if CHUNK_STORE_ENABLED
+    else None
+)
+
+
+# -------------------------
+# What the rest of the app calls; any write invalidates cached query results
+def index_target():
+    """What the ingest manifest describes: vectors of this width in this store."""
+    if VECTOR_STORE == "local":
+        return {"index": f"local:{os.path.abspath(LOCAL_STORE_PATH)}", "dimension": EMBEDDING_DIM}
+    return get_store().target()
+
+
+def upsert_vectors(vectors):
+    payload = [
+        (vector["id"], vector["embedding"], vector.get("metadata", {}))
+        for vector in vectors
+    ]
+    texts = [(vector_id, metadata.get("chunk_text", "")) for vector_id, _, metadata in payload]
+    if chunk_store is not None:
+        # Text first, so a vector is never queryable without its text
+        chunk_store.get().put_many(texts)
+        payload = [
+            (vector_id, values, {k: v for k, v in metadata.items() if k != "chunk_text"})
+            for vector_id, values, metadata in payload
+        ]
+    try:
+        result = get_store().upsert(payload)
+        if lexical_index is not None:
+            lexical_index.get().add(texts)
+        return result
+    finally:
+        # Even a partly failed upsert may have changed the index
+        invalidate_results()
+
+
+def query_vector(vector, top_k=5, filter=None, include_values=False):
+    return get_store().query(vector, top_k=top_k, filter=filter, include_values=include_values)
+
+
+async def aquery_vector(vector, top_k=5, filter=None, include_values=False):
+    store = get_store() if vector_store.loaded else await run_model(get_store)
+    return await store.aquery(vector, top_k=top_k, filter=filter, include_values=include_values)
+
+
+async def aclose_vector_store():
+    """On shutdown: close the async clients the running loop opened."""
+    if vector_store.loaded:
+        await vector_store.get().aclose()
+
+
+def delete_vectors(ids):
+    ids = list(ids)
+    try:
+        get_store().delete(ids)
+        if lexical_index is not None:
+            lexical_index.get().delete(ids)
+        if chunk_store is not None:
+            chunk_store.get().delete_many(ids)
+    finally:
+        invalidate_results()
+
+
+def attach_chunk_texts(hits: List[Dict]) -> List[Dict]:
+    """
+    Put metadata["chunk_text"] on hits from the chunk store, in one bulk
+    lookup. Hits that already carry it (vectors upserted before the chunk
+    store existed) are left as they are.
+    """
+    if chunk_store is None:
+        return hits
+    missing = [hit for hit in hits if "chunk_text" not in (hit.get("metadata") or {})]
+    if missing:
+        texts = chunk_store.get().get_many([hit["id"] for hit in missing])
+        for hit in missing:
+            hit["metadata"] = {**(hit.get("metadata") or {}), "chunk_text": texts.get(hit["id"], "")}
+    return hits
+
+
+def lexical_search(query: str, top_k: int = 5):
+    """[(vector_id, bm25_score), ...] from the BM25 index; [] when disabled."""
+    if lexical_index is None:
+        return []
+    return lexical_index.get().search(query, top_k)
+
+
+def flush():
+    """Snapshot what was logged between writes (end of an ingestion run)."""
+    if lexical_index is not None and lexical_index.loaded:
+        lexical_index.get().save()
+
+
+def chunk_store_stats():
+    if chunk_store is None:
+        return {"enabled": False}
+    if not chunk_store.loaded:
+        return {"enabled": True, "loaded": False}
+    return {"enabled": True, **chunk_store.get().stats()}
+
+
+def lexical_stats():
+    if lexical_index is None:
+        return {"enabled": False}
+    if not lexical_index.loaded:
+        return {"enabled": True, "loaded": False}
+    return {"enabled": True, **lexical_index.get().stats()}
+
+
+def fetch_vectors(ids):
+    return get_store().fetch(list(ids))
+
+
+async def afetch_vectors(ids):
+    store = get_store() if vector_store.loaded else await run_model(get_store)
+    return await store.afetch(list(ids))
+
+
+def upsert_stats():
+    if not vector_store.loaded:
+        return {"vectors": 0, "batches": 0, "retries": 0, "seconds": 0.0, "vectors_per_sec": 0.0}
+    return get_store().stats()
@@ -1,10 +1,13 @@
 # src/main.py
 import asyncio
 import os
+import time
+from contextlib import asynccontextmanager
 
 import uvicorn
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse
 
 from src.agents.mcp_client import get_history, get_session_id, mcp_reply
 from src.agents.supervisor_agent import SupervisorAgent, get_history_agents
@@ -14,19 +17,61 @@ from src.core.conversation_memory import (
     get_history_tools_calling,
     reply,
 )
-from src.core.embedding_generator import embed_chunks
-from src.core.retriever import retrieve_and_rerank
-from src.core.text_chunker import semantic_chunk
+from src.core.context_packing import packing_stats
+from src.core.embedding_batcher import embedding_batcher_stats
+from src.core.embedding_generator import embedding_cache_stats
+from src.core.embedding_pool import embedding_pool_stats
+from src.core.query_cache import query_cache_stats
+from src.core.ingestion_pipeline import IngestionPipeline
+from src.core.job_manager import job_manager
+from src.core.model_executor import model_executor_stats
+from src.core.retriever import aretrieve_and_rerank, aretrieve_and_rerank_many, rerank_stats
 from src.database.knowledge_graph_builder import build_graph
-from src.database.pineconedb import upsert_vectors
-from src.database.schema import ConversationRequest, SearchResult
-from src.utils.file_loader import read_file
+from src.database.vector_store import (
+    aclose_vector_store,
+    chunk_store_stats,
+    lexical_stats,
+    upsert_stats,
+)
+from src.database.schema import BatchSearchRequest, ConversationRequest, SearchResult
+from src.utils.lazy import resource_status, resources_ready, warmup_all
 
 load_dotenv()
 
+# Models and clients are created on first use. At startup they are loaded
+# and exercised with a dummy batch in the background, so "/" answers at once
+# and "/ready" tells when the first request will no longer pay for it.
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "1") != "0"
+warmup_state = {"status": "off", "seconds": None, "errors": {}}
+# Largest accepted /search/batch request
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "256"))
+
+
+def warmup():
+    warmup_state["status"] = "running"
+    started = time.perf_counter()
+    errors = warmup_all()
+    warmup_state.update(
+        status="failed" if errors else "done",
+        seconds=round(time.perf_counter() - started, 3),
+        errors=errors,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    task = None
+    if WARMUP_ON_STARTUP:
+        warmup_state["status"] = "pending"
+        task = asyncio.create_task(asyncio.to_thread(warmup))
+    yield
+    if task is not None and not task.done():
+        task.cancel()
+    await aclose_vector_store()
+
 
 # -------------------------
-app = FastAPI(title="RAG Demo")
+app = FastAPI(title="RAG Demo", lifespan=lifespan)
 DATA_FOLDER = "src/data/"
 
 
@@ -36,71 +81,148 @@ def read_root():
     return {"message": "FastAPI server is running! Use /docs để test API."}
 
 
+# -------------------------
+@app.get("/ready")
+def ready():
+    """
+    Readiness, as opposed to "/" (liveness): 200 once the embedding model,
+    reranker and vector index are loaded and warm-up has finished, else 503.
+    """
+    is_ready = resources_ready() and warmup_state["status"] not in ("pending", "running")
+    body = {"ready": is_ready, "warmup": warmup_state, "resources": resource_status()}
+    if not is_ready:
+        return JSONResponse(status_code=503, content=body)
+    return body
+
+
+# -------------------------
+@app.get("/stats")
+def stats():
+    """Cache and throughput counters of the retrieval stack"""
+    return {
+        "embedding_cache": embedding_cache_stats(),
+        "query_batching": embedding_batcher_stats(),
+        "embedding_pool": embedding_pool_stats(),
+        "query_cache": query_cache_stats(),
+        "rerank": rerank_stats(),
+        "model_executor": model_executor_stats(),
+        "upserts": upsert_stats(),
+        "bm25": lexical_stats(),
+        "chunk_store": chunk_store_stats(),
+        "context_packing": packing_stats(),
+    }
+
+
 # -------------------------
 @app.post("/ingest-folder")
-def ingest_folder():
-    """Load all files, chunk, embed, store in Pinecone"""
+def ingest_folder(force: bool = False):
+    """
+    Start a background job that loads all files, chunks, embeds and stores
+    them in Pinecone (staged pipeline). Unchanged files are skipped unless
+    force=true. Poll GET /jobs/{job_id} for progress; the job ends
+    "completed", "partial" (some files failed, see result.files_failed and
+    the per-file errors) or "failed" (no file got through).
+    """
     if not os.path.exists(DATA_FOLDER):
         raise HTTPException(status_code=400, detail="Data folder not found")
 
-    ingested = []
-    for fname in os.listdir(DATA_FOLDER):
-        path = os.path.join(DATA_FOLDER, fname)
-
-        text = read_file(path)
-        chunks = semantic_chunk(text)
-        chunk_texts = [chunk["chunk_text"] for chunk in chunks]
-        embeddings = embed_chunks(chunk_texts)
-
-        vectors = []
-        for chunk, embedding in zip(chunks, embeddings):
-            vectors.append(
-                {
-                    "id": f"{fname}_{chunk['chunk_index']}",
-                    "embedding": embedding["embedding"],
-                    "metadata": {
-                        "chunk_text": chunk["chunk_text"],
-                        "chunk_index": chunk["chunk_index"],
-                        "file_name": fname,
-                    },
-                }
-            )
-        if vectors:
-            upsert_vectors(vectors)
-        ingested.append({"file": fname, "chunks": len(chunks)})
-    return {"status": "Ingestion completed successfully", "ingested": ingested}
+    paths = [os.path.join(DATA_FOLDER, fname) for fname in os.listdir(DATA_FOLDER)]
+    job = job_manager.submit(
+        "ingest",
+        lambda job: IngestionPipeline(job=job).run(paths, force=force),
+        serial=True,  # one manifest / BM25 index: concurrent runs would overwrite each other
+        folder=DATA_FOLDER,
+        force=force,
+    )
+    return {"status": "Ingestion started in background", "job_id": job.id}
 
 
 # -------------------------
 @app.post("/build-knowledge-graph")
-async def build_knowledge_graph():
+def build_knowledge_graph():
     """
-    Run the knowledge graph builder using Groq and push data to Neo4j.
+    Start a background job that runs the knowledge graph builder using Groq
+    and pushes data to Neo4j. Poll GET /jobs/{job_id} for progress.
     """
-    try:
-        asyncio.create_task(build_graph())
-        return {
-            "status": "Graph building started in background",
-            "message": "Please check logs or Neo4j Browser for progress.",
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    job = job_manager.submit(
+        "knowledge_graph", lambda job: asyncio.run(build_graph(job)), folder=DATA_FOLDER
+    )
+    return {"status": "Graph building started in background", "job_id": job.id}
+
+
+# -------------------------
+@app.get("/jobs")
+def list_jobs():
+    return {"jobs": job_manager.list()}
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.as_dict()
+
+
+@app.delete("/jobs/{job_id}")
+def cancel_job(job_id: str):
+    """Ask a job to stop; it finishes the item in hand and then exits."""
+    job = job_manager.cancel(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job_id": job.id, "status": job.status}
 
 
 # -------------------------
 @app.post("/search")
-def search(req: SearchResult):
+async def search(req: SearchResult):
     """Hybrid search: semantic + full-text"""
-    semantic_hits = retrieve_and_rerank(query=req.question, top_k=req.top_k)
+    semantic_hits, rerank = await aretrieve_and_rerank(
+        query=req.question,
+        top_k=req.top_k,
+        candidate_k=req.candidate_k,
+        with_stats=True,
+        rerank=req.rerank,
+        budget_ms=req.budget_ms,
+    )
 
-    return {"query": req.question, "results": semantic_hits}
+    return {"query": req.question, "results": semantic_hits, "rerank": rerank}
+
+
+@app.post("/search/batch")
+async def search_batch(req: BatchSearchRequest):
+    """
+    /search for many questions in one call: one embedding pass, concurrent
+    vector queries and one cross-encoder batch. Results keep input order.
+    """
+    if len(req.questions) > SEARCH_BATCH_MAX_QUERIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {SEARCH_BATCH_MAX_QUERIES} questions per batch",
+        )
+    if not req.questions:
+        return {"results": []}
+    all_hits, all_rerank = await aretrieve_and_rerank_many(
+        req.questions,
+        top_k=req.top_k,
+        candidate_k=req.candidate_k,
+        with_stats=True,
+        rerank=req.rerank,
+        budget_ms=req.budget_ms,
+    )
+    return {
+        "results": [
+            {"query": question, "results": hits, "rerank": rerank}
+            for question, hits, rerank in zip(req.questions, all_hits, all_rerank)
+        ]
+    }
 
 
 # -------------------------
 @app.post("/chat-function-calling")
 def chat_function_calling(req: ConversationRequest):
     session_id = check_or_create_session_id(getattr(req, "session_id", None))
-    answer, trace = reply(session_id, req.user_input)
+    answer, trace, context = reply(session_id, req.user_input)
 
     selected_tool = None
     for step in trace:
@@ -112,6 +234,7 @@ def chat_function_calling(req: ConversationRequest):
         "session_id": session_id,
         "reply": answer,
         "trace": trace,
+        "context": context,
         "history": get_history_tools_calling(session_id),
         "selected_tool": selected_tool,
     }
@@ -1,7 +1,12 @@
 # src/utils/clear_all_data.py
 import os
+import shutil
 from pinecone import Pinecone
 from dotenv import load_dotenv
+from src.database.ingest_manifest import reset_manifest
+from src.database.bm25_index import BM25_PATH
+from src.database.chunk_store import CHUNK_STORE_PATH
+from src.database.vector_store import LOCAL_STORE_PATH
 
 load_dotenv()
 
@@ -27,6 +32,39 @@ def clear_pinecone():
     index.delete(delete_all=True)
     print(f"Pinecone: All vectors deleted from index '{PINECONE_INDEX}'.")
 
+    # The ingest manifest, chunk texts and BM25 index describe what is in the
+    # index, so they go too
+    reset_manifest()
+    clear_chunk_store()
+    clear_bm25_index()
+
+
+def clear_local_store():
+    """VECTOR_STORE=local: the whole store is one directory."""
+    if not os.path.isdir(LOCAL_STORE_PATH):
+        print(f"Local vector store '{LOCAL_STORE_PATH}' not found.")
+        return
+    shutil.rmtree(LOCAL_STORE_PATH)
+    print(f"Local vector store '{LOCAL_STORE_PATH}' deleted.")
+    reset_manifest()
+    clear_chunk_store()
+    clear_bm25_index()
+
+
+def clear_chunk_store():
+    """The SQLite file plus its WAL and shared-memory files."""
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(CHUNK_STORE_PATH + suffix):
+            os.remove(CHUNK_STORE_PATH + suffix)
+    print(f"Chunk store '{CHUNK_STORE_PATH}' deleted.")
+
+
+def clear_bm25_index():
+    """Left behind, deleted ids would keep taking lexical candidate slots."""
+    if os.path.isdir(BM25_PATH):
+        shutil.rmtree(BM25_PATH)
+    print(f"BM25 index '{BM25_PATH}' deleted.")
+
 
 # python -m src.utils.clear_all_data
 # -------------------------
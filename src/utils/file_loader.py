@@ -1,9 +1,27 @@
 # src/utils/file_loader.py
+import multiprocessing
 import os
+import signal
+import threading
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterator, List
 from fastapi import HTTPException
 from docx import Document
 import pdfplumber
 
+SUPPORTED_EXTENSIONS = (".txt", ".pdf", ".docx")
+
+# Parallel loader settings
+LOADER_WORKERS = int(os.getenv("LOADER_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Seconds per document, counted from when its first task starts in a worker
+LOADER_TIMEOUT = float(os.getenv("LOADER_TIMEOUT", "300"))
+LOADER_PDF_PAGES_PER_TASK = int(os.getenv("LOADER_PDF_PAGES_PER_TASK", "16"))
+# How often a waiting collect() checks for workers stuck on timed-out documents
+REAP_INTERVAL = 1.0
+
 
 def read_file(path: str) -> str:
     file = os.path.splitext(path)[
@@ -25,6 +43,279 @@ def read_file(path: str) -> str:
         raise HTTPException(status_code=400, detail=f"Unsupported file type: {file}")
 
 
+# -------------------------
+def iter_file(path: str) -> Iterator[str]:
+    """
+    Stream a document instead of building one big string: PDFs yield one
+    page at a time, DOCX one paragraph, TXT one blank-line separated
+    paragraph. Only the current page/paragraph is held in memory.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".txt":
+        lines = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    lines.append(line)
+                elif lines:
+                    yield "".join(lines)
+                    lines = []
+        if lines:
+            yield "".join(lines)
+    elif ext == ".pdf":
+        with pdfplumber.open(path) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text() or ""
+                # Drop parsed layout objects so pages do not accumulate
+                page.close()
+                if text:
+                    yield text
+    elif ext == ".docx":
+        for paragraph in Document(path).paragraphs:
+            if paragraph.text:
+                yield paragraph.text
+    else:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {ext}")
+
+
+# -------------------------
+# Process-pool loading. Worker functions live at module level so they can be
+# pickled into spawned processes.
+_task_starts = None  # worker side: where _run_task reports (task id, pid, start time)
+
+
+def _init_worker(starts):
+    global _task_starts
+    _task_starts = starts
+
+
+def _run_task(task_id: int, fn, *args):
+    _task_starts.put((task_id, os.getpid(), time.time()))
+    return fn(*args)
+
+
+def _pdf_page_count(path: str) -> int:
+    with pdfplumber.open(path) as pdf:
+        return len(pdf.pages)
+
+
+def _extract_pdf_pages(path: str, start: int, stop: int) -> List[Dict]:
+    """Extract pages [start, stop); a page that fails is reported, not raised."""
+    pages = []
+    with pdfplumber.open(path) as pdf:
+        for number in range(start, stop):
+            try:
+                pages.append({"page": number, "text": pdf.pages[number].extract_text() or ""})
+            except Exception as e:
+                pages.append({"page": number, "error": str(e)})
+    return pages
+
+
+class ParallelLoader:
+    """
+    Parse documents in a process pool so extraction runs outside the request
+    thread and the GIL. PDFs with many pages are split into page ranges that
+    run in parallel; DOCX/TXT files are read one per task. Text comes back in
+    the same order and form as read_file, minus pages that failed, which are
+    listed in "failed_pages" instead of failing the document.
+
+    Workers report which task they start, so a document's timeout runs from
+    when it starts parsing, not from when it was queued. A document that
+    times out has the workers running its tasks terminated and the pool is
+    replaced right away; tasks of other documents lost with the old pool
+    are resubmitted. Safe to use from several threads.
+    """
+
+    def __init__(
+        self,
+        workers: int = LOADER_WORKERS,
+        timeout: float = LOADER_TIMEOUT,
+        pages_per_task: int = LOADER_PDF_PAGES_PER_TASK,
+    ):
+        self.timeout = timeout
+        self.pages_per_task = max(1, pages_per_task)
+        self.workers = max(1, workers)
+        self.restarts = 0
+        # spawn: the API process runs model threads, which fork does not copy safely
+        self._context = multiprocessing.get_context("spawn")
+        self._starts = self._context.SimpleQueue()
+        self._pids: Dict[int, int] = {}  # task id -> worker pid (current pool)
+        self._started: Dict[int, float] = {}  # task id -> first start time
+        self._abandoned = set()  # task ids of timed-out documents
+        self._pending: List[Dict] = []  # submitted, not yet collected
+        self._next_task = 0
+        self._lock = threading.RLock()
+        self.pool = self._new_pool()
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=_init_worker,
+            initargs=(self._starts,),
+        )
+
+    def _submit_task(self, job: Dict, fn, *args):
+        with self._lock:
+            task_id = self._next_task
+            self._next_task += 1
+            job["tasks"].append((task_id, fn, args))
+            job["futures"].append(self.pool.submit(_run_task, task_id, fn, *args))
+
+    def _restart(self):
+        """
+        Replace the pool. Tasks of pending documents that the old pool lost
+        are resubmitted once; a task lost twice stays failed, and timed-out
+        documents are not resubmitted.
+        """
+        with self._lock:
+            old, self.pool = self.pool, self._new_pool()
+            # A terminated worker breaks the old pool: wait until it has
+            # failed or finished every future, so their states are final
+            old.shutdown(wait=True, cancel_futures=True)
+            self.restarts += 1
+            self._abandoned.clear()
+            self._pids.clear()
+            for job in self._pending:
+                if job.get("timed_out"):
+                    continue
+                for i, (task_id, fn, args) in enumerate(job["tasks"]):
+                    future = job["futures"][i]
+                    lost = future.cancelled() or future.exception() is not None
+                    if lost and task_id not in job["retried"]:
+                        job["retried"].add(task_id)
+                        job["futures"][i] = self.pool.submit(_run_task, task_id, fn, *args)
+
+    def _reap(self):
+        """
+        Time out pending documents whose parse started more than `timeout`
+        ago, and terminate the workers running their tasks (replacing the
+        pool). Called by every waiting collect(), so a stuck document is
+        stopped even while nobody is collecting it.
+        """
+        with self._lock:
+            while not self._starts.empty():
+                task_id, pid, started = self._starts.get()
+                self._pids[task_id] = pid
+                self._started.setdefault(task_id, started)
+            now = time.time()
+            for job in self._pending:
+                if job.get("timed_out"):
+                    continue
+                times = [self._started[t] for t, _, _ in job["tasks"] if t in self._started]
+                if not times or now - min(times) < self.timeout:
+                    continue
+                job["timed_out"] = True
+                for (task_id, _, _), future in zip(job["tasks"], job["futures"]):
+                    if not future.cancel() and not future.done():
+                        self._abandoned.add(task_id)
+            victims = {self._pids[t] for t in self._abandoned if t in self._pids}
+            if not victims:
+                return
+            for pid in victims:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass  # finished on its own
+            self._restart()
+
+    def submit(self, path: str) -> Dict:
+        ext = os.path.splitext(path)[1].lower()
+        job = {"path": path, "ext": ext, "tasks": [], "futures": [], "retried": set()}
+        if ext not in SUPPORTED_EXTENSIONS:
+            job["error"] = f"Unsupported file type: {ext}"
+            return job
+        if ext == ".pdf":
+            try:
+                pages = _pdf_page_count(path)
+            except Exception as e:
+                job["error"] = f"Cannot open PDF: {e}"
+                return job
+            with self._lock:
+                self._pending.append(job)
+                for start in range(0, pages, self.pages_per_task):
+                    stop = min(start + self.pages_per_task, pages)
+                    self._submit_task(job, _extract_pdf_pages, path, start, stop)
+        else:
+            with self._lock:
+                self._pending.append(job)
+                self._submit_task(job, read_file, path)
+        return job
+
+    def _forget(self, job: Dict):
+        with self._lock:
+            self._pending.remove(job)
+            for task_id, _, _ in job["tasks"]:
+                self._pids.pop(task_id, None)
+                self._started.pop(task_id, None)
+
+    def collect(self, job: Dict) -> Dict:
+        result = {"path": job["path"], "text": "", "failed_pages": []}
+        if "error" in job:
+            result["error"] = job["error"]
+            return result
+
+        parts = []
+        try:
+            while len(parts) < len(job["futures"]) and not job.get("timed_out"):
+                future = job["futures"][len(parts)]
+                try:
+                    parts.append(future.result(timeout=REAP_INTERVAL))
+                    continue
+                except (FutureTimeout, CancelledError):
+                    pass
+                except BrokenProcessPool:
+                    # Lost with a pool that was replaced (resubmitted unless
+                    # it was lost before): wait for the new future
+                    self._reap()
+                    with self._lock:
+                        if job["futures"][len(parts)] is future:
+                            self._restart()
+                        if job["futures"][len(parts)] is future:
+                            raise
+                    continue
+                # Still waiting: time out stuck documents, this one included
+                self._reap()
+        except BrokenProcessPool:
+            self._forget(job)
+            result["error"] = "Parser process died"
+            return result
+        except Exception as e:
+            self._forget(job)
+            result["error"] = str(e)
+            return result
+        self._forget(job)
+        if job.get("timed_out"):
+            result["error"] = f"Timed out after {self.timeout:g}s"
+            return result
+
+        if job["ext"] != ".pdf":
+            result["text"] = parts[0]
+            return result
+
+        texts = []
+        for pages in parts:
+            for page in pages:
+                if "error" in page:
+                    result["failed_pages"].append(page)
+                else:
+                    texts.append(page["text"])
+        result["text"] = "\n".join(texts)
+        return result
+
+    def load(self, path: str) -> Dict:
+        return self.collect(self.submit(path))
+
+    def load_many(self, paths: List[str]) -> List[Dict]:
+        """Submit every document up front, then collect results in input order."""
+        jobs = [self.submit(path) for path in paths]
+        return [self.collect(job) for job in jobs]
+
+    def close(self):
+        self._reap()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
 # python -m src.utils.file_loader
 # Quick Test
 
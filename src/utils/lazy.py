@@ -0,0 +1,90 @@
+# src/utils/lazy.py
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+class Lazy:
+    """
+    A model or client created by `factory` on the first get(), exactly once
+    even with concurrent callers. A failed creation is retried on the next
+    get(). `warmup(value)` runs a dummy call so the first real request does
+    not pay for lazy initialization inside the library.
+
+    Every instance registers itself in RESOURCES for warm-up and readiness.
+    """
+
+    def __init__(
+        self, name: str, factory: Callable, warmup: Callable = None, required: bool = True
+    ):
+        self.name = name
+        self.factory = factory
+        self.warmup_fn = warmup
+        self.required = required  # must be loaded for the API to be ready
+        self.value = None
+        self.loaded = False
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.error = None
+        self._lock = threading.Lock()
+        RESOURCES.append(self)
+
+    def get(self):
+        if self.loaded:
+            return self.value
+        with self._lock:
+            if not self.loaded:
+                started = time.perf_counter()
+                try:
+                    self.value = self.factory()
+                except Exception as e:
+                    self.error = f"{type(e).__name__}: {e}"
+                    raise
+                self.load_seconds = time.perf_counter() - started
+                self.loaded, self.error = True, None
+        return self.value
+
+    def warmup(self):
+        value = self.get()
+        if self.warmup_fn is not None:
+            started = time.perf_counter()
+            try:
+                self.warmup_fn(value)
+            except Exception as e:
+                self.error = f"warmup failed: {type(e).__name__}: {e}"
+                raise
+            self.warmup_seconds = time.perf_counter() - started
+
+    def status(self) -> Dict:
+        def seconds(value):
+            return round(value, 3) if value is not None else None
+
+        return {
+            "loaded": self.loaded,
+            "required": self.required,
+            "load_seconds": seconds(self.load_seconds),
+            "warmup_seconds": seconds(self.warmup_seconds),
+            "error": self.error,
+        }
+
+
+RESOURCES: List[Lazy] = []
+
+
+def warmup_all() -> Dict[str, str]:
+    """Load and warm every registered resource; returns errors by name."""
+    errors = {}
+    for resource in list(RESOURCES):
+        try:
+            resource.warmup()
+        except Exception as e:
+            errors[resource.name] = resource.error or f"{type(e).__name__}: {e}"
+    return errors
+
+
+def resources_ready() -> bool:
+    return all(r.loaded for r in RESOURCES if r.required)
+
+
+def resource_status() -> Dict[str, Dict]:
+    return {r.name: r.status() for r in RESOURCES}
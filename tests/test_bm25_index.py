@@ -0,0 +1,158 @@
+# tests/test_bm25_index.py
+import math
+from collections import Counter
+import numpy as np
+import pytest
+from src.database import bm25_index
+from src.database.bm25_index import BM25Index, tokenize
+
+TARGET = {"store": "test"}
+
+
+def reference_scores(docs, query, k1=bm25_index.BM25_K1, b=bm25_index.BM25_B):
+    """Textbook BM25 over the live documents {id: text}."""
+    tokens = {vid: tokenize(text) for vid, text in docs.items()}
+    n = len(tokens)
+    avgdl = sum(len(t) for t in tokens.values()) / n
+    scores = Counter()
+    for term in dict.fromkeys(tokenize(query)):
+        holders = [vid for vid, t in tokens.items() if term in t]
+        idf = math.log(1 + (n - len(holders) + 0.5) / (len(holders) + 0.5))
+        for vid in holders:
+            tf = tokens[vid].count(term)
+            norm = k1 * (1 - b + b * len(tokens[vid]) / avgdl)
+            scores[vid] += idf * tf * (k1 + 1) / (tf + norm)
+    return scores
+
+
+def assert_matches_reference(index, docs, queries, top_k=10):
+    for query in queries:
+        got = index.search(query, top_k=top_k)
+        expected = reference_scores(docs, query)
+        assert len(got) == min(top_k, len(expected))
+        for vid, score in got:
+            assert score == pytest.approx(expected[vid], rel=1e-4)
+        # Ties may come back in either order: compare the scores
+        best = sorted(expected.values(), reverse=True)[:top_k]
+        assert [s for _, s in got] == pytest.approx(best, rel=1e-4)
+
+
+def make_corpus(size, seed=0):
+    rng = np.random.default_rng(seed)
+    # Zipf-like word frequencies: a few words in most chunks (the common-term
+    # path), a long tail of rare ones
+    words = [f"w{i}" for i in range(300)]
+    p = 1 / np.arange(1, len(words) + 1)
+    p /= p.sum()
+    return {
+        f"doc_{i}": " ".join(rng.choice(words, size=rng.integers(5, 40), p=p))
+        for i in range(size)
+    }
+
+
+QUERIES = ["w0", "w0 w1", "w5 w120", "w250", "w2 w3 w200 w299", "missing", "w7 w7 w8"]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return BM25Index(path=str(tmp_path / "bm25"), target=TARGET)
+
+
+# Scores are exact when every query term takes the same path: all rare (each
+# one nominates candidates) or all common (candidates from champion lists
+# that here hold every row). A mix only scores common terms on the rows the
+# rare ones found, by design.
+@pytest.fixture(params=[1.0, 0.0], ids=["rare-terms", "common-terms"])
+def df_ratio(request, monkeypatch):
+    monkeypatch.setattr(bm25_index, "BM25_MAX_DF_RATIO", request.param)
+
+
+def test_duplicate_ids_in_one_batch_keep_the_last_text(index):
+    index.add([("a", "apple pie"), ("b", "banana bread"), ("a", "cherry tart")])
+    assert index.count == 2
+    assert index.search("apple") == []
+    assert [vid for vid, _ in index.search("cherry")] == ["a"]
+
+
+def test_replace_and_delete_match_reference(index, df_ratio):
+    docs = make_corpus(200)
+    index.add(docs.items())
+    index.merge()
+    assert_matches_reference(index, docs, QUERIES)
+
+    # Replaced and deleted rows stay in the postings until the next merge;
+    # they must neither score nor count towards df
+    replaced = {f"doc_{i}": f"w250 w250 w3 replaced{i}" for i in range(0, 200, 7)}
+    index.add(replaced.items())
+    deleted = [f"doc_{i}" for i in range(3, 200, 11) if f"doc_{i}" not in replaced]
+    index.delete(deleted)
+    docs.update(replaced)
+    for vid in deleted:
+        del docs[vid]
+    assert index.count == len(docs)
+    assert index.count < len(index.ids)
+    assert_matches_reference(index, docs, QUERIES + ["replaced14"])
+
+    index.merge()
+    assert len(index.ids) == len(docs) == index.count
+    assert bool(index.alive.all())
+    assert_matches_reference(index, docs, QUERIES + ["replaced14"])
+
+
+def test_deleted_ids_are_not_returned(index):
+    index.add([("a", "solar panel"), ("b", "solar farm"), ("c", "wind farm")])
+    index.delete(["b", "unknown"])
+    assert sorted(vid for vid, _ in index.search("solar farm")) == ["a", "c"]
+    assert [vid for vid, _ in index.search("solar")] == ["a"]
+
+
+def test_save_and_reload(tmp_path, df_ratio):
+    path = str(tmp_path / "bm25")
+    docs = make_corpus(120, seed=1)
+    index = BM25Index(path=path, target=TARGET)
+    index.add(docs.items())
+    index.save()
+    index.add([("doc_0", "w250 changed")])
+    index.delete(["doc_1"])
+    index.save()
+    docs["doc_0"] = "w250 changed"
+    del docs["doc_1"]
+
+    reloaded = BM25Index(path=path, target=TARGET)
+    assert reloaded.count == len(docs)
+    assert_matches_reference(reloaded, docs, QUERIES + ["changed"])
+
+
+def test_unsaved_writes_are_replayed_from_the_log(tmp_path):
+    # A process that stops mid-ingest leaves its batches in log.jsonl only
+    path = str(tmp_path / "bm25")
+    index = BM25Index(path=path, target=TARGET)
+    index.add([("a", "first text"), ("b", "second text")])
+    index.delete(["a"])
+
+    reloaded = BM25Index(path=path, target=TARGET)
+    assert reloaded.count == 1
+    assert [vid for vid, _ in reloaded.search("text")] == ["b"]
+
+
+def test_other_target_is_ignored(tmp_path):
+    path = str(tmp_path / "bm25")
+    index = BM25Index(path=path, target=TARGET)
+    index.add([("a", "first text")])
+    index.save()
+    assert BM25Index(path=path, target={"store": "other"}).count == 0
+
+
+def test_refresh_picks_up_another_instance(tmp_path, monkeypatch):
+    monkeypatch.setattr(bm25_index, "BM25_RELOAD_CHECK", 0)
+    path = str(tmp_path / "bm25")
+    writer = BM25Index(path=path, target=TARGET)
+    reader = BM25Index(path=path, target=TARGET)
+
+    writer.add([("a", "river delta"), ("b", "mountain pass")])
+    assert [vid for vid, _ in reader.search("river")] == ["a"]
+
+    writer.delete(["a"])
+    writer.save()
+    assert reader.search("river") == []
+    assert [vid for vid, _ in reader.search("mountain")] == ["b"]
@@ -0,0 +1,91 @@
+# tests/test_embedding_batcher.py
+import asyncio
+import threading
+import numpy as np
+import pytest
+from src.core.embedding_batcher import EmbeddingBatcher
+
+TIMEOUT = 5
+
+
+class GatedEncoder:
+    """encode_fn that records its batches and can be held mid-encode."""
+
+    def __init__(self):
+        self.batches = []
+        self.entered = threading.Event()
+        self.gate = threading.Event()
+        self.gate.set()
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        self.entered.set()
+        assert self.gate.wait(TIMEOUT)
+        return np.array([[float(len(t)), 1.0] for t in texts])
+
+
+def test_each_caller_gets_its_own_row():
+    encoder = GatedEncoder()
+    encoder.gate.clear()
+    batcher = EmbeddingBatcher(encode_fn=encoder, window_ms=50, max_items=8)
+
+    # Hold the first batch so the rest queue up behind it
+    first = batcher.submit("a")
+    assert encoder.entered.wait(TIMEOUT)
+    futures = [batcher.submit("x" * n) for n in range(1, 5)]
+    encoder.gate.set()
+
+    assert first.result(TIMEOUT) == [1.0, 1.0]
+    assert [f.result(TIMEOUT) for f in futures] == [[float(n), 1.0] for n in range(1, 5)]
+    assert encoder.batches[1] == ["x", "xx", "xxx", "xxxx"]
+    assert batcher.stats()["batches"] == 2
+
+
+def test_cancelled_caller_does_not_stop_the_batcher():
+    encoder = GatedEncoder()
+    encoder.gate.clear()
+    batcher = EmbeddingBatcher(encode_fn=encoder, window_ms=0, max_items=8)
+
+    running = batcher.submit("running")
+    assert encoder.entered.wait(TIMEOUT)
+    waiting = batcher.submit("gave up")
+    assert waiting.cancel()
+    encoder.gate.set()
+
+    assert running.result(TIMEOUT) == [7.0, 1.0]
+    # The thread is still alive and serves the next caller
+    assert batcher.submit("next").result(TIMEOUT) == [4.0, 1.0]
+    assert ["gave up"] not in encoder.batches
+
+
+def test_timed_out_await_does_not_stop_the_batcher():
+    encoder = GatedEncoder()
+    encoder.gate.clear()
+    batcher = EmbeddingBatcher(encode_fn=encoder, window_ms=0, max_items=8)
+
+    async def scenario():
+        blocked = batcher.submit("blocked")
+        assert encoder.entered.wait(TIMEOUT)
+        # wait_for cancels the wrapped concurrent future on timeout
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(asyncio.wrap_future(batcher.submit("late")), 0.01)
+        encoder.gate.set()
+        assert await asyncio.wrap_future(blocked) == [7.0, 1.0]
+        return await asyncio.wait_for(asyncio.wrap_future(batcher.submit("ok")), TIMEOUT)
+
+    assert asyncio.run(scenario()) == [2.0, 1.0]
+
+
+def test_encode_error_reaches_callers_and_batcher_recovers():
+    calls = []
+
+    def flaky(texts):
+        calls.append(list(texts))
+        if len(calls) == 1:
+            raise RuntimeError("model failed")
+        return np.ones((len(texts), 2))
+
+    batcher = EmbeddingBatcher(encode_fn=flaky, window_ms=0, max_items=8)
+    with pytest.raises(RuntimeError, match="model failed"):
+        batcher.submit("first").result(TIMEOUT)
+    assert batcher.submit("second").result(TIMEOUT) == [1.0, 1.0]
@@ -0,0 +1,179 @@
+# tests/test_ingest_manifest.py
+import os
+import pytest
+from src.core import ingestion_pipeline
+from src.core.ingestion_pipeline import IngestionPipeline
+from src.core.text_chunker import Chunker
+from src.database.ingest_manifest import IngestManifest, hash_text
+
+TARGET = {"index": "test", "dimension": 2}
+
+
+def write(path, text):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    return str(path)
+
+
+def chunks_of(*texts):
+    return [
+        {"chunk_index": i, "chunk_text": text, "sha256": hash_text(text)}
+        for i, text in enumerate(texts)
+    ]
+
+
+def recorded(fname, chunks):
+    return [{"id": f"{fname}_{c['chunk_index']}", "sha256": c["sha256"]} for c in chunks]
+
+
+# -------------------------
+def test_check_fast_path_touch_and_edit(tmp_path):
+    manifest = IngestManifest(str(tmp_path / "manifest.json"), target=TARGET)
+    path = write(tmp_path / "a.txt", "first version")
+    unchanged, fingerprint = manifest.check(path)
+    assert not unchanged
+    manifest.record_file("a.txt", fingerprint, [])
+
+    assert manifest.check(path) == (True, fingerprint)
+
+    # Touched but identical: still unchanged, the new mtime is remembered
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    unchanged, touched = manifest.check(path)
+    assert unchanged
+    assert manifest.files["a.txt"]["mtime_ns"] == touched["mtime_ns"] != fingerprint["mtime_ns"]
+
+    write(tmp_path / "a.txt", "second version")
+    unchanged, edited = manifest.check(path)
+    assert not unchanged
+    assert edited["sha256"] != fingerprint["sha256"]
+
+
+def test_changed_chunks_and_dropped_ids(tmp_path):
+    manifest = IngestManifest(str(tmp_path / "manifest.json"), target=TARGET)
+    old = chunks_of("one", "two", "three")
+    assert manifest.changed_chunks("a.txt", old) == [0, 1, 2]
+    assert manifest.record_file("a.txt", {}, recorded("a.txt", old)) == []
+
+    new = chunks_of("one", "TWO", "three", "four")
+    assert manifest.changed_chunks("a.txt", new) == [1, 3]
+    # A chunk that moved to another position is re-embedded under its new id
+    assert manifest.changed_chunks("a.txt", chunks_of("two", "one")) == [0, 1]
+
+    shorter = chunks_of("one")
+    assert manifest.record_file("a.txt", {}, recorded("a.txt", shorter)) == [
+        "a.txt_1",
+        "a.txt_2",
+    ]
+    assert manifest.chunk_count("a.txt") == 1
+
+
+def test_remove_missing(tmp_path):
+    manifest = IngestManifest(str(tmp_path / "manifest.json"), target=TARGET)
+    manifest.record_file("a.txt", {}, recorded("a.txt", chunks_of("x")))
+    manifest.record_file("b.txt", {}, recorded("b.txt", chunks_of("y", "z")))
+    assert manifest.remove_missing(["a.txt"]) == ["b.txt_0", "b.txt_1"]
+    assert list(manifest.files) == ["a.txt"]
+
+
+def test_save_reload_and_target_guard(tmp_path):
+    path = str(tmp_path / "cache" / "manifest.json")
+    manifest = IngestManifest(path, target=TARGET)
+    manifest.record_file("a.txt", {"size": 1}, recorded("a.txt", chunks_of("x")))
+    manifest.save()
+
+    assert IngestManifest(path, target=TARGET).files == manifest.files
+    # Vectors recorded for another index are not in this one
+    assert IngestManifest(path, target={**TARGET, "dimension": 3}).files == {}
+
+
+# -------------------------
+class ParagraphChunker(Chunker):
+    name = "paragraph"
+
+    def chunk(self, text, with_embeddings=False):
+        paragraphs = [p.strip() for p in text.split("\n\n") if p.strip()]
+        return [{"chunk_index": i, "chunk_text": p} for i, p in enumerate(paragraphs)]
+
+
+class InlineLoader:
+    """ParallelLoader stand-in that reads text files in the calling thread."""
+
+    def load(self, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return {"text": f.read(), "failed_pages": []}
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def index(monkeypatch):
+    """Record what the pipeline embeds, upserts and deletes."""
+    calls = {"embedded": [], "upserted": [], "deleted": []}
+
+    def embed_chunks(texts):
+        calls["embedded"].extend(texts)
+        return [{"embedding": [float(len(t)), 1.0]} for t in texts]
+
+    monkeypatch.setattr(ingestion_pipeline, "ParallelLoader", InlineLoader)
+    monkeypatch.setattr(ingestion_pipeline, "embed_chunks", embed_chunks)
+    monkeypatch.setattr(
+        ingestion_pipeline,
+        "upsert_vectors",
+        lambda vectors: calls["upserted"].extend(v["id"] for v in vectors),
+    )
+    monkeypatch.setattr(ingestion_pipeline, "delete_vectors", calls["deleted"].extend)
+    monkeypatch.setattr(ingestion_pipeline, "flush", lambda: None)
+    return calls
+
+
+def run(manifest_path, paths, force=False):
+    pipeline = IngestionPipeline(
+        manifest=IngestManifest(manifest_path, target=TARGET),
+        chunk_embeddings="encode",
+        streaming=False,
+        chunker=ParagraphChunker(),
+    )
+    return pipeline.run(paths, force=force)
+
+
+def test_reingest_only_touches_what_changed(tmp_path, index):
+    manifest_path = str(tmp_path / "manifest.json")
+    a = write(tmp_path / "a.txt", "alpha\n\nbeta\n\ngamma")
+    b = write(tmp_path / "b.txt", "delta")
+
+    result = run(manifest_path, [a, b])
+    assert result["status"] == "completed"
+    assert sorted(index["upserted"]) == ["a.txt_0", "a.txt_1", "a.txt_2", "b.txt_0"]
+
+    # Nothing changed: no file is parsed, embedded or upserted
+    index["embedded"].clear()
+    index["upserted"].clear()
+    result = run(manifest_path, [a, b])
+    assert result["stats"]["files_unchanged"] == 2
+    assert index["embedded"] == index["upserted"] == index["deleted"] == []
+
+    # One paragraph edited, one dropped, b.txt removed from the corpus
+    write(tmp_path / "a.txt", "alpha\n\nbeta, revised")
+    result = run(manifest_path, [a])
+    assert index["embedded"] == ["beta, revised"]
+    assert index["upserted"] == ["a.txt_1"]
+    assert sorted(index["deleted"]) == ["a.txt_2", "b.txt_0"]
+    assert result["ingested"] == [{"file": "a.txt", "chunks": 2, "embedded": 1, "deleted": 1}]
+    assert result["stats"]["vectors_deleted"] == 2
+
+    manifest = IngestManifest(manifest_path, target=TARGET)
+    assert list(manifest.files) == ["a.txt"]
+    assert [c["id"] for c in manifest.files["a.txt"]["chunks"]] == ["a.txt_0", "a.txt_1"]
+
+
+def test_force_reembeds_unchanged_files(tmp_path, index):
+    manifest_path = str(tmp_path / "manifest.json")
+    a = write(tmp_path / "a.txt", "alpha\n\nbeta")
+    run(manifest_path, [a])
+    index["upserted"].clear()
+
+    run(manifest_path, [a], force=True)
+    assert sorted(index["upserted"]) == ["a.txt_0", "a.txt_1"]
+    assert index["deleted"] == []